@@ -0,0 +1,74 @@
+import numpy as np
+import velvet as vt
+
+class AWGN(object):
+    """
+    Times adding noise to one million complex samples with the awgn
+    function and with an AWGNChannel.
+    """
+    params = [['awgn', 'AWGNChannel'], ['double', 'single']]
+    param_names = ['method', 'precision']
+
+    def setup(self, method, precision):
+        dtype = np.complex128 if precision == 'double' else np.complex64
+        self.v = np.exp(1j * np.arange(10**6)).astype(dtype)
+        self.ch = vt.AWGNChannel(0)
+
+    def time_awgn(self, method, precision):
+        if method == 'awgn':
+            vt.awgn(self.v, 10.0)
+        else:
+            self.ch.awgn(self.v, 10.0)
+
+class AWGNSweep(object):
+    """
+    Times noise for 21 SNR points on 100000 complex samples, one awgn call
+    per SNR versus one sweep.
+    """
+    params = [['loop', 'sweep', 'common']]
+    param_names = ['mode']
+
+    def setup(self, mode):
+        self.v = np.exp(1j * np.arange(100000))
+        self.snr = np.arange(0.0, 21.0)
+        self.ch = vt.AWGNChannel(0)
+
+    def time_sweep(self, mode):
+        if mode == 'loop':
+            for snr in self.snr:
+                self.ch.awgn(self.v, snr)
+        else:
+            self.ch.awgn(self.v, self.snr, common=(mode == 'common'))
+
+class FadingGains(object):
+    """
+    Times one million fading gains for 16 realizations of a 3 tap
+    channel, in one block and in blocks of 10000 samples.
+    """
+    params = [[1000000, 10000]]
+    param_names = ['block']
+
+    def setup(self, block):
+        self.ch = vt.FadingChannel(100.0, 1e6, [0, 3, 7], [0.0, -3.0, -9.0],
+                                   realizations=16, seed=0)
+
+    def time_gains(self, block):
+        for n in range(1000000 // block):
+            self.ch.gains(block)
+
+class Multipath(object):
+    """
+    Times 64 bursts of 20000 complex samples through 64 channel impulse
+    responses of length M.
+    """
+    params = [[4, 32, 256], ['auto', 'direct', 'fft']]
+    param_names = ['M', 'method']
+
+    def setup(self, M, method):
+        h = np.random.randn(64, M) + 1j * np.random.randn(64, M)
+        self.x = np.random.randn(64, 20000) + 1j * np.random.randn(64, 20000)
+        self.ch = vt.MultipathChannel(h, method)
+
+    def time_filter(self, M, method):
+        self.ch.reset()
+        self.ch.filter(self.x)
@@ -0,0 +1,76 @@
+import numpy as np
+import velvet as vt
+
+class BitErrors(object):
+    """
+    Times counting the bit errors of 64 bursts of 16384 bits, as bits and
+    as packed uint8 and uint64 words.
+    """
+    params = [['bits', 'uint8', 'uint64']]
+    param_names = ['format']
+
+    def setup(self, format):
+        x = np.random.randint(0, 2, (64, 16384)).astype(np.uint8)
+        y = x ^ (np.random.rand(64, 16384) < 0.01)
+        if format == 'bits':
+            self.x, self.y = x, y
+        else:
+            self.x = np.packbits(x, axis=-1).view(format)
+            self.y = np.packbits(y, axis=-1).view(format)
+        self.packed = format != 'bits'
+
+    def time_biterr(self, format):
+        vt.biterr(self.x, self.y, self.packed)
+
+    def time_errorcounter(self, format):
+        ec = vt.ErrorCounter(self.packed)
+        for ii in range(64):
+            ec.update(self.x[ii], self.y[ii])
+
+class BERSim(object):
+    """
+    Times a three point MSK BER simulation stopping at 100 errors, in
+    this process and on a pool of 4 processes.
+    """
+    params = [[1, 4]]
+    param_names = ['processes']
+
+    def setup(self, processes):
+        self.link = vt.CPMLink(2, 1.0/2400, 0.5, np.ones(8), 8, num_syms=1000)
+
+    def time_bersim(self, processes):
+        vt.bersim(self.link, [2.0, 4.0, 6.0], processes=processes, seed=0)
+
+class ISBER(object):
+    """
+    Times importance sampling of 2000 trials at Eb/No = 12 dB, where
+    MSK has a BER near 2e-8, with the Viterbi and soft detectors.
+    """
+    params = [['viterbi', 'soft']]
+    param_names = ['detector']
+
+    def setup(self, detector):
+        self.link = vt.CPMLink(2, 1.0/2400, 0.5, np.ones(8), 8, num_syms=16,
+                               detector=detector)
+
+    def time_isber(self, detector):
+        vt.isber(self.link, 12.0, trials=2000, seed=0)
+
+class BERAWGNGrid(object):
+    """
+    Times theoretical BER over a grid of 100 Eb/No points, 4 alphabet
+    sizes and 2500 modulation indices, and the batch inverse over 100
+    target BERs.
+    """
+
+    def setup(self):
+        self.EbNodB = np.linspace(0, 20, 100)[:, np.newaxis, np.newaxis]
+        self.ber = np.logspace(-9, -2, 100)[:, np.newaxis, np.newaxis]
+        self.M = np.array([2, 4, 8, 16])[:, np.newaxis]
+        self.h = np.linspace(0.1, 0.9, 2500)
+
+    def time_berawgn(self):
+        vt.berawgn(self.EbNodB, 'cpfsk', self.M, self.h, 1)
+
+    def time_berawgninv(self):
+        vt.berawgninv(self.ber, 'cpfsk', self.M, self.h[0:50], 1)
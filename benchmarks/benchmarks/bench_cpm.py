@@ -0,0 +1,156 @@
+import numpy as np
+import velvet as vt
+
+class CPMModEngine(object):
+    """
+    Times CPM modulation of 10000 symbols with the filter and the phase
+    table engines.
+    """
+    params = [[2, 4, 8], [1, 3], ['filter', 'table']]
+    param_names = ['M', 'L', 'engine']
+
+    def setup(self, M, L, engine):
+        fsT = 8
+        self.cpm = vt.CPMMod(M, 1.0/2400, 0.5, vt.rectpulse(L, fsT), fsT,
+                             engine=engine)
+        self.syms = 2 * np.random.randint(0, M, 10000) - (M - 1)
+
+    def time_mod(self, M, L, engine):
+        self.cpm.mod(self.syms)
+
+class CPMModBatch(object):
+    """
+    Times CPM modulation of 1000 bursts of 100 symbols, one call per
+    burst versus one batched call.
+    """
+    params = [['loop', 'batch'], ['filter', 'table']]
+    param_names = ['mode', 'engine']
+
+    def setup(self, mode, engine):
+        fsT = 8
+        self.cpm = vt.CPMMod(4, 1.0/2400, 0.25, vt.rectpulse(2, fsT), fsT,
+                             engine=engine)
+        self.syms = 2 * np.random.randint(0, 4, (1000, 100)) - 3
+
+    def time_mod(self, mode, engine):
+        if mode == 'batch':
+            self.cpm.reset()
+            self.cpm.mod(self.syms)
+        else:
+            for burst in self.syms:
+                self.cpm.reset()
+                self.cpm.mod(burst)
+
+class LaurentModComponents(object):
+    """
+    Times binary CPM modulation of 10000 symbols with K Laurent
+    components, and tracks the mean squared error against CPMMod.
+    """
+    params = [[1, 2, 4]]
+    param_names = ['K']
+
+    def setup(self, K):
+        fsT = 8
+        u = np.hanning(3 * fsT)
+        np.random.seed(0)
+        self.syms = 2 * np.random.randint(0, 2, 10000) - 1
+        self.ref = vt.CPMMod(2, 1.0/2400, 0.5, u, fsT).mod(self.syms)
+        self.mod = vt.LaurentMod(2, 1.0/2400, 0.5, u, fsT, K)
+
+    def time_mod(self, K):
+        self.mod.mod(self.syms)
+
+    def track_mse(self, K):
+        self.mod.reset()
+        err = np.abs(self.mod.mod(self.syms) - self.ref)[16:]
+        return np.mean(err**2)
+
+class CPMDetector(object):
+    """
+    Times detection of bursts of 2000 symbols of binary GMSK-like CPM
+    (L = 3, h = 1/2) at 4 dB per-sample SNR, and tracks the symbol error
+    count, for the full-state Viterbi and the Laurent reduced-state
+    detectors. CPMDemod detects one burst at a time, LaurentDemod all
+    bursts together.
+    """
+    params = [['full', 'laurent'], [1, 16]]
+    param_names = ['detector', 'bursts']
+
+    def setup(self, detector, bursts):
+        fsT = 8
+        u = np.hanning(3 * fsT)
+        np.random.seed(0)
+        self.syms = 2 * np.random.randint(0, 2, (bursts, 2000)) - 1
+        cpm = vt.CPMMod(2, 1.0/2400, 0.5, u, fsT)
+        self.v = np.array([vt.awgn(cpm.mod(s), 4.0) for s in self.syms])
+        if detector == 'full':
+            self.demod = vt.CPMDemod(2, 1.0/2400, 0.5, u, fsT)
+        else:
+            self.demod = vt.LaurentDemod(2, 1.0/2400, 0.5, u, fsT)
+
+    def detect(self, detector):
+        if detector == 'full':
+            x = []
+            for v in self.v:
+                self.demod.reset()
+                x.append(self.demod.demod(v))
+            return np.array(x)
+        else:
+            self.demod.reset()
+            return self.demod.demod(self.v)
+
+    def time_demod(self, detector, bursts):
+        self.detect(detector)
+
+    def track_symbol_errors(self, detector, bursts):
+        return np.sum(self.detect(detector) != self.syms)
+
+class DiscriminatorDetector(object):
+    """
+    Times discriminator detection of 100 streams of 10000 CPFSK symbols.
+    """
+    params = [[2, 4, 8]]
+    param_names = ['M']
+
+    def setup(self, M):
+        fsT = 8
+        cpm = vt.CPMMod(M, 1.0/2400, 0.5, vt.rectpulse(1, fsT), fsT)
+        self.v = cpm.mod(2 * np.random.randint(0, M, (100, 10000)) - (M - 1))
+        self.demod = vt.DiscriminatorDemod(M, 1.0/2400, 0.5, fsT)
+
+    def time_demod(self, M):
+        self.demod.reset()
+        self.demod.demod(self.v)
+
+class MFSKDetector(object):
+    """
+    Times noncoherent MFSK detection of 100 streams of 10000 symbols.
+    """
+    params = [[2, 4, 8, 16]]
+    param_names = ['M']
+
+    def setup(self, M):
+        fsT = 16
+        cpm = vt.CPMMod(M, 1.0/2400, 1.0, vt.rectpulse(1, fsT), fsT)
+        self.v = cpm.mod(2 * np.random.randint(0, M, (100, 10000)) - (M - 1))
+        self.demod = vt.MFSKDemod(cpm)
+
+    def time_demod(self, M):
+        self.demod.reset()
+        self.demod.demod(self.v)
+
+class MinDistance(object):
+    """
+    Times the uncached minimum distance search over a grid of 96
+    modulation indices, for full and partial response pulses.
+    """
+    params = [[2, 4], ['1REC', '3RC']]
+    param_names = ['M', 'pulse']
+
+    def setup(self, M, pulse):
+        self.u = np.ones(8) if pulse == '1REC' else np.hanning(26)[1:-1]
+        self.h = np.arange(0.05, 1.0, 0.01)
+
+    def time_cpmdmin(self, M, pulse):
+        for h in self.h:
+            vt.cpmdmin(M, h, self.u, 8, cache=False)
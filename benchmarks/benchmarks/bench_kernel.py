@@ -1,4 +1,3 @@
-
 import numpy as np
 import velvet as vt
 import scipy.signal
@@ -20,3 +19,38 @@ class Kernel(object):
         vt.conv(self.x, self.h)
 
     time_conv.param_names = ['N']
+
+class ConvMethod(object):
+    """
+    Direct versus FFT convolution of a signal of length N with a filter
+    of length M. Comparing the two methods shows where the crossover
+    falls on the benchmark machine.
+    """
+    params = [[1000, 10000], [4, 16, 64, 256, 1024], ['direct', 'fft', 'auto']]
+    param_names = ['N', 'M', 'method']
+
+    def setup(self, n, m, method):
+        self.x = np.random.randn(n)
+        self.h = np.random.randn(m)
+
+    def time_conv(self, n, m, method):
+        vt.conv(self.x, self.h, method)
+
+class ConvCrossover(object):
+    """
+    Filter length at which conv(..., method='auto') switches from direct
+    to FFT convolution, after calibrating the cost model.
+    """
+    params = [1000, 10000, 100000]
+    param_names = ['N']
+
+    def setup(self, n):
+        vt.calibrate_conv()
+
+    def track_crossover(self, n):
+        for m in 2**np.arange(1, 15):
+            if vt.sigproc._conv_method(n, m) == 'fft':
+                return int(m)
+        return 0
+
+    track_crossover.unit = 'taps'
@@ -0,0 +1,42 @@
+import numpy as np
+import velvet as vt
+
+class NCOOutput(object):
+    """
+    Times one million NCO samples of a CPFSK-like frequency sequence
+    against np.exp of the unbounded running phase.
+    """
+    params = [['numpy', 'exp', 'lut', 'rotation'], [None, 32]]
+    param_names = ['output', 'bits']
+
+    def setup(self, output, bits):
+        self.Fs = 8000.0
+        f = np.random.choice([-600.0, -200.0, 200.0, 600.0], 125000)
+        self.freq = np.repeat(f, 8)
+        if output != 'numpy':
+            self.nco = vt.NCO(self.Fs, bits=bits, output=output)
+
+    def time_generate(self, output, bits):
+        if output == 'numpy':
+            np.exp(2j * np.pi * np.cumsum(self.freq / self.Fs))
+        else:
+            self.nco.generate(self.freq)
+
+class CPMModNCO(object):
+    """
+    Times CPM modulation of 10000 symbols with the default phase
+    integration and with an NCO.
+    """
+    params = [[None, 'exp', 'lut', 'rotation']]
+    param_names = ['nco']
+
+    def setup(self, nco):
+        fsT = 8
+        if nco is not None:
+            nco = vt.NCO(fsT * 2400.0, output=nco)
+        self.cpm = vt.CPMMod(4, 1.0/2400, 0.5, vt.rectpulse(1, fsT), fsT,
+                             nco=nco)
+        self.syms = 2 * np.random.randint(0, 4, 10000) - 3
+
+    def time_mod(self, nco):
+        self.cpm.mod(self.syms)
@@ -7,29 +7,66 @@ The following commands are available:
 
 Channel Models
     awgn                - Additive white Gaussian noise channel
+    AWGNChannel         - Seeded additive white Gaussian noise channel
+    FadingChannel       - Rayleigh and Rician fading channel
+    MultipathChannel    - Stateful tapped delay line channel
 
 Communications
     berawgn             - Theoretical BER for AWGN
+    berawgninv          - Eb/No for a theoretical BER for AWGN
+    berconfint          - Confidence interval of a measured BER
+    bersim              - Monte Carlo BER simulation
     biterr              - Bit error rate
+    bits2syms           - Map bits to symbols
+    isber               - Importance sampling BER estimation
+    ErrorCounter        - Running bit error counter
+    syms2bits           - Map symbols to bits
 
 Math
     qfunc               - Q-function
 
 Modems
     CPMMOD              - Continous phase modulation
+    cpmdmin             - CPM minimum distance search
+    CPMDemod            - CPM maximum-likelihood sequence detector
+    CPMLink             - CPM over AWGN link for bersim
+    CPMSoftDemod        - CPM soft-output (BCJR) detector
+    DiscriminatorDemod  - Noncoherent CPFSK discriminator detector
+    laurent             - Laurent decomposition of binary CPM
+    LaurentDemod        - Reduced-state binary CPM detector
+    LaurentMod          - Binary CPM modulation by Laurent decomposition
+    MFSKDemod           - Noncoherent MFSK filterbank detector
+
+Precision
+    get_precision       - Get the default floating point precision
+    set_precision       - Set the default floating point precision
 
 Pulse Shapes
     rectpulse           - Rectangular pulse
 
 Signal Processing
+    BlockConvolver      - Streaming overlap-add/overlap-save convolution
+    blockconv           - Block convolution
     conv                - Convolution
+    Convolver           - Convolution with a fixed, cached filter
+    FMDetector          - Streaming FM discriminator
+    freqshift           - Frequency shift
+    nextfastlen         - Next fast FFT size
+    Interpolator        - Polyphase interpolation filter
+    NCO                 - Numerically controlled oscillator
+    upfirdn             - Upsample, FIR filter and downsample
     upsample            - Upsample data
 
 """
 
+from .bersim import *
 from .channel import *
 from .commfunc import *
+from .cpmdemod import *
+from .cpmdist import *
 from .cpmmod import *
+from .laurent import *
+from .nco import *
 from .pulses import *
 from .sigproc import *
 from .utils import *
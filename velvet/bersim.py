@@ -0,0 +1,487 @@
+"""BER Simulation Module
+"""
+
+#------------------------------------------------------------------------
+# Copyright (c) 2015 SGW
+#
+# Distributed under the terms of the New BSD License.
+#
+# The full License is in the file LICENSE
+#------------------------------------------------------------------------
+
+import multiprocessing
+import numpy as np
+import scipy.special
+from .channel import AWGNChannel
+from .commfunc import berconfint, biterr, bits2syms, syms2bits
+from .cpmdemod import CPMDemod, CPMSoftDemod
+from .cpmmod import CPMMod
+
+# Public API
+__all__ = ['bersim', 'CPMLink', 'isber']
+
+
+def bersim(link, EbNodB, min_errors=100, max_bits=10**6, rtol=None,
+           confidence=0.95, processes=None, batches=None, seed=None):
+    """
+    Monte Carlo bit error rate simulation.
+
+    ber, errors, bits = bersim(link, EbNodB) measures the bit error rate of
+    link at each Eb/No point in EbNodB, in dB. Batches of the link are run
+    on a process pool until a point has reached min_errors bit errors or
+    max_bits bits, so easy points stop early and hard points get more
+    trials.
+
+    link is called as x, y = link(channel, EbNodB), where channel is an
+    AWGNChannel with its own seeded noise stream, and returns the
+    transmitted and detected bits of one batch. Links run in other
+    processes, so they must be picklable, see CPMLink.
+
+    ber, errors, bits = bersim(..., rtol) also stops a point once the
+    half-width of its confidence interval, at the given confidence level,
+    is within rtol of the measured BER. See berconfint.
+
+    Every (point, batch) pair draws its noise from its own child of seed,
+    and batches are counted in order up to the stopping point, so the
+    results depend only on seed, not on the number of processes.
+
+    Parameters
+    -----------
+    link : callable
+        Link under test, called as link(channel, EbNodB)
+
+    EbNodB : {float, ndarray of floats}
+        Ratio of bit energy to noise power spectral density, in dB
+
+    min_errors : int
+        Bit errors after which a point stops, default is 100
+
+    max_bits : int
+        Bits after which a point stops, default is 10**6
+
+    rtol : float
+        Relative confidence interval half-width after which a point stops,
+        default is None
+
+    confidence : float
+        Confidence level for rtol, default is 0.95
+
+    processes : int
+        Number of worker processes, default is the number of CPUs. With 1
+        the batches run in this process.
+
+    batches : int
+        Batches per point handed to the pool at once, default is processes
+
+    seed : int, sequence of ints or numpy.random.SeedSequence
+        Seed, default is None
+
+    Returns
+    -------
+    ber : ndarray of floats
+        Measured bit error rate of each point
+
+    errors : ndarray of ints
+        Number of bit errors of each point
+
+    bits : ndarray of ints
+        Number of bits of each point
+
+    See Also
+    ---------
+    berawgn, berconfint, CPMLink
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> link = vt.CPMLink(2, 1.0/2400, 0.5, np.ones(8), 8)
+    >>> EbNodB = np.arange(0, 8.0)
+    >>> ber, errors, bits = vt.bersim(link, EbNodB, seed=1)
+    >>> bound = vt.berawgn(EbNodB, 'cpfsk', 2, 0.5, 1)
+
+    """
+    EbNodB = np.atleast_1d(np.asarray(EbNodB, dtype=float))
+    if EbNodB.ndim > 1:
+        raise TypeError("EbNodB must be a scalar or have 1-dimension")
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if batches is None:
+        batches = processes
+
+    # One noise stream per point, split again per batch
+    streams = AWGNChannel(seed).spawn(len(EbNodB))
+
+    errors = np.zeros(len(EbNodB), dtype=np.int64)
+    bits = np.zeros(len(EbNodB), dtype=np.int64)
+    active = list(range(len(EbNodB)))
+
+    pool = None
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+    try:
+        while active:
+            tasks = [(link, ch, EbNodB[ii]) for ii in active
+                     for ch in streams[ii].spawn(batches)]
+            if pool is None:
+                counts = list(map(_run_batch, tasks))
+            else:
+                counts = pool.map(_run_batch, tasks)
+
+            # Count batches in order up to each point's stopping point
+            done = []
+            for n, ii in enumerate(active):
+                for e, b in counts[n * batches:(n + 1) * batches]:
+                    errors[ii] += e
+                    bits[ii] += b
+                    if _stop(errors[ii], bits[ii], min_errors, max_bits,
+                             rtol, confidence):
+                        done.append(ii)
+                        break
+            active = [ii for ii in active if ii not in done]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return errors / bits.astype(float), errors, bits
+
+def isber(link, EbNodB, trials=10000, batch=1000, rtol=None,
+          confidence=0.95, seed=None):
+    """
+    Importance sampling bit error rate estimation.
+
+    ber, lower, upper = isber(link, EbNodB) estimates the bit error rate of
+    link at each Eb/No point in EbNodB, in dB, from trials importance
+    sampled trials, and returns the estimate with its confidence interval.
+    The noise of each trial is drawn from a biased density that makes
+    errors common, and every error is weighted by the likelihood ratio of
+    the trial, see AWGNChannel.isnoise. The estimate is unbiased, and at
+    low error rates it needs orders of magnitude fewer trials than
+    bersim.
+
+    link is called as x, y, logw = link.importance(channel, EbNodB, n),
+    and returns the transmitted and detected bits of n trials, one row per
+    trial, with the log likelihood ratio of each trial. See CPMLink.
+
+    ber, lower, upper = isber(..., rtol) stops a point early once the
+    half-width of its confidence interval is within rtol of the estimate.
+
+    Parameters
+    -----------
+    link : object
+        Link under test, with an importance(channel, EbNodB, n) method
+
+    EbNodB : {float, ndarray of floats}
+        Ratio of bit energy to noise power spectral density, in dB
+
+    trials : int
+        Maximum number of trials per point, default is 10000
+
+    batch : int
+        Trials per call to the link, default is 1000
+
+    rtol : float
+        Relative confidence interval half-width after which a point stops,
+        default is None
+
+    confidence : float
+        Confidence level, default is 0.95
+
+    seed : int, sequence of ints or numpy.random.SeedSequence
+        Seed, default is None
+
+    Returns
+    -------
+    ber : ndarray of floats
+        Estimated bit error rate of each point
+
+    lower : ndarray of floats
+        Lower limit of the confidence interval
+
+    upper : ndarray of floats
+        Upper limit of the confidence interval
+
+    Notes
+    ------
+    The interval is the normal approximation ber +/- z s / sqrt(n), where
+    s is the sample standard deviation of the weighted error rates of the
+    n trials.
+
+    See Also
+    ---------
+    bersim, AWGNChannel.isnoise
+
+    References
+    -----------
+    .. [1] Smith, P.J., Shafi, M. and Gao, H., "Quick simulation: a review
+           of importance sampling techniques in communications systems,"
+           IEEE J. Sel. Areas Commun., vol. 15, no. 4, pp. 597-613, 1997.
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> link = vt.CPMLink(2, 1.0/2400, 0.5, np.ones(8), 8, num_syms=16)
+    >>> ber, lower, upper = vt.isber(link, [10.0, 12.0], seed=0)
+    >>> bound = vt.berawgn(np.array([10.0, 12.0]), 'cpfsk', 2, 0.5, 2)
+
+    """
+    EbNodB = np.atleast_1d(np.asarray(EbNodB, dtype=float))
+    if EbNodB.ndim > 1:
+        raise TypeError("EbNodB must be a scalar or have 1-dimension")
+    if not 0.0 < confidence < 1.0:
+        raise ValueError("confidence must be on the interval (0, 1)")
+    z = scipy.special.ndtri(0.5 + confidence / 2.0)
+
+    streams = AWGNChannel(seed).spawn(len(EbNodB))
+    ber = np.zeros(len(EbNodB))
+    halfwidth = np.zeros(len(EbNodB))
+
+    for ii in range(len(EbNodB)):
+        t = []
+        count = 0
+        while count < trials:
+            n = min(batch, trials - count)
+            x, y, logw = link.importance(streams[ii], EbNodB[ii], n)
+            errors = np.count_nonzero(x != y, axis=-1)
+            t.append(np.exp(logw) * errors / float(x.shape[-1]))
+            count += n
+
+            est = np.concatenate(t)
+            ber[ii] = np.mean(est)
+            if count > 1:
+                halfwidth[ii] = z * np.std(est, ddof=1) / np.sqrt(count)
+            if rtol is not None and ber[ii] > 0 and \
+                    halfwidth[ii] <= rtol * ber[ii]:
+                break
+
+    return ber, np.maximum(ber - halfwidth, 0.0), ber + halfwidth
+
+def _run_batch(task):
+    # Bit errors and bits of one batch of a link
+    link, channel, EbNodB = task
+    x, y = link(channel, EbNodB)
+    return int(np.sum(biterr(x, y))), np.size(x)
+
+def _stop(errors, bits, min_errors, max_bits, rtol, confidence):
+    # True once a point has enough errors, bits or confidence
+    if errors >= min_errors or bits >= max_bits:
+        return True
+    if rtol is not None and errors > 0:
+        lower, upper = berconfint(errors, bits, confidence)
+        return (upper - lower) / 2.0 <= rtol * errors / float(bits)
+    return False
+
+
+class CPMLink(object):
+    """
+    CPM link over an additive white Gaussian noise channel.
+
+    link = CPMLink(M, T, h, u, fsT) constructs a link for bersim: random
+    bits are mapped to symbols, modulated by CPMMod(M, T, h, u, fsT), passed
+    through an AWGN channel and detected by CPMDemod. link(channel, EbNodB)
+    runs one burst and returns the transmitted and detected bits.
+
+    link = CPMLink(..., num_syms) sends bursts of num_syms symbols.
+
+    link = CPMLink(..., detector) selects the detector, one of
+    {'viterbi', 'soft'}. 'soft' takes hard decisions on the bit
+    log-likelihood ratios of CPMSoftDemod.
+
+    The bits and the noise are both drawn from the channel's generator, so
+    a burst is determined by the channel seed. The signal has unit power,
+    so the SNR per sample is Eb/No + 10 log10(log2(M)) - 10 log10(fsT) dB.
+
+    link.importance(channel, EbNodB, n) runs n importance sampled bursts
+    for isber, see Notes. Short bursts, such as num_syms=16, suit it best.
+
+    Parameters
+    -----------
+    M : int
+        Alphabet size, must be a power of 2
+
+    T : float
+        Symbol rate, in seconds
+
+    h : float
+        Modulation index, must be a rational number k / p
+
+    u : ndarray of floats
+        Frequency pulse shape
+
+    fsT : int
+        Samples per symbol
+
+    num_syms : int
+        Symbols per burst, default is 1000
+
+    detector : string
+        One of {'viterbi', 'soft'}, default is 'viterbi'
+
+    Notes
+    ------
+    Importance sampling targets the bits of the middle symbol m of each
+    burst. The noise is drawn from a mixture whose components are shifted
+    halfway towards the signals of the competing sequences that differ
+    from the transmitted one in symbols m-1 and m, or m and m+1, which
+    include the minimum distance error events of full response CPFSK. A
+    component for a competitor at distance d is picked with a probability
+    proportional to exp(-d**2 / (4 N)), for noise variance N, after a zero
+    mean component that is kept with probability 0.1. The likelihood
+    ratio weights keep the estimate unbiased for any pulse shape; other
+    error events are only sampled less efficiently.
+
+    See Also
+    ---------
+    bersim, isber
+
+    """
+
+    def __init__(self, M, Td, h, u, fsT, num_syms=1000, detector='viterbi'):
+        """
+        Constructor
+        """
+        detector = str.lower(detector)
+        if detector == 'viterbi':
+            self._demod = CPMDemod(M, Td, h, u, fsT)
+        elif detector == 'soft':
+            self._demod = CPMSoftDemod(M, Td, h, u, fsT)
+        else:
+            raise ValueError("detector must be one of {'viterbi', 'soft'}")
+
+        self._Mary = M
+        self._fsT = fsT
+        self._num_syms = num_syms
+        self._detector = detector
+        self._mod = CPMMod(M, Td, h, u, fsT)
+
+    def snr(self, EbNodB):
+        """
+        SNR per sample, in dB, for an Eb/No of EbNodB dB
+        """
+        return EbNodB + 10 * np.log10(np.log2(self._Mary)) - \
+            10 * np.log10(self._fsT)
+
+    def __call__(self, channel, EbNodB):
+        """
+        Run one burst
+
+        x, y = CPMLink(channel, EbNodB) returns the transmitted bits x and
+        the detected bits y of one burst.
+
+        Parameters
+        -----------
+        channel : AWGNChannel
+            Channel, for the bits and the noise
+
+        EbNodB : float
+            Ratio of bit energy to noise power spectral density, in dB
+
+        Returns
+        -------
+        x : ndarray of ints
+            Transmitted bits
+
+        y : ndarray of ints
+            Detected bits
+
+        """
+        k = int(np.log2(self._Mary))
+        x = channel.generator.integers(0, 2, self._num_syms * k)
+
+        self._mod.reset()
+        snr = self.snr(EbNodB)
+        v = channel.awgn(self._mod.mod(bits2syms(x, self._Mary)), snr,
+                         sigpower=0.0)
+
+        return x, self._detect(v, snr).astype(x.dtype)
+
+    def importance(self, channel, EbNodB, n):
+        """
+        Run importance sampled bursts
+
+        x, y, logw = CPMLink.importance(channel, EbNodB, n) runs n bursts
+        with noise drawn by AWGNChannel.isnoise, and returns the
+        transmitted bits x and detected bits y of the middle symbol of each
+        burst, one row per burst, and the log likelihood ratio logw of
+        each burst.
+
+        Parameters
+        -----------
+        channel : AWGNChannel
+            Channel, for the bits and the noise
+
+        EbNodB : float
+            Ratio of bit energy to noise power spectral density, in dB
+
+        n : int
+            Number of bursts
+
+        Returns
+        -------
+        x : ndarray of ints
+            Transmitted bits, shape (n, log2(M))
+
+        y : ndarray of ints
+            Detected bits, shape (n, log2(M))
+
+        logw : ndarray of floats
+            Log likelihood ratio of each burst
+
+        """
+        M = self._Mary
+        N = self._num_syms
+        if N < 3:
+            raise ValueError("importance sampling needs num_syms >= 3")
+        k = int(np.log2(M))
+        m = N // 2
+
+        x = channel.generator.integers(0, 2, (n, N * k))
+        a = bits2syms(x, M)
+
+        # Competing sequences: every other symbol at the first of two
+        # positions and every symbol at the second
+        first = (a[:, [m - 1, m]] + (M - 1)) // 2
+        other = np.mod(first[:, :, np.newaxis] + np.arange(1, M), M)
+        alt = np.repeat(a[:, np.newaxis, np.newaxis, np.newaxis, :], M - 1,
+                        axis=2).repeat(M, axis=3).repeat(2, axis=1)
+        for jj, pos in enumerate([m - 1, m]):
+            alt[:, jj, :, :, pos] = 2 * other[:, jj, :, np.newaxis] - (M - 1)
+            alt[:, jj, :, :, pos + 1] = 2 * np.arange(M) - (M - 1)
+        alt = alt.reshape(n, -1, N)
+        K = alt.shape[1]
+
+        self._mod.reset()
+        s = self._mod.mod(a)
+        self._mod.reset()
+        shifts = (self._mod.mod(alt.reshape(n * K, N)).reshape(n, K, -1) -
+                  s[:, np.newaxis, :]) / 2.0
+
+        # Favor the competitors most likely to be detected
+        snr = self.snr(EbNodB)
+        noise_var = 10**(-snr / 10.0)
+        logp = -np.sum(np.abs(shifts)**2, axis=-1) / noise_var
+        probs = np.exp(logp - np.max(logp, axis=-1, keepdims=True))
+        probs *= 0.9 / np.sum(probs, axis=-1, keepdims=True)
+        probs = np.concatenate((np.repeat(0.1, n)[:, np.newaxis], probs), axis=1)
+        shifts = np.concatenate((np.zeros((n, 1, s.shape[-1])), shifts), axis=1)
+
+        noise, logw = channel.isnoise(s.shape, noise_var, shifts, probs=probs)
+        y = self._detect(s + noise, snr)
+
+        bits = slice(m * k, (m + 1) * k)
+        return x[:, bits], y[:, bits].astype(x.dtype), logw
+
+    def _detect(self, v, snr):
+        # Detected bits of one or more bursts
+        if self._detector == 'viterbi':
+            y = []
+            for burst in np.atleast_2d(v):
+                self._demod.reset()
+                y.append(syms2bits(self._demod.demod(burst), self._Mary))
+            return np.reshape(y, v.shape[0:-1] + (-1,))
+
+        llr = self._demod.demod(v, 10**(-snr / 10.0))
+        return (llr > 0).astype(int)
@@ -9,12 +9,15 @@
 # The full License is in the file LICENSE
 #------------------------------------------------------------------------
 
-__all__ = ['awgn']
+__all__ = ['AWGNChannel', 'FadingChannel', 'MultipathChannel', 'awgn']
 
 import numpy as np
-from .validation import assert_ndarray, assert_one_dimension
+from .validation import assert_ndarray, assert_one_dimension, \
+    assert_max_dimension
+from .utils import _float_result, _real_dtype, _complex_dtype
+from .sigproc import BlockConvolver, _conv_method
 
-def awgn(v, snr, sigpower=None):
+def awgn(v, snr, sigpower=None, common=False):
     """
     Additive white Gaussian noise.
 
@@ -26,21 +29,37 @@ def awgn(v, snr, sigpower=None):
     y = awgn(..., sigpower) uses the value in sigpower as the signal power
     instead of measuring the data. The units of sigpower are dBW.
 
+    If snr is a 1-D array, y is a 2-D array with one row of v plus noise
+    for each SNR. The signal power is measured once and unit-variance
+    noise is drawn in one pass, then scaled for each row. With
+    common=True every row uses the same noise realization, scaled, which
+    reduces the variance of comparisons between SNR points (common random
+    numbers).
+
+    The noise has the precision of v, so a float32 or complex64 signal
+    gives a float32 or complex64 result. Integer signals use the default
+    precision, see set_precision. Single precision noise is drawn directly
+    in single precision, from a generator seeded by numpy.random, so
+    numpy.random.seed still reproduces it.
+
     Parameters
     -----------
     v : ndarray, scalar or complex
         Signal samples
         
-    snr : float
+    snr : float or ndarray of floats
         Signal-to-noise ratio per sample, in dB
 
     sigpower : float
         Signal power, in dBW
 
+    common : boolean
+        Share one noise realization across SNRs, default is False
+
     Returns
     -------
     y : ndarray, scalar or complex
-        Signal plus noise
+        Signal plus noise, one row per SNR if snr is an array
 
     Notes
     ------
@@ -73,18 +92,711 @@ def awgn(v, snr, sigpower=None):
     N = len(v)
     # If the signal power is not specified, we measure it
     if sigpower is None:
-        sigPower = sum(abs(v)**2) / N
+        sigPower = _power(v)
         sigPower = 10.0*np.log10(sigPower)
     else:
         sigPower = sigpower
 
+    # An SNR sweep gives one row per SNR
+    shape = (N,)
+    if np.ndim(snr) > 0:
+        snr = np.asarray(snr, dtype=float)
+        assert_one_dimension(snr)
+
     noisePower = sigPower - snr
     noiseVar = 10**(noisePower/10.0)
+
+    if np.ndim(snr) > 0:
+        noiseVar = np.asarray(noiseVar)[:, np.newaxis]
+        if not common:
+            shape = (len(snr), N)
   
-    if all(np.isreal(v)):
-        noise = np.sqrt(noiseVar)*np.random.randn(N)
+    # Keep the precision of the signal
+    dtype = _float_result((v,))
+
+    if np.finfo(dtype).bits == 32:
+        # numpy.random only draws double precision normal samples
+        ch = AWGNChannel(np.random.randint(0, 2**31 - 1))
+        noise = ch.noise(shape, 1.0, not _isreal(v), 'single')
+        noise = noise * np.sqrt(noiseVar).astype(np.float32)
+    elif _isreal(v):
+        noise = np.sqrt(noiseVar)*np.random.randn(*shape)
     else:
-        noise = np.sqrt(noiseVar/2.0)*np.random.randn(N) + \
-            1j*np.sqrt(noiseVar/2.0)*np.random.randn(N)
+        noise = np.sqrt(noiseVar/2.0)*np.random.randn(*shape) + \
+            1j*np.sqrt(noiseVar/2.0)*np.random.randn(*shape)
+
+    return v.astype(dtype, copy=False) + noise.astype(dtype, copy=False)
+
+class AWGNChannel(object):
+    """
+    Additive white Gaussian noise channel.
+
+    ch = AWGNChannel(seed) constructs an AWGN channel with its own random
+    number generator, a numpy.random.Generator seeded with seed.
+    ch.awgn(v, snr) adds white Gaussian noise to v, as the awgn function
+    does, and the same seed always gives the same noise. Without a seed the
+    generator is seeded from the operating system.
+
+    ch.spawn(n) returns n channels with statistically independent noise
+    streams, derived from this channel's seed, for parallel workers.
+
+    Parameters
+    -----------
+    seed : int, sequence of ints or numpy.random.SeedSequence
+        Seed, default is None
+
+    Notes
+    ------
+    Normal samples come from Generator.standard_normal, which uses the
+    ziggurat method, and are written in place into the output array. For
+    complex signals the real and imaginary parts are drawn as interleaved
+    pairs with one call.
+
+    See Also
+    ---------
+    awgn
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> ch = vt.AWGNChannel(1234)
+    >>> y = ch.awgn(np.ones(1000, dtype=complex), 10.0)
+    >>> workers = ch.spawn(4)
+
+    """
+
+    def __init__(self, seed=None):
+        """
+        Constructor
+        """
+        if isinstance(seed, np.random.SeedSequence):
+            self._seed = seed
+        else:
+            self._seed = np.random.SeedSequence(seed)
+
+        self.reset()
+
+    @property
+    def seed(self):
+        """The numpy.random.SeedSequence of the noise stream"""
+        return self._seed
+
+    @property
+    def generator(self):
+        """The numpy.random.Generator of the noise stream"""
+        return self._rng
+
+    def reset(self):
+        """
+        Restart the noise stream from its seed
+        """
+        self._rng = np.random.Generator(np.random.PCG64(self._seed))
+
+    def spawn(self, n):
+        """
+        Independent channels
+
+        channels = AWGNChannel.spawn(n) returns a list of n channels whose
+        noise streams are independent of each other and of this channel.
+
+        Parameters
+        -----------
+        n : int
+            Number of channels
+
+        Returns
+        -------
+        channels : list of AWGNChannel
+            Channels
+
+        """
+        return [AWGNChannel(s) for s in self._seed.spawn(n)]
+
+    def noise(self, shape, noise_var=1.0, iscomplex=True, precision=None):
+        """
+        White Gaussian noise
+
+        n = AWGNChannel.noise(shape, noise_var) returns complex white
+        Gaussian noise of variance noise_var.
+
+        Parameters
+        -----------
+        shape : int or tuple of ints
+            Output shape
+
+        noise_var : float
+            Noise variance, default is 1.0
+
+        iscomplex : boolean
+            Complex noise if True, the default, else real
+
+        precision : string
+            One of {'single', 'double'}, default is get_precision()
+
+        Returns
+        -------
+        n : ndarray
+            Noise samples
+
+        """
+        real = _real_dtype(precision)
+        if iscomplex:
+            n = np.empty(shape, dtype=_complex_dtype(precision))
+            self._rng.standard_normal(dtype=real, out=n.view(real))
+            n *= np.sqrt(noise_var / 2.0)
+        else:
+            n = np.empty(shape, dtype=real)
+            self._rng.standard_normal(dtype=real, out=n)
+            n *= np.sqrt(noise_var)
+        return n
+
+    def isnoise(self, shape, noise_var=1.0, shifts=None, scale=1.0,
+                probs=None, iscomplex=True):
+        """
+        White Gaussian noise for importance sampling
+
+        n, logw = AWGNChannel.isnoise(shape, noise_var, shifts) draws noise
+        from a mixture of Gaussians whose means are the rows of shifts,
+        instead of from white Gaussian noise of variance noise_var. Each
+        burst, along the last axis of shape, picks one mixture component.
+        logw is the log likelihood ratio log(p(n) / q(n)) of each burst,
+        where p is the density of the white noise and q of the mixture, so
+        the mean of f(n) exp(logw) is an unbiased estimate of the mean of f
+        under white noise, for any f.
+
+        n, logw = AWGNChannel.isnoise(..., scale) scales the standard
+        deviation of every component by scale. With shifts=None the only
+        component is zero mean, for variance scaling alone.
+
+        Parameters
+        -----------
+        shape : tuple of ints
+            Output shape, the last axis holds the samples of one burst
+
+        noise_var : float
+            Noise variance, default is 1.0
+
+        shifts : ndarray
+            Means of the K components, shape (..., K, shape[-1]),
+            broadcast against the bursts, default is None (zero mean)
+
+        scale : float
+            Standard deviation scale factor, default is 1.0
+
+        probs : ndarray of floats
+            Component probabilities, shape (..., K), default is uniform
+
+        iscomplex : boolean
+            Complex noise if True, the default, else real
+
+        Returns
+        -------
+        n : ndarray
+            Noise samples, in double precision
+
+        logw : ndarray of floats
+            Log likelihood ratio of each burst, shape shape[0:-1]
+
+        Examples
+        ---------
+        >>> import numpy as np
+        >>> import velvet as vt
+        >>> ch = vt.AWGNChannel(0)
+        >>> n, logw = ch.isnoise((10000, 1), 1.0, np.array([[3.0]]))
+        >>> p = np.mean((n.real[:, 0] > 3.0) * np.exp(logw))
+
+        """
+        shape = tuple(np.atleast_1d(shape))
+        batch = shape[0:-1]
+        if shifts is None:
+            shifts = np.zeros((1, shape[-1]))
+        shifts = np.asarray(shifts)
+        if shifts.ndim < 2 or shifts.shape[-1] != shape[-1]:
+            raise TypeError("shifts must have shape (..., K, shape[-1])")
+        mu = np.broadcast_to(shifts, batch + shifts.shape[-2:])
+        K = mu.shape[-2]
+
+        if probs is None:
+            probs = np.repeat(1.0 / K, K)
+        probs = np.broadcast_to(np.asarray(probs, dtype=float), batch + (K,))
+        if np.any(probs < 0) or not np.allclose(np.sum(probs, axis=-1), 1.0):
+            raise ValueError("probs must be nonnegative and sum to 1")
+
+        # Pick a component for each burst
+        u = self._rng.random(batch)[..., np.newaxis]
+        comp = np.minimum(np.sum(np.cumsum(probs, axis=-1) < u, axis=-1), K - 1)
+        n = self.noise(shape, noise_var * scale**2, iscomplex, 'double')
+        n += np.take_along_axis(mu, comp[..., np.newaxis, np.newaxis],
+                                axis=-2)[..., 0, :]
+
+        # Log densities of the white noise and of the mixture
+        logp = _loggauss(n, 0.0, noise_var, iscomplex)
+        with np.errstate(divide='ignore'):
+            logq = np.log(probs) + _loggauss(n[..., np.newaxis, :], mu,
+                                             noise_var * scale**2, iscomplex)
+        logw = logp - np.logaddexp.reduce(logq, axis=-1)
+
+        return n, logw
+
+    def awgn(self, v, snr, sigpower=None, common=False):
+        """
+        Additive white Gaussian noise
+
+        y = AWGNChannel.awgn(v, snr) adds white Gaussian noise to v at a
+        signal-to-noise ratio of snr dB per sample. If v is a 2-D array each
+        row is a separate burst, and its power is measured per row.
+
+        y = AWGNChannel.awgn(..., sigpower) uses sigpower, in dBW, as the
+        signal power instead of measuring it.
+
+        snr may be an array, which is broadcast against the rows of v. A
+        1-D v and a 1-D snr give an SNR sweep, one row per SNR, with the
+        signal power measured once and the noise drawn in one pass. With
+        common=True all rows share one noise realization, scaled to each
+        SNR, for common random numbers across SNR points.
+
+        Parameters
+        -----------
+        v : ndarray, scalar or complex
+            Signal samples
+
+        snr : float or ndarray of floats
+            Signal-to-noise ratio per sample, in dB
+
+        sigpower : float
+            Signal power, in dBW
+
+        common : boolean
+            Share one noise realization across rows, default is False
+
+        Returns
+        -------
+        y : ndarray, scalar or complex
+            Signal plus noise, in the precision of v
+
+        """
+        # Input error checking
+        assert_ndarray(v)
+        assert_max_dimension(v, 2)
+
+        snr = np.asarray(snr, dtype=float)
+        if snr.ndim > 1:
+            raise TypeError("snr must be a scalar or have 1-dimension")
+
+        if sigpower is None:
+            sigPower = _power(v)
+        else:
+            sigPower = 10**(sigpower / 10.0)
+        noiseVar = np.asarray(sigPower * 10**(-snr / 10.0))[..., np.newaxis]
+        shape = noiseVar.shape[0:-1] + v.shape[-1:]
+
+        # Keep the precision of the signal
+        dtype = _float_result((v,))
+        precision = 'single' if np.finfo(dtype).bits == 32 else 'double'
+        if common:
+            y = self.noise(v.shape[-1:], 1.0, not _isreal(v), precision)
+            y = y * np.sqrt(noiseVar).astype(y.real.dtype)
+        else:
+            y = self.noise(shape, 1.0, not _isreal(v), precision)
+            y *= np.sqrt(noiseVar)
+
+        if y.dtype == dtype:
+            y += v
+            return y
+        return v.astype(dtype, copy=False) + y
+
+def _loggauss(n, mu, noise_var, iscomplex):
+    # Log density of white Gaussian noise with mean mu, summed over the
+    # last axis
+    N = n.shape[-1]
+    d = np.abs(n - mu)**2
+    if iscomplex:
+        return -N * np.log(np.pi * noise_var) - np.sum(d, axis=-1) / noise_var
+    return -0.5 * N * np.log(2 * np.pi * noise_var) - \
+        np.sum(d, axis=-1) / (2.0 * noise_var)
+
+class FadingChannel(object):
+    """
+    Rayleigh and Rician fading channel.
+
+    ch = FadingChannel(fd, Fs) constructs a flat Rayleigh fading channel
+    with maximum Doppler frequency fd Hz, for signals sampled at Fs Hz.
+    ch.filter(x) multiplies x by the fading gain, and ch.gains(n) returns
+    the next n gains. The fading continues across calls, so a stream can
+    be processed in blocks.
+
+    ch = FadingChannel(..., delays, powers) constructs a frequency
+    selective channel, a tapped delay line with taps delayed by delays
+    samples, each with average power powers, in dB. Each tap fades
+    independently.
+
+    ch = FadingChannel(..., K) makes the taps Rician with K-factor K, the
+    ratio of line-of-sight to scattered power. K may be a scalar or one
+    value per tap, K = 0 gives Rayleigh fading.
+
+    ch = FadingChannel(..., realizations) generates that many independent
+    channels at once. gains then returns one set of taps per realization,
+    and filter applies one realization to each row of its input.
+
+    Parameters
+    -----------
+    fd : float
+        Maximum Doppler frequency, in Hz
+
+    Fs : float
+        Sampling frequency, in Hz
+
+    delays : ndarray of ints
+        Tap delays, in samples, default is [0]
+
+    powers : ndarray of floats
+        Average tap powers, in dB, default is 0 dB for each tap
+
+    K : float or ndarray of floats
+        Rician K-factor, linear, default is 0
+
+    realizations : int
+        Number of independent channels, default is None (one channel)
+
+    sinusoids : int
+        Sinusoids per quadrature component, default is 16
+
+    seed : int, sequence of ints or numpy.random.SeedSequence
+        Seed, default is None
+
+    Notes
+    ------
+    Each tap is generated with the sum-of-sinusoids model of Zheng and
+    Xiao [1]_,
+
+        X_c(t) = sqrt(2/N) sum_n cos(2 pi fd t cos(a_n) + phi_n)
+        X_s(t) = sqrt(2/N) sum_n cos(2 pi fd t sin(a_n) + psi_n)
+
+    with a_n = (2 pi n - pi + theta) / (4N) and random theta, phi_n and
+    psi_n, giving the gain (X_c + j X_s) / sqrt(2). The line-of-sight
+    component of a Rician tap is a tone at fd cos(theta_0).
+
+    Samples are produced in rows of C samples, about the square root of
+    the block length and at most _row_length. Sample m of row q depends on
+    cos(w (qC + m)), which factors into terms in w qC and in w m. The
+    terms in w m are computed once per block, so the rest of the block
+    needs only one cosine and sine per sinusoid and row, and the sum over
+    sinusoids is a matrix product over all taps and realizations. The
+    realizations are processed in groups whose tables have at most
+    _table_size elements, which bounds the memory.
+
+    References
+    -----------
+    .. [1] Zheng, Y. R., Xiao, C., "Simulation Models With Correct
+    Statistical Properties for Rayleigh Fading Channels", IEEE Trans.
+    Commun., 2003.
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> ch = vt.FadingChannel(100.0, 48000.0, [0, 3, 7], [0.0, -3.0, -9.0],
+    ...                       realizations=8, seed=1)
+    >>> y = ch.filter(np.ones((8, 48000), dtype=complex))
+
+    """
+
+    # Samples per row of the two-level factorization
+    _row_length = 256
+
+    # Largest table of cos(w m) and sin(w m) built at once, in elements
+    _table_size = 2**20
+
+    def __init__(self, fd, Fs, delays=None, powers=None, K=0.0,
+                 realizations=None, sinusoids=16, seed=None):
+        """
+        Constructor
+        """
+        if delays is None:
+            delays = [0]
+        delays = np.asarray(delays, dtype=int)
+        if powers is None:
+            powers = np.zeros(len(delays))
+        powers = np.asarray(powers, dtype=float)
+        if delays.ndim != 1 or powers.shape != delays.shape:
+            raise ValueError("delays and powers must be 1-D and of equal length")
+        if np.any(delays < 0):
+            raise ValueError("delays must be non-negative")
+
+        self._fd = fd
+        self._Fs = Fs
+        self._delays = delays
+        self._batch = () if realizations is None else (realizations,)
+
+        P = len(delays)
+        R = 1 if realizations is None else realizations
+        N = sinusoids
+
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        rng = np.random.Generator(np.random.PCG64(seed))
+
+        # Tap amplitudes, scattered and line-of-sight
+        K = np.broadcast_to(np.asarray(K, dtype=float), (P,))
+        amp = np.sqrt(10**(powers / 10.0))
+        self._scatter = amp / np.sqrt(K + 1.0)
+        self._los = amp * np.sqrt(K / (K + 1.0))
+
+        # Doppler frequencies in radians per sample, and initial phases, of
+        # the cosine and sine components, shape (R, P, 2N)
+        theta = rng.uniform(-np.pi, np.pi, (R, P, 1))
+        alpha = (2.0 * np.pi * np.arange(1, N + 1) - np.pi + theta) / (4.0 * N)
+        w = 2.0 * np.pi * fd / Fs
+        self._omega = w * np.concatenate((np.cos(alpha), np.sin(alpha)), axis=-1)
+        self._phase0 = rng.uniform(-np.pi, np.pi, (R, P, 2 * N))
+
+        # Line-of-sight tone, shape (R, P)
+        self._los_omega = w * np.cos(rng.uniform(-np.pi, np.pi, (R, P)))
+        self._los_phase0 = rng.uniform(-np.pi, np.pi, (R, P))
+
+        self.reset()
+
+    @property
+    def delays(self):
+        """Tap delays, in samples"""
+        return self._delays
+
+    def reset(self):
+        """
+        Restart the fading from time zero and clear the filter state
+        """
+        self._phase = self._phase0.copy()
+        self._los_phase = self._los_phase0.copy()
+        self._zinit = None
+
+    def gains(self, n):
+        """
+        Fading gains
+
+        g = FadingChannel.gains(n) returns the complex gains of the next n
+        samples, with shape (taps, n), or (realizations, taps, n).
+
+        Parameters
+        -----------
+        n : int
+            Number of samples
+
+        Returns
+        -------
+        g : ndarray of complex
+            Tap gains
+
+        """
+        R, P, N = self._omega.shape[0:2] + (self._omega.shape[-1] // 2,)
+        # Rows of about sqrt(n) samples balance the table against the
+        # per-row terms
+        C = max(min(self._row_length, int(np.ceil(np.sqrt(n)))), 1)
+        Q = -(-n // C)
+        scale = (self._scatter / np.sqrt(N))[:, np.newaxis, np.newaxis]
+
+        g = np.empty((R, P, Q * C), dtype=complex)
+        group = max(self._table_size // (P * 4 * N * C), 1)
+        for r in range(0, R, group):
+            omega = self._omega[r:r + group]
+
+            # cos(w m) and sin(w m) within a row, stacked along the
+            # sinusoid axis, (G, P, 4N, C)
+            wm = omega[..., np.newaxis] * np.arange(C)
+            row = np.concatenate((np.cos(wm[..., 0:N, :]), np.sin(wm[..., 0:N, :]),
+                                  np.cos(wm[..., N:, :]), np.sin(wm[..., N:, :])),
+                                 axis=-2)
+
+            # Phase at the start of each row, (G, P, Q, 2N)
+            start = self._phase[r:r + group, :, np.newaxis, :] + \
+                C * np.arange(Q)[:, np.newaxis] * omega[..., np.newaxis, :]
+            cos = np.cos(start)
+            sin = np.sin(start)
+
+            # Sum of sinusoids as matrix products, using
+            # cos(a + b) = cos(a) cos(b) - sin(a) sin(b), (G, P, Q, C)
+            gr = g[r:r + group].reshape(-1, P, Q, C)
+            a = np.concatenate((cos[..., 0:N], -sin[..., 0:N]), axis=-1)
+            gr.real = np.matmul(a, row[..., 0:2 * N, :]) * scale
+            a = np.concatenate((cos[..., N:], -sin[..., N:]), axis=-1)
+            gr.imag = np.matmul(a, row[..., 2 * N:, :]) * scale
+        g = g[..., 0:n]
+
+        if np.any(self._los):
+            k = np.arange(n)
+            los = np.exp(1j * (self._los_phase[..., np.newaxis] +
+                               self._los_omega[..., np.newaxis] * k))
+            g += self._los[:, np.newaxis] * los
+
+        # Advance the phases
+        self._phase = np.mod(self._phase + n * self._omega, 2.0 * np.pi)
+        self._los_phase = np.mod(self._los_phase + n * self._los_omega, 2.0 * np.pi)
+
+        return g.reshape(self._batch + g.shape[1:])
+
+    def filter(self, x):
+        """
+        Fading channel
+
+        y = FadingChannel.filter(x) passes x through the channel. With
+        several realizations x is 2-D with one row per realization, or 1-D
+        and sent through every realization.
+
+        Parameters
+        -----------
+        x : ndarray
+            Input signal
+
+        Returns
+        -------
+        y : ndarray of complex
+            Channel output, the same length as x
+
+        """
+
+        # Input error checking
+        assert_ndarray(x)
+        assert_max_dimension(x, 2)
+
+        N = x.shape[-1]
+        shape = self._batch + (N,)
+        x = np.broadcast_to(x, shape)
+
+        # Input history for the delayed taps
+        D = np.max(self._delays)
+        if self._zinit is None:
+            self._zinit = np.zeros(self._batch + (D,), dtype=x.dtype)
+        full = np.concatenate((self._zinit, x), axis=-1)
+        self._zinit = full[..., full.shape[-1] - D:]
+
+        g = self.gains(N)
+        dtype = np.result_type(_float_result((x,)), np.complex64)
+        y = np.zeros(shape, dtype=np.result_type(dtype, g.dtype))
+        for p, d in enumerate(self._delays):
+            y += g[..., p, :] * full[..., D - d:D - d + N]
+
+        return y.astype(dtype, copy=False)
+
+class MultipathChannel(object):
+    """
+    Multipath channel.
+
+    ch = MultipathChannel(h) constructs a tapped delay line channel with
+    impulse response h. ch.filter(x) returns one output sample per input
+    sample. The channel memory is carried between calls, so successive
+    blocks give the same result as one long block.
+
+    If h is a 2-D array, each row is the impulse response of a separate
+    channel. filter then takes a 2-D array with one burst per row, or a
+    1-D array sent through every channel.
+
+    ch = MultipathChannel(..., method) selects the filter implementation,
+    one of {'auto', 'direct', 'fft'}. 'direct' is a direct form FIR filter
+    and 'fft' is overlap-save block convolution, see BlockConvolver.
+    'auto', the default, picks the faster of the two for each block from
+    the conv cost model, so long impulse responses use the FFT.
+
+    Parameters
+    -----------
+    h : ndarray
+        Channel impulse response, or 2-D array of impulse responses
+
+    method : string
+        One of {'auto', 'direct', 'fft'}, default is 'auto'
+
+    nfft : int
+        FFT size of the block convolution, default is chosen from len(h)
+
+    See Also
+    ---------
+    BlockConvolver, calibrate_conv
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> h = np.array([1.0, 0.0, 0.5j, 0.0, 0.0, 0.2])
+    >>> ch = vt.MultipathChannel(h)
+    >>> y1 = ch.filter(np.ones(100, dtype=complex))
+    >>> y2 = ch.filter(np.ones(100, dtype=complex))
+
+    """
+
+    def __init__(self, h, method='auto', nfft=None):
+        """
+        Constructor
+        """
+        # Input error checking
+        assert_ndarray(h)
+        assert_max_dimension(h, 2)
+
+        method = str.lower(method)
+        if method not in ('auto', 'direct', 'fft'):
+            raise ValueError("method must be one of {'auto', 'direct', 'fft'}")
+
+        self._h = h
+        self._method = method
+
+        # One block convolver serves both paths, BlockConvolver.filter and
+        # BlockConvolver.direct share its state, so the two can be mixed
+        # from one block to the next
+        self._bc = BlockConvolver(h, nfft, 'ols')
+
+    @property
+    def impulse_response(self):
+        """Channel impulse response"""
+        return self._h
+
+    def reset(self):
+        """
+        Reset internal state variables
+        """
+        self._bc.reset()
+
+    def filter(self, x):
+        """
+        Multipath channel
+
+        y = MultipathChannel.filter(x) passes the block x through the
+        channel.
+
+        Parameters
+        -----------
+        x : ndarray
+            Input block, one burst per row for a 2-D array
+
+        Returns
+        -------
+        y : ndarray
+            Output block, the same length as x
+
+        """
+
+        # Input error checking
+        assert_ndarray(x)
+        assert_max_dimension(x, 2)
+
+        bc = self._bc
+        N = x.shape[-1]
+        M = self._h.shape[-1]
+
+        method = self._method
+        if method == 'auto':
+            is_real = not (np.iscomplexobj(x) or np.iscomplexobj(self._h))
+            step = bc.nfft - M + 1
+            method = _conv_method(min(N, step), M, True, is_real)
+
+        if method == 'fft':
+            return bc.filter(x)
+        else:
+            return bc.direct(x)
+
+def _power(v):
+    # Mean power along the last axis
+    if np.iscomplexobj(v):
+        return np.mean(v.real**2 + v.imag**2, axis=-1)
+    return np.mean(np.square(v, dtype=float), axis=-1)
 
-    return v + noise
+def _isreal(v):
+    # True for real data, or complex data with no imaginary part
+    return not np.iscomplexobj(v) or not np.any(v.imag)
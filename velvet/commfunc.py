@@ -11,14 +11,20 @@
 
 import numpy as np
 import scipy.special
-from .validation import assert_ndarray, assert_one_dimension
+from .cpmdist import cpmdmin
+from .validation import assert_ndarray, assert_one_dimension, \
+    assert_max_dimension
 
 erfc = scipy.special.erfc
 
+# Number of set bits in each byte, for numpy versions without
+# np.bitwise_count
+_popcount_table = np.array([bin(n).count('1') for n in range(256)], dtype=np.uint8)
+
 # Public API
-__all__ = ['berawgn', 'biterr', 'qfunc'] 
+__all__ = ['berawgn', 'berawgninv', 'berconfint', 'biterr', 'bits2syms', 'ErrorCounter', 'qfunc', 'syms2bits'] 
 
-def berawgn(EbNodB, mod_type, M, mod_index=None, Kmin=None):
+def berawgn(EbNodB, mod_type, M, mod_index=None, Kmin=None, u=None, fsT=None):
     """
     Bit error rate (BER) for additive white Gaussian noise channels
 
@@ -34,15 +40,36 @@ def berawgn(EbNodB, mod_type, M, mod_index=None, Kmin=None):
     of paths having the minimum distance, respectively. If the number
     of minimum distance paths is unknown, then a value of Kmin = 1
     is appropriate.
+
+    ber = berawgn(EbNodB, 'cpm', M, mod_index, Kmin, u, fsT) returns the
+    same bound for the Continuous Phase Modulation (CPM) generated by
+    CPMMod(M, T, mod_index, u, fsT), with any frequency pulse u. The
+    squared minimum distance, and Kmin when it is None, are found by
+    cpmdmin. For catastrophic configurations, whose minimum distance
+    events never end, cpmdmin returns Kmin = 1.
+
+    EbNodB, M, mod_index and Kmin may be arrays, which are broadcast
+    against each other, so a whole table of configurations is evaluated
+    in one call.
     
     The supported modulations are listed in the following table.
 
     =====================  ==========   ============    ==========
     Modulation Scheme      mod_type     Range of M      Encoding
     =====================  ==========   ============    ==========
+    BPSK                   'bpsk'       2               N/A
+    QPSK                   'qpsk'       4               Gray
+    M-PSK                  'psk'        Power of 2      Gray
+    Square M-QAM           'qam'        Power of 4      Gray
+    Noncoherent FSK        'fsk'        2 to 32         N/A
     CPFSK                  'cpfsk'      Power of 2      N/A
+    CPM                    'cpm'        Power of 2      N/A
     =====================  ==========   ============    ==========
 
+    The BPSK, QPSK and FSK curves, and 4-QAM, are exact. The M-PSK and
+    M-QAM curves for larger M are the nearest neighbor approximations
+    for Gray encoding, which are tight at low BER. FSK is orthogonal
+    M-ary FSK with noncoherent detection.
 
     Parameters
     -----------
@@ -52,15 +79,21 @@ def berawgn(EbNodB, mod_type, M, mod_index=None, Kmin=None):
     mod_type : string
               Modulation type. Refer to table for accepted values
 
-    M : int
+    M : {int, ndarray of ints}
         Modulation alphabet size
 
-    mod_index : float
-        Modulation index for CPFSK
+    mod_index : {float, ndarray of floats}
+        Modulation index for CPFSK and CPM
 
-    Kmin : int
+    Kmin : {int, ndarray of ints}
         Number of paths having the minimum distance
 
+    u : ndarray of floats
+        Frequency pulse shape for CPM
+
+    fsT : int
+        Samples per symbol of u
+
 
     Returns
     -------
@@ -71,6 +104,10 @@ def berawgn(EbNodB, mod_type, M, mod_index=None, Kmin=None):
     -----------
     .. [1] Proakis, J.G., Digital Communications, 4th ed., McGraw-Hill, 2001.
 
+    See Also
+    ---------
+    berawgninv, cpmdmin
+
     Examples
     ---------
     >>> import velvet as vt
@@ -86,45 +123,254 @@ def berawgn(EbNodB, mod_type, M, mod_index=None, Kmin=None):
     >>> plt.legend(('4-CPFSK'))
     >>> plt.show()
 
-    """
+    A table of 16-, 64- and 256-QAM against Eb/No
 
-    # Convert from dB to linear scale
-    EbNoLin = 10**(EbNodB/10.0)
+    >>> ber = vt.berawgn(EbNodB[:, np.newaxis], 'qam', [16, 64, 256])
+
+    """
 
     mod_type = str.lower(mod_type)
+    modulations = ('bpsk', 'qpsk', 'psk', 'qam', 'fsk', 'cpfsk', 'cpm')
+    if mod_type not in modulations:
+        raise ValueError("Modulation type must bet one of {'bpsk', 'qpsk', "
+                         "'psk', 'qam', 'fsk', 'cpfsk', 'cpm'}")
 
-    if mod_type == 'cpfsk':
+    # Convert from dB to linear scale
+    EbNoLin = 10**(np.asarray(EbNodB, dtype=float) / 10.0)
+
+    M = np.asarray(M)
+    k = np.log2(M)
+    if np.any(M < 2) or np.any(k != np.round(k)):
+        raise ValueError("M must be a power of 2")
+
+    if mod_type == 'bpsk':
+        if np.any(M != 2):
+            raise ValueError("M must be 2 for BPSK")
+        ber = qfunc(np.sqrt(2.0 * EbNoLin)) + 0.0 * M
+    elif mod_type == 'qpsk':
+        if np.any(M != 4):
+            raise ValueError("M must be 4 for QPSK")
+        ber = qfunc(np.sqrt(2.0 * EbNoLin)) + 0.0 * M
+    elif mod_type == 'psk':
+        # Nearest neighbor approximation, exact for M = 2 and 4
+        ber = 2.0 / k * qfunc(np.sqrt(2.0 * k * EbNoLin) * np.sin(np.pi / M))
+        ber = np.where(M == 2, ber / 2, ber)
+    elif mod_type == 'qam':
+        if np.any(k % 2 != 0):
+            raise ValueError("M must be a power of 4 for square QAM")
+        ber = 4.0 / k * (1 - 1 / np.sqrt(M)) * \
+            qfunc(np.sqrt(3.0 * k * EbNoLin / (M - 1)))
+    elif mod_type == 'fsk':
+        if np.any(M > 32):
+            raise ValueError("M must be at most 32 for FSK")
+        ber = _berfsk(EbNoLin, M, k)
+    elif mod_type == 'cpfsk':
         if mod_index is None or Kmin is None:
             raise ValueError("Values for mod_index and Kmin are required")
-        k = np.arange(1, M)
-        db2 = min((2.0 * np.log2(M)) * (1 - np.sinc(2*k*mod_index)))
+        h = np.asarray(mod_index, dtype=float)[..., np.newaxis]
+        n = np.arange(1, np.max(M))
+        db2 = np.where(n < M[..., np.newaxis],
+                       2.0 * k[..., np.newaxis] * (1 - np.sinc(2*n*h)), np.inf)
+        db2 = np.min(db2, axis=-1)
         Pm = Kmin * qfunc(np.sqrt(EbNoLin * db2))
-        ber = Pm / np.log2(M)
+        ber = Pm / k
     else:
-        raise ValueError("Modulation type must bet one of {'cpfsk'}")
+        if mod_index is None or u is None or fsT is None:
+            raise ValueError("Values for mod_index, u and fsT are required")
+
+        # Search each distinct configuration once
+        M, h = np.broadcast_arrays(M, np.asarray(mod_index, dtype=float))
+        configs, inv = np.unique(np.column_stack((M.ravel(), h.ravel())),
+                                 axis=0, return_inverse=True)
+        dist = np.array([cpmdmin(int(m), hh, u, fsT) for m, hh in configs])
+        d2 = dist[inv.ravel(), 0].reshape(M.shape)
+        if Kmin is None:
+            Kmin = dist[inv.ravel(), 1].reshape(M.shape)
+        ber = Kmin * qfunc(np.sqrt(EbNoLin * d2)) / np.log2(M)
       
-    return ber
+    return ber[()]
+
+
+def berawgninv(ber, mod_type, M, mod_index=None, Kmin=None, u=None,
+               fsT=None):
+    """
+    Eb/No for a bit error rate over additive white Gaussian noise channels
+
+    EbNodB = berawgninv(ber, mod_type, M) returns the ratio of bit energy
+    to noise power spectral density, in dB, at which berawgn(EbNodB,
+    mod_type, M) equals ber. The remaining arguments are passed on to
+    berawgn. All numeric arguments are broadcast against each other, and
+    all targets are solved together by bisection, each step one
+    vectorized call to berawgn. Targets outside the range of the curve,
+    over -50 to 100 dB, return nan.
+
+    Parameters
+    -----------
+    ber : {scalar, ndarray}
+        Target bit error rate
+
+    mod_type : string
+        Modulation type, see berawgn
+
+    M : {int, ndarray of ints}
+        Modulation alphabet size
+
+    mod_index : {float, ndarray of floats}
+        Modulation index for CPFSK and CPM
+
+    Kmin : {int, ndarray of ints}
+        Number of paths having the minimum distance
+
+    u : ndarray of floats
+        Frequency pulse shape for CPM
+
+    fsT : int
+        Samples per symbol of u
+
+    Returns
+    -------
+    EbNodB : {scalar, ndarray}
+        Ratio of bit energy to noise power spectral density, in dB
 
+    See Also
+    ---------
+    berawgn
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> vt.berawgninv(1e-6, 'qam', [4, 16, 64])
+    array([ 10.5298317 ,  14.40172704,  18.77724998])
+
+    """
+    ber = np.asarray(ber, dtype=float)
+    shape = np.broadcast(ber, np.asarray(M), np.asarray(mod_index, dtype=float),
+                         np.asarray(Kmin, dtype=float)).shape
+    target = np.log(np.broadcast_to(ber, shape))
+
+    def logber(EbNodB):
+        with np.errstate(divide='ignore'):
+            return np.log(berawgn(EbNodB, mod_type, M, mod_index, Kmin, u, fsT))
+
+    # The BER falls with Eb/No, bisect in dB on the log of the BER
+    lo = np.full(shape, -50.0)
+    hi = np.full(shape, 100.0)
+    valid = (logber(lo) >= target) & (logber(hi) <= target)
+    for ii in range(60):
+        mid = (lo + hi) / 2
+        above = logber(mid) > target
+        lo = np.where(above, mid, lo)
+        hi = np.where(above, hi, mid)
+
+    return np.where(valid, (lo + hi) / 2, np.nan)[()]
+
+def _berfsk(EbNoLin, M, k):
+    # Noncoherent orthogonal M-FSK, Proakis (4.5-44), vectorized over M
+    # by summing to the largest M with the extra terms masked
+    EbNoLin, M, k = np.broadcast_arrays(EbNoLin, M, k)
+    n = np.arange(1, np.max(M))
+    Mn = M[..., np.newaxis]
+    binom = np.exp(scipy.special.gammaln(Mn) - scipy.special.gammaln(n + 1) -
+                   scipy.special.gammaln(np.maximum(Mn - n, 1)))
+    g = (k * EbNoLin)[..., np.newaxis]
+    terms = np.where(n < Mn, (-1.0)**(n + 1) * binom / (n + 1) *
+                     np.exp(-n * g / (n + 1)), 0.0)
+    Ps = np.sum(terms, axis=-1)
+    return M / 2.0 / (M - 1) * Ps
+
+
+def berconfint(errors, bits, confidence=0.95):
+    """
+    Confidence interval of a measured bit error rate.
+
+    lower, upper = berconfint(errors, bits) returns the 95% confidence
+    interval of the BER estimated from errors bit errors in bits bits. The
+    interval is the exact (Clopper-Pearson) binomial interval, so it is
+    valid for small error counts and for no errors at all. The inputs
+    broadcast against each other.
+
+    Parameters
+    -----------
+    errors : {int, ndarray of ints}
+        Number of bit errors
+
+    bits : {int, ndarray of ints}
+        Number of bits
+
+    confidence : float
+        Confidence level, on the interval (0, 1), default is 0.95
+
+    Returns
+    -------
+    lower : {float, ndarray of floats}
+        Lower limit of the interval
+
+    upper : {float, ndarray of floats}
+        Upper limit of the interval
+
+    References
+    -----------
+    .. [1] Clopper, C.J. and Pearson, E.S., "The use of confidence or
+           fiducial limits illustrated in the case of the binomial,"
+           Biometrika, vol. 26, no. 4, pp. 404-413, 1934.
+
+    Examples
+    ---------
+    >>> import velvet as vt
+    >>> lower, upper = vt.berconfint(10, 1000)
 
-def biterr(x, y):
+    """
+    if not 0.0 < confidence < 1.0:
+        raise ValueError("confidence must be on the interval (0, 1)")
+
+    k, n = np.broadcast_arrays(np.asarray(errors, dtype=float),
+                               np.asarray(bits, dtype=float))
+    if np.any(k < 0) or np.any(k > n):
+        raise ValueError("errors must be between 0 and bits")
+
+    alpha = 1.0 - confidence
+    with np.errstate(invalid='ignore', divide='ignore'):
+        lower = scipy.special.betaincinv(k, n - k + 1, alpha / 2)
+        upper = scipy.special.betaincinv(k + 1, n - k, 1 - alpha / 2)
+    lower = np.where(k == 0, 0.0, lower)
+    upper = np.where(k == n, 1.0, upper)
+
+    return lower[()], upper[()]
+
+
+def biterr(x, y, packed=False):
     """
     Compute number of bit errors.
 
     n = biterr(x, y) returns the number of differences between the two arrays
-    x and y, where each contains binary data. 
+    x and y, where each contains binary data. If x and y are 2-D arrays, n
+    holds the number of errors in each row.
+
+    n = biterr(x, y, True) compares packed bits, unsigned integer words
+    such as the uint8 output of np.packbits or a uint64 view of it. The
+    errors are counted with XOR and a population count, 8 to 64 bits at a
+    time. Padding bits must be equal in x and y.
 
     Parameters
     -----------
     x : ndarray of ints
-        Input array of binary data, {0, 1}
+        Input array of binary data, {0, 1}, or of packed words
 
     y : ndarray of ints
-        Input array of binary data, {0, 1}
+        Input array of binary data, {0, 1}, or of packed words
+
+    packed : boolean
+        True for packed words, default is False
         
     Returns
     -------
-    n : int
-        Number of errors
+    n : int or ndarray of ints
+        Number of errors, per row for 2-D inputs
+
+    See Also
+    ---------
+    ErrorCounter
 
     Examples
     ---------
@@ -134,23 +380,233 @@ def biterr(x, y):
     >>> y = np.array([1, 1, 0, 0])
     >>> vt.biterr(x, y)
     2
+    >>> vt.biterr(np.packbits(x), np.packbits(y), True)
+    2
   
   """
     # Error checking
     assert_ndarray(x)
     assert_ndarray(y)
-    assert_one_dimension(x)
-    assert_one_dimension(y)
-    if len(x) != len(y):
+    assert_max_dimension(x, 2)
+    assert_max_dimension(y, 2)
+    if x.shape != y.shape:
         raise ValueError("x and y must have same length")
 
-    num_errors = 0
-    for ii in np.arange(len(x)):
-        if x[ii] != y[ii]:
-            num_errors += 1
+    if packed:
+        if x.dtype.kind != 'u' or y.dtype != x.dtype:
+            raise TypeError("packed bits must be unsigned integers of one type")
+        num_errors = np.sum(_popcount(x ^ y), axis=-1, dtype=np.int64)
+    else:
+        num_errors = np.count_nonzero(x != y, axis=-1)
 
+    if x.ndim == 1:
+        return int(num_errors)
     return num_errors
 
+def _popcount(w):
+    # Number of set bits in each unsigned integer word
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(w)
+    b = _popcount_table[w.view(np.uint8)]
+    return b.reshape(w.shape + (w.itemsize,)).sum(axis=-1, dtype=np.int64)
+
+
+class ErrorCounter(object):
+    """
+    Running bit error counter.
+
+    ec = ErrorCounter() constructs a bit error counter. ec.update(x, y)
+    counts the errors between the blocks x and y, as biterr does, and adds
+    them to the running totals, so a stream can be compared block by block.
+    For 2-D blocks the totals are kept per row.
+
+    ec = ErrorCounter(packed) compares packed words, see biterr.
+    ec.update(x, y, nbits) then counts nbits bits per row, for blocks whose
+    last word is padded, as np.packbits pads blocks that are not a multiple
+    of 8 bits long.
+
+    Parameters
+    -----------
+    packed : boolean
+        True for packed words, default is False
+
+    See Also
+    ---------
+    biterr
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> ec = vt.ErrorCounter()
+    >>> n = ec.update(np.array([0, 1, 1, 0]), np.array([1, 1, 0, 0]))
+    >>> n = ec.update(np.array([1, 1]), np.array([1, 0]))
+    >>> ec.errors, ec.bits, ec.ber
+    (3, 6, 0.5)
+
+    """
+
+    def __init__(self, packed=False):
+        """
+        Constructor
+        """
+        self._packed = packed
+        self.reset()
+
+    @property
+    def errors(self):
+        """Number of bit errors"""
+        return self._errors
+
+    @property
+    def bits(self):
+        """Number of bits compared"""
+        return self._bits
+
+    @property
+    def ber(self):
+        """Bit error rate"""
+        return np.true_divide(self._errors, np.maximum(self._bits, 1))
+
+    def reset(self):
+        """
+        Reset the counts
+        """
+        self._errors = 0
+        self._bits = 0
+
+    def update(self, x, y, nbits=None):
+        """
+        Count bit errors
+
+        n = ErrorCounter.update(x, y) counts the bit errors between x and y,
+        adds them to the totals and returns them.
+
+        n = ErrorCounter.update(x, y, nbits) counts nbits bits per row of
+        packed words. The padding bits past nbits must be equal in x and y.
+
+        Parameters
+        -----------
+        x : ndarray of ints
+            Input array of binary data, or of packed words
+
+        y : ndarray of ints
+            Input array of binary data, or of packed words
+
+        nbits : int
+            Number of bits per row of packed words, default is all the bits
+            of the words
+
+        Returns
+        -------
+        n : int or ndarray of ints
+            Number of errors in this block
+
+        """
+        n = biterr(x, y, self._packed)
+        bits = x.shape[-1]
+        if self._packed:
+            bits *= 8 * x.itemsize
+            if nbits is not None:
+                if nbits < 0 or nbits > bits:
+                    raise ValueError("nbits must be at most the number of "
+                                     "bits in the words")
+                bits = nbits
+        elif nbits is not None:
+            raise ValueError("nbits applies to packed words only")
+
+        self._errors = self._errors + n
+        self._bits = self._bits + bits
+        return n
+
+
+def bits2syms(b, M):
+    """
+    Map bits to symbols.
+
+    x = bits2syms(b, M) maps the binary data in b to symbols in the range
+    [+/-1, +/-3, ..., +/-(M-1)], the alphabet accepted by CPMMod.mod. Each
+    group of log2(M) bits, most significant bit first, is read as a natural
+    binary number d, which maps to the symbol 2 d - (M-1).
+
+    Parameters
+    -----------
+    b : ndarray of ints
+        Binary data, {0, 1}. The length of the last axis must be a multiple
+        of log2(M).
+
+    M : int
+        Alphabet size, must be a power of 2
+
+    Returns
+    -------
+    x : ndarray of ints
+        Symbols
+
+    See Also
+    ---------
+    syms2bits
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> vt.bits2syms(np.array([0, 0, 0, 1, 1, 0, 1, 1]), 4)
+    array([-3, -1,  1,  3])
+
+    """
+    # Error checking
+    assert_ndarray(b)
+    assert_max_dimension(b, 2)
+    k = int(np.log2(M))
+    if b.shape[-1] % k != 0:
+        raise ValueError("number of bits must be a multiple of log2(M)")
+
+    groups = b.reshape(b.shape[0:-1] + (-1, k)).astype(int)
+    d = np.dot(groups, 2**np.arange(k - 1, -1, -1))
+    return 2 * d - (M - 1)
+
+def syms2bits(x, M):
+    """
+    Map symbols to bits.
+
+    b = syms2bits(x, M) is the inverse of bits2syms. Each symbol in the
+    range [+/-1, +/-3, ..., +/-(M-1)] gives log2(M) bits, most significant
+    bit first.
+
+    Parameters
+    -----------
+    x : ndarray of ints
+        Symbols
+
+    M : int
+        Alphabet size, must be a power of 2
+
+    Returns
+    -------
+    b : ndarray of ints
+        Binary data, {0, 1}
+
+    See Also
+    ---------
+    bits2syms
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> vt.syms2bits(np.array([-3, -1, 1, 3]), 4)
+    array([0, 0, 0, 1, 1, 0, 1, 1])
+
+    """
+    # Error checking
+    assert_ndarray(x)
+    assert_max_dimension(x, 2)
+
+    k = int(np.log2(M))
+    d = (x.astype(int) + (M - 1)) // 2
+    b = (d[..., np.newaxis] >> np.arange(k - 1, -1, -1)) & 1
+    return b.reshape(x.shape[0:-1] + (-1,))
 
 def qfunc(x):
     """Compute the Q-function.
@@ -0,0 +1,784 @@
+""" CPM demodulation Classes
+"""
+
+#------------------------------------------------------------------------
+# Copyright (c) 2015 SGW
+#
+# Distributed under the terms of the New BSD License.
+#
+# The full License is in the file LICENSE
+#------------------------------------------------------------------------
+
+from fractions import Fraction
+import numpy as np
+from .cpmmod import _phase_response
+from .sigproc import FMDetector
+from .validation import assert_ndarray, assert_one_dimension, \
+    assert_max_dimension
+
+# Public API
+__all__ = ['CPMDemod', 'CPMSoftDemod', 'DiscriminatorDemod', 'MFSKDemod']
+
+
+class _CPMTrellis(object):
+    """
+    Phase trellis of a CPM signal.
+
+    A state holds the accumulated phase theta_n = pi s / p, for a
+    modulation index h = k / p, and the last L-1 symbols. State index is
+    s * M**(L-1) + sum_{j=1}^{L-1} d_{n-j} M**(j-1), where symbol
+    a = 2 d - (M-1). A branch is a state and a new symbol digit d, and
+    its pattern index d + M * (history index) selects the phase
+    trajectory over one symbol interval, as in the CPMMod phase table.
+    """
+
+    # Largest modulation index denominator
+    _max_denominator = 1000
+
+    def __init__(self, M, h, pulse, fsT):
+        frac = Fraction(h).limit_denominator(self._max_denominator)
+        if abs(float(frac) - h) > 1e-9:
+            raise ValueError("h must be a rational number")
+
+        self.M = M
+        self.fsT = fsT
+        L = -(-len(pulse) // fsT)
+        self.L = L
+
+        # Phase states, theta = pi s / p
+        k = frac.numerator
+        p = frac.denominator
+        P = 2 * p
+        H = M**(L - 1)
+        S = P * H
+        self.num_states = S
+
+        state = np.arange(S)[:, np.newaxis]
+        digit = np.arange(M)[np.newaxis, :]
+        s = state // H
+        hist = state % H
+
+        # Branch pattern, and symbol leaving the L symbol window
+        self.pattern = digit + M * hist
+        leaving = 2 * (self.pattern // H) - (M - 1)
+        next_hist = self.pattern % H
+
+        self.next_state = (s + k * leaving) % P * H + next_hist
+        self.rotation = np.exp(-1j * np.pi * np.arange(P) / p)[s[:, 0]]
+
+        # During the first L-1 symbols after reset the leaving symbol is
+        # one of the zeros the modulator starts with, and the phase does
+        # not change
+        self.warm_next_state = s * H + next_hist
+
+        self.prev = self._predecessors(self.next_state)
+        self.warm_prev = self._predecessors(self.warm_next_state)
+
+        # Phase trajectories, exp(j phase), for all M**L patterns. Entry n
+        # of warm_table holds the trajectories with symbols older than
+        # a_0 set to zero, for the n-th symbol after reset.
+        q = _phase_response(pulse, fsT, L).reshape(L, fsT)
+        index = np.arange(M**L)
+        traj = np.zeros((L, M**L, fsT))
+        for j in range(L):
+            a = 2 * (index // M**j % M) - (M - 1)
+            traj[j:] += np.outer(a, q[j])
+        traj *= 2.0 * np.pi * h
+        self.table = np.exp(1j * traj[L - 1])
+        self.warm_table = np.exp(1j * traj[0:L - 1])
+
+    def _predecessors(self, next_state):
+        # Flat branch indices (state * M + digit) into each state, one row
+        # per state. Every state has exactly M incoming branches.
+        order = np.argsort(next_state.ravel(), kind='mergesort')
+        return order.reshape(self.num_states, self.M)
+
+    def correlate(self, r, warm=0):
+        # Matched filter outputs for all patterns, one row per symbol, along
+        # the last axis of r. The first warm rows use the trajectories for
+        # the symbols after reset.
+        R = r.reshape(r.shape[0:-1] + (-1, self.fsT))
+        z = np.dot(R, self.table.conj().T)
+        start = self.L - 1 - warm
+        for n in range(min(warm, z.shape[-2])):
+            z[..., n, :] = np.dot(R[..., n, :], self.warm_table[start + n].conj().T)
+        return z
+
+    def branch_metrics(self, z):
+        # Correlation of each branch with the received symbol interval,
+        # shape (..., S, M)
+        return np.real(np.take(z, self.pattern, axis=-1) *
+                       self.rotation[:, np.newaxis])
+
+    def transitions(self, n):
+        # Next states and predecessors for the n-th symbol after reset
+        if n < self.L - 1:
+            return self.warm_next_state, self.warm_prev
+        else:
+            return self.next_state, self.prev
+
+
+class CPMDemod(object):
+    """
+    Continuous Phase Modulation maximum-likelihood sequence detector.
+
+    mydemod = CPMDemod(M, T, h, u, fsT) constructs a Viterbi detector for
+    the CPM signal generated by CPMMod(M, T, h, u, fsT). mydemod.demod(v)
+    returns the most likely transmitted symbols, in the range
+    [+/-1, +/-3, ..., +/-(M-1)], for the received complex envelope v.
+
+    mydemod = CPMDemod(..., tblen) uses a traceback depth of tblen symbols.
+    Decisions are released once they are at least tblen symbols old, so
+    latency and memory stay fixed on long streams. Without tblen each call
+    to demod traces back over the whole block and returns a decision for
+    every complete symbol it received.
+
+    Parameters
+    -----------
+    M : int
+        Alphabet size, must be a power of 2
+
+    T : float
+        Symbol rate, in seconds
+
+    h : float
+        Modulation index, must be a rational number k / p
+
+    u : ndarray of floats
+        Frequency pulse shape
+
+    fsT : int
+        Samples per symbol
+
+    tblen : int
+        Traceback depth, in symbols, default is None
+
+    Notes
+    ------
+    The detector searches the CPM phase trellis, which has 2 p M**(L-1)
+    states for a frequency pulse spanning L symbol intervals and
+    h = k / p. Matched filter outputs for all M**L symbol patterns are
+    computed for a whole block with one matrix product, and the
+    add-compare-select step is vectorized across states. The detector
+    starts from the modulator's reset state, zero phase and zero symbol
+    history.
+
+    References
+    -----------
+    .. [1] Anderson, J., Aulin, T., Sundbergm C., Digital Phase Modulation,
+    Plenum Press, 1986.
+
+    Examples
+    ---------
+    >>> import velvet as vt
+    >>> import numpy as np
+
+    >>> cpm = vt.CPMMod(4, 1.0/2400, 0.25, np.ones(16), 8)
+    >>> demod = vt.CPMDemod(4, 1.0/2400, 0.25, np.ones(16), 8)
+    >>> syms = 2 * np.random.randint(0, 4, 1000) - 3
+    >>> y = vt.awgn(cpm.mod(syms), 10.0)
+    >>> errors = np.sum(demod.demod(y) != syms)
+
+    """
+
+    def __init__(self, M, Td, h, u, fsT, tblen=None):
+        """
+        Constructor
+        """
+        self._Mary = M
+        self._symbol_period = Td
+        self._mod_index = h
+        self._fsT = fsT
+        self._tblen = tblen
+
+        # Normalize the pulse shape as CPMMod does
+        self._pulse = u / np.sum(u) / 2.0
+
+        self._trellis = _CPMTrellis(M, h, self._pulse, fsT)
+
+        self.reset()
+
+    @property
+    def num_states(self):
+        """Number of trellis states"""
+        return self._trellis.num_states
+
+    def reset(self):
+        """
+        Reset internal state variables
+        """
+        metric = np.repeat(-np.inf, self._trellis.num_states)
+        metric[0] = 0.0
+        self._metric = metric
+        self._survivors = []
+        self._buffer = np.zeros(0, dtype='complex')
+        self._warm = self._trellis.L - 1
+
+    def demod(self, v):
+        """
+        CPM demodulation
+
+        x = CPMDemod.demod(v) detects the symbols in the received complex
+        envelope v. Samples that do not complete a symbol are kept for the
+        next call.
+
+        Parameters
+        -----------
+        v : ndarray of complex floats
+            Received signal
+
+        Returns
+        -------
+        x : ndarray of integers
+            Detected symbols, odd integers on the interval [-(M-1), (M-1)]
+
+        """
+
+        # Input error checking
+        assert_ndarray(v)
+        assert_one_dimension(v)
+
+        fsT = self._fsT
+        v = np.concatenate((self._buffer, v))
+        N = len(v) // fsT
+        self._buffer = v[N * fsT:]
+
+        trellis = self._trellis
+        z = trellis.correlate(v[0:N * fsT], self._warm)
+
+        metric = self._metric
+        out = []
+        for n in range(N):
+            if self._warm > 0:
+                prev = trellis.warm_prev
+                self._warm -= 1
+            else:
+                prev = trellis.prev
+
+            # Add-compare-select, vectorized across states
+            cand = (metric[:, np.newaxis] + trellis.branch_metrics(z[n])).ravel()
+            cand = cand[prev]
+            best = np.argmax(cand, axis=1)
+            survivor = prev[np.arange(len(best)), best]
+            metric = cand[np.arange(len(best)), best]
+            metric -= np.max(metric)
+            self._survivors.append(survivor)
+
+            # Release the decisions that are at least tblen symbols old
+            if self._tblen is not None and len(self._survivors) >= 2 * self._tblen:
+                out.append(self._traceback(metric, len(self._survivors) - self._tblen))
+
+        self._metric = metric
+
+        if self._tblen is None:
+            out.append(self._traceback(metric, len(self._survivors)))
+
+        if out:
+            return np.concatenate(out)
+        else:
+            return np.zeros(0, dtype=int)
+
+    def flush(self):
+        """
+        Flush the traceback memory
+
+        x = CPMDemod.flush() returns the decisions still held in the
+        traceback memory, tracing back from the best state, and resets the
+        internal state.
+
+        Returns
+        -------
+        x : ndarray of integers
+            Detected symbols
+
+        """
+        out = self._traceback(self._metric, len(self._survivors))
+        self.reset()
+        return out
+
+    def _traceback(self, metric, count):
+        # Trace back from the best state and release the oldest count
+        # decisions
+        M = self._Mary
+        state = np.argmax(metric)
+        digits = np.zeros(len(self._survivors), dtype=int)
+        for n in range(len(self._survivors) - 1, -1, -1):
+            branch = self._survivors[n][state]
+            digits[n] = branch % M
+            state = branch // M
+        self._survivors = self._survivors[count:]
+        return 2 * digits[0:count] - (M - 1)
+
+
+class CPMSoftDemod(object):
+    """
+    Continuous Phase Modulation soft-output detector.
+
+    mydemod = CPMSoftDemod(M, T, h, u, fsT) constructs a BCJR detector for
+    the CPM signal generated by CPMMod(M, T, h, u, fsT).
+    mydemod.demod(v, noise_var) returns the log-likelihood ratio of every
+    bit carried by the received complex envelope v.
+
+    mydemod = CPMSoftDemod(..., algorithm) selects the algorithm, one of
+    {'maxlog', 'logmap'}. 'maxlog', the default, replaces the log of a sum
+    of exponentials by its largest term. 'logmap' is exact.
+
+    mydemod = CPMSoftDemod(..., window, overlap) runs the sliding-window
+    BCJR. The frame is processed in windows of window symbols, and each
+    backward recursion starts overlap symbols past the end of its window.
+    Memory then depends on window + overlap and not on the frame length.
+
+    Parameters
+    -----------
+    M : int
+        Alphabet size, must be a power of 2
+
+    T : float
+        Symbol rate, in seconds
+
+    h : float
+        Modulation index, must be a rational number k / p
+
+    u : ndarray of floats
+        Frequency pulse shape
+
+    fsT : int
+        Samples per symbol
+
+    algorithm : string
+        One of {'maxlog', 'logmap'}, default is 'maxlog'
+
+    window : int
+        Window length, in symbols, default is None (whole frame)
+
+    overlap : int
+        Backward recursion overlap, in symbols, default is 32
+
+    Notes
+    ------
+    Each symbol a = 2 d - (M-1) carries the log2(M) bits of d in natural
+    binary, most significant bit first, see syms2bits. The log-likelihood
+    ratio of a bit b is ln(P(b = 1 | v) / P(b = 0 | v)), so positive values
+    favor 1.
+
+    Every frame starts from the modulator's reset state. The forward and
+    backward recursions run on the same trellis as CPMDemod, vectorized
+    across states and across a batch of frames.
+
+    References
+    -----------
+    .. [1] Bahl, L., Cocke, J., Jelinek, F., Raviv, J., "Optimal Decoding
+    of Linear Codes for Minimizing Symbol Error Rate", IEEE Trans. Inf.
+    Theory, 1974.
+
+    Examples
+    ---------
+    >>> import velvet as vt
+    >>> import numpy as np
+
+    >>> cpm = vt.CPMMod(4, 1.0/2400, 0.25, np.ones(16), 8)
+    >>> demod = vt.CPMSoftDemod(4, 1.0/2400, 0.25, np.ones(16), 8)
+    >>> bits = np.random.randint(0, 2, 2000)
+    >>> y = vt.awgn(cpm.mod(vt.bits2syms(bits, 4)), 3.0)
+    >>> llr = demod.demod(y, 10**(-3.0/10))
+    >>> errors = np.sum((llr > 0) != bits)
+
+    """
+
+    def __init__(self, M, Td, h, u, fsT, algorithm='maxlog', window=None,
+                 overlap=32):
+        """
+        Constructor
+        """
+        algorithm = str.lower(algorithm)
+        if algorithm not in ('maxlog', 'logmap'):
+            raise ValueError("algorithm must be one of {'maxlog', 'logmap'}")
+
+        self._Mary = M
+        self._symbol_period = Td
+        self._mod_index = h
+        self._fsT = fsT
+        self._algorithm = algorithm
+        self._window = window
+        self._overlap = overlap
+
+        # Normalize the pulse shape as CPMMod does
+        self._pulse = u / np.sum(u) / 2.0
+
+        self._trellis = _CPMTrellis(M, h, self._pulse, fsT)
+
+        # Bits of each symbol digit, most significant bit first
+        k = int(np.log2(M))
+        self._bits = (np.arange(M)[:, np.newaxis] >> np.arange(k - 1, -1, -1)) & 1
+
+    def demod(self, v, noise_var):
+        """
+        Soft-output CPM demodulation
+
+        llr = CPMSoftDemod.demod(v, noise_var) returns the bit
+        log-likelihood ratios for the received frame v. If v is a 2-D
+        array, each row is a separate frame and all frames are detected
+        together.
+
+        Parameters
+        -----------
+        v : ndarray of complex floats
+            Received signal, the length must be a multiple of fsT
+
+        noise_var : float
+            Noise variance per complex sample
+
+        Returns
+        -------
+        llr : ndarray of floats
+            Bit log-likelihood ratios, log2(M) per symbol
+
+        """
+
+        # Input error checking
+        assert_ndarray(v)
+        assert_max_dimension(v, 2)
+        if v.shape[-1] % self._fsT != 0:
+            raise ValueError("input length must be a multiple of fsT")
+
+        trellis = self._trellis
+        fsT = self._fsT
+        S = trellis.num_states
+        reduce = self._reduce
+
+        batch = v.shape[0:-1]
+        V = v.reshape(-1, v.shape[-1])
+        B = V.shape[0]
+        N = V.shape[-1] // fsT
+
+        scale = 2.0 / noise_var
+        if self._window is None:
+            W = max(N, 1)
+            D = 0
+        else:
+            W = self._window
+            D = self._overlap
+
+        llr = np.zeros((B, N, self._bits.shape[1]))
+
+        alpha = np.repeat(-np.inf, S)
+        alpha[0] = 0.0
+        alpha = np.tile(alpha, (B, 1))
+
+        for start in range(0, N, W):
+            stop = min(start + W, N)
+            end = min(stop + D, N)
+
+            z = trellis.correlate(V[:, start * fsT:end * fsT],
+                                  max(trellis.L - 1 - start, 0))
+            gamma = scale * trellis.branch_metrics(z)
+
+            # Forward recursion over the window
+            alphas = np.zeros((B, stop - start, S))
+            for n in range(start, stop):
+                alphas[:, n - start] = alpha
+                prev = trellis.transitions(n)[1]
+                cand = (alpha[:, :, np.newaxis] + gamma[:, n - start]).reshape(B, -1)
+                alpha = reduce(cand[:, prev], 2)
+                alpha -= np.max(alpha, axis=1)[:, np.newaxis]
+
+            # Backward recursion, from the end of the overlap
+            beta = np.zeros((B, S))
+            for n in range(end - 1, start - 1, -1):
+                next_state = trellis.transitions(n)[0]
+                tot = gamma[:, n - start] + beta[:, next_state]
+                if n < stop:
+                    app = alphas[:, n - start][:, :, np.newaxis] + tot
+                    llr[:, n] = self._bit_llr(reduce(app, 1))
+                beta = reduce(tot, 2)
+                beta -= np.max(beta, axis=1)[:, np.newaxis]
+
+        return llr.reshape(batch + (-1,))
+
+    def _reduce(self, x, axis):
+        # Log of a sum of exponentials
+        if self._algorithm == 'maxlog':
+            return np.max(x, axis=axis)
+        else:
+            return np.logaddexp.reduce(x, axis=axis)
+
+    def _bit_llr(self, sym):
+        # Bit log-likelihood ratios from symbol log-probabilities (B, M)
+        bits = self._bits
+        llr = np.zeros((sym.shape[0], bits.shape[1]))
+        for j in range(bits.shape[1]):
+            one = bits[:, j] == 1
+            llr[:, j] = self._reduce(sym[:, one], 1) - self._reduce(sym[:, ~one], 1)
+        return llr
+
+
+class DiscriminatorDemod(object):
+    """
+    Noncoherent CPFSK discriminator detector.
+
+    mydemod = DiscriminatorDemod(M, T, h, fsT) constructs an integrate and
+    dump discriminator detector for full response CPFSK, as generated by
+    CPMMod(M, T, h, rectpulse(1, fsT), fsT). mydemod.demod(v) returns the
+    detected symbols, in the range [+/-1, +/-3, ..., +/-(M-1)].
+
+    mydemod = DiscriminatorDemod(..., offset) starts the first symbol
+    interval offset samples into the stream, to align the integration
+    windows with the symbol timing.
+
+    Parameters
+    -----------
+    M : int
+        Alphabet size, must be a power of 2
+
+    T : float
+        Symbol rate, in seconds
+
+    h : float
+        Modulation index
+
+    fsT : int
+        Samples per symbol
+
+    offset : int
+        Symbol timing offset, in samples, default is 0
+
+    Notes
+    ------
+    The instantaneous frequency from an FM discriminator, see FMDetector,
+    is averaged over each symbol interval. For symbol a the average is
+    a h / (2T), so dividing by the frequency deviation and rounding to the
+    nearest odd integer gives the symbol. The detector needs no carrier
+    phase and no trellis, at the cost of about 3 dB or more against the
+    coherent detectors.
+
+    Blocks need not hold whole symbols, samples that do not complete a
+    symbol are kept for the next call.
+
+    The phase before the first sample of a stream is unknown, as the
+    carrier phase is, so the first sample only serves as the reference of
+    the second. With offset=0 the first symbol is then averaged over its
+    last fsT-1 samples.
+
+    See Also
+    ---------
+    FMDetector, CPMDemod
+
+    Examples
+    ---------
+    >>> import velvet as vt
+    >>> import numpy as np
+
+    >>> cpm = vt.CPMMod(4, 1.0/2400, 0.5, vt.rectpulse(1, 8), 8)
+    >>> demod = vt.DiscriminatorDemod(4, 1.0/2400, 0.5, 8)
+    >>> syms = 2 * np.random.randint(0, 4, 1000) - 3
+    >>> errors = np.sum(demod.demod(vt.awgn(cpm.mod(syms), 20.0)) != syms)
+
+    """
+
+    def __init__(self, M, Td, h, fsT, offset=0):
+        """
+        Constructor
+        """
+        self._Mary = M
+        self._symbol_period = Td
+        self._mod_index = h
+        self._fsT = fsT
+        self._offset = offset
+
+        # The frequency deviation, as in CPMMod
+        self._freq_deviation = h / (2.0 * Td)
+        self._fmd = FMDetector(fsT / Td)
+
+        self.reset()
+
+    def reset(self):
+        """
+        Reset internal state variables
+        """
+        self._fmd.reset()
+        self._skip = self._offset
+        self._buffer = None
+        self._fresh = True
+        self._first = self._offset == 0
+
+    def demod(self, v):
+        """
+        CPM demodulation
+
+        x = DiscriminatorDemod.demod(v) detects the symbols in the block v.
+        If v is a 2-D array each row is a separate stream.
+
+        Parameters
+        -----------
+        v : ndarray of complex floats
+            Received signal
+
+        Returns
+        -------
+        x : ndarray of integers
+            Detected symbols, odd integers on the interval [-(M-1), (M-1)]
+
+        """
+
+        # Input error checking
+        assert_ndarray(v)
+        assert_max_dimension(v, 2)
+
+        freq = self._fmd.detect(v)
+
+        # The first sample of the stream has no phase reference
+        if self._fresh and freq.shape[-1] > 0:
+            freq[..., 0] = 0.0
+            self._fresh = False
+
+        # Drop the samples before the first symbol interval
+        skip = min(self._skip, freq.shape[-1])
+        freq = freq[..., skip:]
+        self._skip -= skip
+
+        if self._buffer is not None:
+            freq = np.concatenate((self._buffer, freq), axis=-1)
+
+        fsT = self._fsT
+        N = freq.shape[-1] // fsT
+        self._buffer = freq[..., N * fsT:]
+
+        # Integrate and dump
+        freq = freq[..., 0:N * fsT].reshape(freq.shape[0:-1] + (N, fsT))
+        y = np.sum(freq, axis=-1) / (fsT * self._freq_deviation)
+        if self._first and N > 0:
+            # Average the first symbol over the samples with a reference
+            y[..., 0] *= fsT / max(fsT - 1.0, 1.0)
+            self._first = False
+
+        M = self._Mary
+        x = 2 * np.round((y + (M - 1)) / 2.0) - (M - 1)
+        return np.clip(x, -(M - 1), M - 1).astype(int)
+
+
+class MFSKDemod(object):
+    """
+    Noncoherent MFSK filterbank detector.
+
+    mydemod = MFSKDemod(cpm) constructs a noncoherent energy detector for
+    the CPFSK signal generated by the CPMMod object cpm. The M tones, at
+    a times the frequency deviation for each symbol a, and the symbol
+    length are taken from cpm. mydemod.demod(v) returns the symbol with
+    the largest tone energy in each symbol interval. The frequency pulse
+    of cpm must span exactly one symbol interval, fsT samples.
+
+    Parameters
+    -----------
+    cpm : CPMMod
+        The modulator
+
+    Notes
+    ------
+    Every symbol interval is correlated with all M tones at once, as one
+    product of the (symbols, fsT) block of samples with the (fsT, M) tone
+    matrix. This is the same set of DFT bins a bank of Goertzel filters
+    would compute, but runs as a single matrix product. The detector
+    ignores the carrier phase, and its tones are orthogonal for h >= 1
+    (h >= 1/2 with an aligned carrier phase).
+
+    Blocks need not hold whole symbols, samples that do not complete a
+    symbol are kept for the next call.
+
+    See Also
+    ---------
+    DiscriminatorDemod
+
+    Examples
+    ---------
+    >>> import velvet as vt
+    >>> import numpy as np
+
+    >>> cpm = vt.CPMMod(4, 1.0/2400, 1.0, vt.rectpulse(1, 8), 8)
+    >>> demod = vt.MFSKDemod(cpm)
+    >>> syms = 2 * np.random.randint(0, 4, 1000) - 3
+    >>> errors = np.sum(demod.demod(vt.awgn(cpm.mod(syms), 5.0)) != syms)
+
+    """
+
+    def __init__(self, cpm):
+        """
+        Constructor
+        """
+        M = cpm.alphabet_size
+        fsT = cpm.samples_per_symbol
+        if len(cpm.pulse_shape) != fsT:
+            raise ValueError("the pulse must span one symbol, fsT samples")
+        self._Mary = M
+        self._fsT = fsT
+
+        # Tone correlators, one column per symbol a = -(M-1), ..., (M-1)
+        self._symbols = np.arange(-(M - 1), M, 2)
+        Ts = cpm.symbol_period / fsT
+        freq = self._symbols * cpm.freq_deviation
+        self._tones = np.exp(-2j * np.pi * Ts * np.outer(np.arange(fsT), freq))
+
+        self.reset()
+
+    def reset(self):
+        """
+        Reset internal state variables
+        """
+        self._buffer = None
+
+    def energies(self, v):
+        """
+        Tone energies
+
+        e = MFSKDemod.energies(v) returns the energy of each of the M tones
+        in every complete symbol interval of v, with shape (..., N, M).
+        Samples that do not complete a symbol are kept for the next call.
+
+        Parameters
+        -----------
+        v : ndarray of complex floats
+            Received signal, one stream per row for a 2-D array
+
+        Returns
+        -------
+        e : ndarray of floats
+            Tone energies
+
+        """
+
+        # Input error checking
+        assert_ndarray(v)
+        assert_max_dimension(v, 2)
+
+        if self._buffer is not None:
+            if self._buffer.shape[0:-1] != v.shape[0:-1]:
+                raise ValueError("input rows do not match the detector "
+                                 "state, call reset()")
+            v = np.concatenate((self._buffer, v), axis=-1)
+
+        fsT = self._fsT
+        N = v.shape[-1] // fsT
+        self._buffer = v[..., N * fsT:]
+
+        R = v[..., 0:N * fsT].reshape(v.shape[0:-1] + (N, fsT))
+        z = np.dot(R, self._tones)
+        return z.real**2 + z.imag**2
+
+    def demod(self, v):
+        """
+        CPM demodulation
+
+        x = MFSKDemod.demod(v) detects the symbols in the block v. If v is
+        a 2-D array each row is a separate stream.
+
+        Parameters
+        -----------
+        v : ndarray of complex floats
+            Received signal
+
+        Returns
+        -------
+        x : ndarray of integers
+            Detected symbols, odd integers on the interval [-(M-1), (M-1)]
+
+        """
+        return self._symbols[np.argmax(self.energies(v), axis=-1)]
@@ -0,0 +1,307 @@
+"""CPM Distance Module
+"""
+
+#------------------------------------------------------------------------
+# Copyright (c) 2015 SGW
+#
+# Distributed under the terms of the New BSD License.
+#
+# The full License is in the file LICENSE
+#------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import tempfile
+from fractions import Fraction
+import numpy as np
+from .cpmmod import _phase_response
+from .validation import assert_ndarray, assert_one_dimension
+
+# Public API
+__all__ = ['cpmdmin']
+
+# Computed distances, keyed by configuration, as loaded from and saved to
+# the disk cache
+_dmin_cache = {}
+
+# File name of the disk cache, in the cache directory
+_cache_file = 'cpmdmin.json'
+
+# Version of the distance computation, part of the cache keys so results of
+# earlier versions are not reused
+_cache_version = 3
+
+# Largest denominator for which h is treated as rational
+_max_denominator = 1000
+
+
+def cpmdmin(M, h, u, fsT, nmax=64, cache=True):
+    """
+    Minimum distance of continuous phase modulation.
+
+    d2, Kmin = cpmdmin(M, h, u, fsT) returns the normalized squared
+    minimum Euclidean distance d2 of the CPM signal generated by
+    CPMMod(M, T, h, u, fsT), and the multiplicity Kmin of the minimum
+    distance error events. The bit error rate at high Eb/No is then close
+    to Kmin Q(sqrt(d2 Eb/No)) / log2(M), see berawgn.
+
+    d2, Kmin = cpmdmin(..., nmax) stops the search after nmax symbol
+    intervals. Longer error events are then represented by their distance
+    over the first nmax intervals, a lower bound.
+
+    Results are cached on disk, as JSON in the directory named by the
+    VELVET_CACHE_DIR environment variable, or ~/.velvet by default, so
+    each configuration is searched once. cache=False neither reads nor
+    writes the cache.
+
+    Parameters
+    -----------
+    M : int
+        Alphabet size, must be a power of 2
+
+    h : float
+        Modulation index
+
+    u : ndarray of floats
+        Frequency pulse shape
+
+    fsT : int
+        Samples per symbol
+
+    nmax : int
+        Longest search, in symbol intervals, default is 64
+
+    cache : boolean
+        Use the disk cache, default is True
+
+    Returns
+    -------
+    d2 : float
+        Normalized squared minimum Euclidean distance
+
+    Kmin : float
+        Average number of symbol errors in the minimum distance events
+        starting at one symbol interval
+
+    Notes
+    ------
+    The distance between the signals of two symbol sequences depends only
+    on their difference sequence g, and is normalized to the bit energy,
+    d2 = log2(M) / T int (1 - cos(phi(t, g))) dt, where phi(t, g) is the
+    phase of the difference [1]_. The phase is taken at the fsT samples of
+    each symbol interval, as the modems see the signal, and the integral is
+    evaluated exactly for the phase interpolated linearly between them,
+    which is the closed form for LREC pulses.
+
+    The search extends the difference sequences one symbol interval at a
+    time, from every nonzero first difference. Sequences that reach the
+    same phase and the same last L-1 differences, for a pulse spanning L
+    intervals, have the same future and are merged, keeping the smaller
+    distance. A sequence ends once its phase difference returns to zero,
+    which bounds d2 from above, and sequences whose distance already
+    exceeds the bound are pruned. The search stops when no sequence is
+    left, so the result holds for events of any length. Catastrophic
+    configurations, such as M=4 and h=1/4 with a 2 symbol rectangular
+    pulse, have difference sequences that never end but stop adding
+    distance. Their result is the distance of those sequences over nmax
+    intervals.
+
+    Each minimum distance difference sequence is weighted by the
+    probability that random data can produce it, prod (M - |g_i| / 2) / M,
+    and by its number of symbol errors, and Kmin is the sum of the
+    weights. The weight of a sequence that has not ended after nmax
+    intervals shrinks with every interval, and says nothing about the
+    events it stands for, so when such sequences reach the minimum
+    distance Kmin is at least 1, the value berawgn assumes for an unknown
+    multiplicity.
+
+    See Also
+    ---------
+    berawgn
+
+    References
+    -----------
+    .. [1] Anderson, J.B., Aulin, T. and Sundberg, C.-E., Digital Phase
+           Modulation, Plenum Press, 1986.
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> d2, Kmin = vt.cpmdmin(2, 0.5, np.ones(8), 8)
+    >>> d2, Kmin = vt.cpmdmin(2, 0.5, np.hanning(24), 8)
+
+    """
+    # Error checking
+    assert_ndarray(u)
+    assert_one_dimension(u)
+    if M < 2 or M & (M - 1):
+        raise ValueError("M must be a power of 2")
+
+    key = _cache_key(M, h, u, fsT, nmax)
+    if cache:
+        if not _dmin_cache:
+            _dmin_cache.update(_load_cache())
+        if key in _dmin_cache:
+            return tuple(_dmin_cache[key])
+
+    result = _search(M, h, u, fsT, nmax)
+
+    if cache:
+        _dmin_cache[key] = result
+        _save_cache(key, result)
+    return result
+
+def _search(M, h, u, fsT, nmax):
+    # Branch-and-bound search over difference sequences, see cpmdmin
+    pulse = u / np.sum(u) / 2.0
+    L = -(-len(pulse) // fsT)
+    Q = 2.0 * np.pi * h * _phase_response(pulse, fsT, L).reshape(L, fsT)
+    scale = np.log2(M) / fsT
+
+    # Phase response from the start to the end of each interval
+    Q = np.column_stack((np.concatenate(([0.0], Q[0:-1, -1])), Q))
+
+    # The phase pi h S of the sum S of the differences repeats with period
+    # 2p in S for h = k / p
+    frac = Fraction(h).limit_denominator(_max_denominator)
+    period = 2 * frac.denominator if abs(float(frac) - h) < 1e-12 else None
+
+    gammas = 2 * np.arange(-(M - 1), M)
+    prob = (M - np.abs(gammas) // 2) / float(M)
+    tol = 1e-9
+
+    # Paths: sum of differences, last L-1 differences, distance, and the
+    # summed weight and weighted symbol errors of the merged sequences
+    S = np.zeros(1, dtype=np.int64)
+    hist = np.zeros((1, L - 1), dtype=np.int64)
+    dist = np.zeros(1)
+    weight = np.ones(1)
+    errors = np.zeros(1)
+
+    best = np.inf
+    Kmin = 0.0
+    first = True
+    for n in range(nmax):
+        # Extend every path by every difference, only positive ones at
+        # first since g and -g have the same distance
+        branch = np.flatnonzero(gammas > 0) if first else np.arange(len(gammas))
+        first = False
+        g = gammas[branch]
+        P = len(S)
+        window = np.concatenate((np.repeat(hist, len(g), axis=0),
+                                 np.tile(g, P)[:, np.newaxis]), axis=1)
+        S = np.repeat(S, len(g)) + window[:, -1]
+        base = np.pi * h * (S - np.sum(window, axis=1))
+        phase = base[:, np.newaxis] + np.dot(window[:, ::-1], Q)
+        dist = np.repeat(dist, len(g)) + scale * _integral(phase)
+        pg = np.tile(prob[branch], P)
+        errors = (np.repeat(errors, len(g)) +
+                  np.repeat(weight, len(g)) * (window[:, -1] != 0)) * pg
+        weight = np.repeat(weight, len(g)) * pg
+        hist = window[:, 1:]
+        if period is not None:
+            S = np.mod(S, period)
+
+        # Sequences whose phase difference has returned to zero end here
+        if period is not None:
+            zero = np.mod(frac.numerator * S, period) == 0
+        else:
+            zero = S == 0
+        merged = zero & np.all(hist == 0, axis=1)
+        if np.any(merged):
+            d = np.min(dist[merged])
+            if d < best - tol:
+                best = d
+                Kmin = 0.0
+            at_best = merged & (np.abs(dist - best) <= tol)
+            Kmin += np.sum(errors[at_best])
+
+        # Prune ended sequences and those beyond the bound
+        keep = ~merged & (dist <= best + tol)
+        S, hist, dist = S[keep], hist[keep], dist[keep]
+        weight, errors = weight[keep], errors[keep]
+        if len(S) == 0:
+            break
+
+        # Merge paths with the same future
+        keys = np.column_stack((S, hist))
+        keys, inv = np.unique(keys, axis=0, return_inverse=True)
+        inv = inv.ravel()
+        dmin = np.full(len(keys), np.inf)
+        np.minimum.at(dmin, inv, dist)
+        tie = dist <= dmin[inv] + tol
+        weight = np.bincount(inv[tie], weight[tie], minlength=len(keys))
+        errors = np.bincount(inv[tie], errors[tie], minlength=len(keys))
+        S, hist, dist = keys[:, 0], keys[:, 1:], dmin
+
+    # Unfinished sequences bound the longer events from below, and their
+    # weights, which only shrink with the search length, bound nothing
+    unfinished = False
+    if len(S) > 0:
+        d = np.min(dist)
+        if d < best - tol:
+            best = d
+            Kmin = 0.0
+        at_best = np.abs(dist - best) <= tol
+        Kmin += np.sum(errors[at_best])
+        unfinished = np.any(at_best)
+
+    Kmin = 2.0 * float(Kmin)
+    if unfinished:
+        Kmin = max(Kmin, 1.0)
+    return float(best), Kmin
+
+def _integral(phase):
+    # Integral of 1 - cos over each row of phase samples, in units of the
+    # sample spacing, for the phase linear between samples. The integral
+    # over a sample is 1 - cos(m) sin(d/2) / (d/2), for the midpoint m and
+    # the increment d of the phase.
+    mid = 0.5 * (phase[:, 1:] + phase[:, 0:-1])
+    step = np.diff(phase, axis=1)
+    return np.sum(1.0 - np.cos(mid) * np.sinc(step / (2.0 * np.pi)), axis=1)
+
+def _cache_key(M, h, u, fsT, nmax):
+    # Text key of a configuration, with a digest of the normalized pulse
+    pulse = np.asarray(u, dtype=np.float64) / np.sum(u)
+    digest = hashlib.sha1(np.round(pulse, 12).tobytes()).hexdigest()
+    return 'v%d,%d,%r,%d,%d,%s' % (_cache_version, M, float(h), fsT, nmax,
+                                   digest)
+
+def _cache_path():
+    # Location of the disk cache
+    folder = os.environ.get('VELVET_CACHE_DIR',
+                            os.path.join(os.path.expanduser('~'), '.velvet'))
+    return os.path.join(folder, _cache_file)
+
+def _load_cache():
+    # Cached distances, or none if the cache is missing or unreadable
+    try:
+        with open(_cache_path()) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+def _save_cache(key, result):
+    # Add a result to the disk cache, merging with entries saved by other
+    # processes, and replace the file atomically. The cache is only an
+    # optimization, so failures to write it are ignored.
+    path = _cache_path()
+    try:
+        folder = os.path.dirname(path)
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        entries = _load_cache()
+        entries[key] = result
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp, path)
+        finally:
+            # Remove the temporary file unless it replaced the cache
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    except (IOError, OSError):
+        pass
@@ -10,12 +10,9 @@
 #------------------------------------------------------------------------
 
 import numpy as np
-import scipy.signal
-from .sigproc import upsample
-from .validation import assert_ndarray, assert_one_dimension
-from .utils import isodd
-
-lfilter = scipy.signal.lfilter
+from .sigproc import Interpolator
+from .validation import assert_ndarray, assert_max_dimension
+from .utils import isodd, _real_dtype
 
 # Public API
 __all__ = ['CPMMod']
@@ -31,6 +28,21 @@ class CPMMod(object):
     alphabet size M, modulation index h, frequency pulse u and fsT samples
     per symbol. 
 
+    mycpm = CPM(..., precision) generates samples in the given precision,
+    one of {'single', 'double'}. The default is the library-wide precision
+    when the object is constructed, see set_precision.
+
+    mycpm = CPM(..., engine) selects the modulator implementation, one of
+    {'filter', 'table'}. 'filter', the default, filters the upsampled
+    symbols with the frequency pulse and integrates the result. 'table'
+    builds the output by table lookup, see Notes. Both give the same
+    output to within round-off.
+
+    mycpm = CPM(..., nco) integrates the filtered symbols with the NCO
+    object nco, which holds a wrapped phase accumulator and may use a
+    lookup table or a fixed-point phase. Its sampling frequency must be
+    fsT / T. Only the 'filter' engine supports an NCO.
+
     Parameters
     -----------
     M : int
@@ -48,6 +60,15 @@ class CPMMod(object):
     fsT : int
         Samples per symbol
 
+    precision : string
+        One of {'single', 'double'}, default is get_precision()
+
+    engine : string
+        One of {'filter', 'table'}, default is 'filter'
+
+    nco : NCO
+        Oscillator for the 'filter' engine, default is None
+
     Returns
     -------
     v : ndarray of complex floats
@@ -57,6 +78,18 @@ class CPMMod(object):
     ------
     For more details on the theory of CPM refer to [1]_.
 
+    A frequency pulse spanning L symbol intervals gives CPM a finite
+    memory. Over symbol interval n the phase is
+
+        theta_n + 2 pi h sum_{k=0}^{L-1} a_{n-k} q(t - (n-k)T)
+
+    where q is the integral of the frequency pulse and theta_n = pi h times
+    the sum of all symbols older than a_{n-L+1}. The table engine
+    precomputes exp(j 2 pi h sum(...)) over one symbol interval for all M**L
+    patterns of the last L symbols. The output is then one table lookup
+    per symbol, rotated by exp(j theta_n), so only one complex exponential
+    is evaluated per symbol instead of one per sample.
+
     References
     -----------
     .. [1] Anderson, J., Aulin, T., Sundbergm C., Digital Phase Modulation,
@@ -75,7 +108,11 @@ class CPMMod(object):
     
     """
 
-    def __init__(self, M, Td, h, u, fsT):
+    # Largest phase table, in samples, that the table engine will build
+    _max_table_size = 2**22
+
+    def __init__(self, M, Td, h, u, fsT, precision=None, engine='filter',
+                 nco=None):
         """
         Constructor
         """
@@ -84,14 +121,45 @@ class CPMMod(object):
         self._mod_index = h
         self._pulse = u
         self._fsT = fsT
+        self._real_dtype = _real_dtype(precision)
 
         # Normalize the pulse shape. It should integrate to 1/2.
         # Check the integration with: cumsum(pulse).
         self._pulse = self._pulse / np.sum(self._pulse) / 2.0
+        self._pulse = self._pulse.astype(self._real_dtype)
+
+        engine = str.lower(engine)
+        if engine not in ('filter', 'table'):
+            raise ValueError("engine must be one of {'filter', 'table'}")
+        self._engine = engine
+
+        if nco is not None:
+            if engine != 'filter':
+                raise ValueError("an NCO requires engine='filter'")
+            if abs(nco.sample_rate * Td - fsT) > 1e-9 * fsT:
+                raise ValueError("NCO sampling frequency must be fsT / T")
+        self._nco = nco
 
         # Phase is in radians
         self._phase_state = 0.0
-        self._zinit = np.zeros(len(u) - 1, dtype='float')
+
+        # Polyphase pulse shaping filter, holds the filter state
+        self._interp = Interpolator(self._pulse, fsT)
+
+        if engine == 'table':
+            traj, self._memory = _phase_trajectories(self._pulse, h, M, fsT)
+            if traj.size > self._max_table_size:
+                raise ValueError("phase table too large, use engine='filter'")
+            self._phase_table = np.exp(1j * traj).astype(
+                np.result_type(self._real_dtype, np.complex64))
+
+            # Phase increments as a matrix over one symbol interval,
+            # used while the symbol history still holds the zeros of reset
+            self._phase_pulse = 2.0 * np.pi * h * _phase_response(
+                self._pulse, fsT, self._memory).reshape(self._memory, fsT)
+
+            # The last L-1 symbols
+            self._sym_hist = np.zeros(self._memory - 1, dtype=int)
 
         # The frequency deviation. Note that this is *not* the max
         # frequency deviation.
@@ -107,12 +175,36 @@ class CPMMod(object):
         """The normalized pulse shape"""
         return self._pulse
 
+    @property
+    def alphabet_size(self):
+        """Alphabet size, M"""
+        return self._Mary
+
+    @property
+    def mod_index(self):
+        """Modulation index"""
+        return self._mod_index
+
+    @property
+    def symbol_period(self):
+        """Symbol period, in seconds"""
+        return self._symbol_period
+
+    @property
+    def samples_per_symbol(self):
+        """Samples per symbol, fsT"""
+        return self._fsT
+
     def reset(self):
         """
         Reset internal state variables
         """
         self._phase_state = 0.0
-        self._zinit = np.zeros(len(self._pulse) - 1, dtype='float')
+        self._interp.reset()
+        if self._nco is not None:
+            self._nco.reset()
+        if self._engine == 'table':
+            self._sym_hist = np.zeros(self._memory - 1, dtype=int)
 
     def mod(self,myx):
         """
@@ -123,47 +215,133 @@ class CPMMod(object):
         in the range [+/-1, +/-3, ..., +/-(M-1)], where M
         is the alphabet size.
 
+        If x is a 2-D array, each row is an independent burst and all rows
+        are modulated in one vectorized pass. Each row keeps its own phase
+        and filter state, so successive calls with the same number of rows
+        continue every burst. Call reset() to start new bursts.
+
         Parameters
         -----------
         x : ndarray of integers
                 Message sequence to modulate, values must be odd integers on the interval
-                [-(M-1), (M-1)]
+                [-(M-1), (M-1)]. A 2-D array holds one burst per row.
                 
         Returns
         -------
         v : ndarray of complex floats
-                Complex modulated signal 
+                Complex modulated signal, one row per burst for 2-D x
 
         """
 
         # Input error checking
         assert_ndarray(myx)
-        assert_one_dimension(myx)
-        if any(~np.isreal(myx)) == True:
+        assert_max_dimension(myx, 2)
+        if np.any(~np.isreal(myx)):
             raise TypeError("input must be real")
-        if (max(myx) >= self._Mary):
+        if np.max(myx) >= self._Mary:
             raise ValueError("input must be less than M") 
-        if (min(myx) <= -self._Mary):
+        if np.min(myx) <= -self._Mary:
             raise ValueError("input must be greater than -M") 
-        if not all(isodd(myx)):
+        if not np.all(isodd(myx)):
             raise ValueError("input must be an odd integer")
+        state = np.shape(self._phase_state)
+        if state != () and state != myx.shape[0:-1]:
+            raise ValueError("input rows do not match the modulator state, "
+                             "call reset()")
+
+        if self._engine == 'table':
+            return self._mod_table(myx)
 
-        # Upsample symbols
-        symup = upsample(myx, self._fsT)
-        
-        # Filter symbols
-        vf, self._zinit = lfilter(self._pulse, 1, symup, zi=self._zinit)
+        # Upsample and filter symbols. The polyphase interpolator never
+        # multiplies the zeros inserted between symbols.
+        vf = self._interp.filter(myx)
+
+        if self._nco is not None:
+            vo = self._nco.generate(vf * (self._mod_index * self._nco.sample_rate))
+            self._phase_state = self._nco.phase
+            return vo
 
         # Frequency modulation
         # The integration history for cumsum(...) is maintained as part
-        # of the phase_state variable
-        phase0 = self._phase_state
-        int_x = np.cumsum(vf)
+        # of the phase_state variable. The phase is accumulated in double
+        # precision, single precision would lose accuracy on long streams.
+        phase0 = np.asarray(self._phase_state)[..., np.newaxis]
+        int_x = np.cumsum(vf, axis=-1, dtype=np.float64)
         phase = 2.0 * np.pi * self._mod_index * int_x + phase0
 
-        # Update the phase state
-        self._phase_state = phase[-1]
+        # Update the phase state, wrapped so it stays bounded on long
+        # streams
+        self._phase_state = np.mod(phase[..., -1], 2.0 * np.pi)
+
+        if self._real_dtype != phase.dtype:
+            # Wrap the phase before rounding it to the output precision
+            phase = np.mod(phase, 2.0 * np.pi).astype(self._real_dtype)
 
         vo = np.exp(1j * phase) 
 
         return vo
+
+    def _mod_table(self, x):
+        M = self._Mary
+        L = self._memory
+        N = x.shape[-1]
+
+        # Work on a 2-D array of bursts
+        batch = x.shape[0:-1]
+        x = x.reshape(-1, N)
+        B = x.shape[0]
+        hist = np.broadcast_to(self._sym_hist, (B, L - 1))
+        phase0 = np.broadcast_to(self._phase_state, batch).reshape(B)
+
+        # The last L-1 symbols followed by the new symbols
+        full = np.concatenate((hist, x), axis=-1)
+
+        # Table index of the pattern (a_n, a_{n-1}, ..., a_{n-L+1}), symbol
+        # a_{n-k} is digit k in base M
+        index = np.zeros((B, N), dtype=int)
+        for k in range(L):
+            index += (full[:, L - 1 - k:L - 1 - k + N] + (M - 1)) // 2 * M**k
+        v = self._phase_table.take(index, axis=0)
+
+        # theta_n accumulates the symbols that left the L symbol window
+        cum = np.cumsum(full[:, 0:N], axis=-1) * (np.pi * self._mod_index)
+        theta = np.column_stack((np.zeros(B), cum[:, 0:-1])) + phase0[:, np.newaxis]
+
+        # After a reset the history holds zeros, which are not in the table.
+        # Only the first L-1 symbols can see them.
+        for n in range(min(N, L - 1)):
+            win = full[:, n:n + L][:, ::-1]
+            rows = np.any(win == 0, axis=-1)
+            if np.any(rows):
+                v[rows, n] = np.exp(1j * np.dot(win[rows], self._phase_pulse))
+
+        v *= np.exp(1j * np.mod(theta, 2.0 * np.pi))[..., np.newaxis]
+        vo = v.reshape(batch + (N * self._fsT,))
+
+        # Update the state
+        phase0 = np.mod(phase0 + cum[:, -1], 2.0 * np.pi)
+        self._phase_state = phase0.reshape(batch)[()]
+        self._sym_hist = full[:, N:].reshape(batch + (L - 1,))
+
+        return vo
+
+def _phase_response(pulse, fsT, L):
+    # Phase response q, the running integral of the frequency pulse, over
+    # L symbol intervals. It holds its final value after the pulse ends.
+    q = np.cumsum(pulse, dtype=np.float64)
+    return np.concatenate((q, np.repeat(q[-1], L * fsT - len(q))))
+
+def _phase_trajectories(pulse, h, M, fsT):
+    # Phase over one symbol interval for every pattern of the last L
+    # symbols, excluding theta_n. Row index sum_k d_k M**k, where
+    # a_{n-k} = 2 d_k - (M-1). Returns the (M**L, fsT) table and L.
+    L = -(-len(pulse) // fsT)
+    q = _phase_response(pulse, fsT, L).reshape(L, fsT)
+
+    index = np.arange(M**L)
+    traj = np.zeros((M**L, fsT))
+    for k in range(L):
+        a = 2 * (index // M**k % M) - (M - 1)
+        traj += np.outer(a, q[k])
+
+    return 2.0 * np.pi * h * traj, L
@@ -0,0 +1,573 @@
+""" Laurent decomposition of binary CPM
+"""
+
+#------------------------------------------------------------------------
+# Copyright (c) 2015 SGW
+#
+# Distributed under the terms of the New BSD License.
+#
+# The full License is in the file LICENSE
+#------------------------------------------------------------------------
+
+from fractions import Fraction
+import numpy as np
+from .cpmmod import _phase_response
+from .sigproc import Interpolator
+from .validation import assert_ndarray, assert_one_dimension, \
+    assert_max_dimension
+
+# Public API
+__all__ = ['laurent', 'LaurentDemod', 'LaurentMod']
+
+# Computed component pulses, keyed by configuration
+_laurent_cache = {}
+
+# Largest number of configurations kept in the cache
+_max_cached = 64
+
+
+def laurent(h, u, fsT):
+    """
+    Laurent decomposition of binary CPM.
+
+    c = laurent(h, u, fsT) returns the PAM component pulses of the binary
+    CPM signal generated by CPMMod(2, T, h, u, fsT). Row k of c holds the
+    pulse c_k, sampled at fsT samples per symbol. The CPM signal is the sum
+    of the component pulses, each modulated by its own sequence of pseudo
+    symbols, see [1]_.
+
+    Results are cached, so repeated calls with the same configuration are
+    free. The returned array is read-only.
+
+    Parameters
+    -----------
+    h : float
+        Modulation index, must not be an integer
+
+    u : ndarray of floats
+        Frequency pulse shape
+
+    fsT : int
+        Samples per symbol
+
+    Returns
+    --------
+    c : ndarray of floats
+        Component pulses, shape (2**(L-1), (L+1) * fsT), for a frequency
+        pulse spanning L symbol intervals
+
+    Notes
+    ------
+    With the phase response q(t) and
+
+        psi(t) = sin(2 pi h q(t)) / sin(pi h),           0 <= t < LT
+        psi(t) = sin(pi h - 2 pi h q(t - LT)) / sin(pi h),  LT <= t < 2LT
+
+    the component pulses are
+
+        c_k(t) = psi(t) prod_{i=1}^{L-1} psi(t + iT + beta_{k,i} LT)
+
+    where beta_{k,i} is bit i-1 of k. c_0 lasts L+1 symbol intervals and
+    carries most of the signal energy.
+
+    References
+    -----------
+    .. [1] Laurent, P. A., "Exact and Approximate Construction of Digital
+    Phase Modulations by Superposition of Amplitude Modulated Pulses
+    (AMP)", IEEE Trans. Commun., 1986.
+
+    Examples
+    ---------
+    >>> import velvet as vt
+    >>> import numpy as np
+    >>> c = vt.laurent(0.5, np.hanning(16), 8)
+    >>> energy = np.sum(c**2, axis=1)
+
+    """
+    # Error checking
+    assert_ndarray(u)
+    assert_one_dimension(u)
+    if abs(np.sin(np.pi * h)) < 1e-9:
+        raise ValueError("h must not be an integer")
+
+    key = (float(h), int(fsT), np.asarray(u, dtype=float).tobytes())
+    if key in _laurent_cache:
+        return _laurent_cache[key]
+
+    # Normalize the pulse shape as CPMMod does
+    pulse = u / np.sum(u) / 2.0
+    L = -(-len(pulse) // fsT)
+    q = _phase_response(pulse, fsT, L)
+
+    psi = np.concatenate((np.sin(2.0 * np.pi * h * q),
+                          np.sin(np.pi * h - 2.0 * np.pi * h * q)))
+    psi = np.concatenate((psi / np.sin(np.pi * h), np.zeros(2 * L * fsT)))
+
+    j = np.arange((L + 1) * fsT)
+    c = np.zeros((2**(L - 1), len(j)))
+    for k in range(2**(L - 1)):
+        ck = psi[j]
+        for i in range(1, L):
+            beta = (k >> (i - 1)) & 1
+            ck = ck * psi[j + i * fsT + beta * L * fsT]
+        c[k] = ck
+
+    c.setflags(write=False)
+    if len(_laurent_cache) >= _max_cached:
+        _laurent_cache.clear()
+    _laurent_cache[key] = c
+    return c
+
+
+class LaurentMod(object):
+    """
+    Binary CPM modulation by Laurent decomposition.
+
+    mymod = LaurentMod(M, T, h, u, fsT) constructs a modulator that builds
+    the CPM signal of CPMMod(M, T, h, u, fsT) as a sum of PAM signals, one
+    per Laurent component pulse, see laurent.
+
+    mymod = LaurentMod(..., K) keeps only the K components with the most
+    energy, trading accuracy for speed. The default keeps all of them, and
+    the output then equals CPMMod's to within round-off.
+
+    Parameters
+    -----------
+    M : int
+        Alphabet size, must be 2
+
+    T : float
+        Symbol rate, in seconds
+
+    h : float
+        Modulation index, must not be an integer
+
+    u : ndarray of floats
+        Frequency pulse shape
+
+    fsT : int
+        Samples per symbol
+
+    K : int
+        Number of component pulses, default is None (all of them)
+
+    Notes
+    ------
+    The decomposition holds for symbols of +/-1 only, so the modulator acts
+    as if the first symbol were preceded by +1 symbols. The output matches
+    CPMMod's from symbol interval L-1 after reset, for a frequency pulse
+    spanning L symbol intervals.
+
+    Examples
+    ---------
+    >>> import velvet as vt
+    >>> import numpy as np
+
+    >>> mod = vt.LaurentMod(2, 1.0/2400, 0.5, np.hanning(16), 8, K=1)
+    >>> syms = 2 * np.random.randint(0, 2, 1000) - 1
+    >>> v = mod.mod(syms)
+
+    """
+
+    def __init__(self, M, Td, h, u, fsT, K=None):
+        """
+        Constructor
+        """
+        if M != 2:
+            raise ValueError("only binary CPM is supported, M must be 2")
+
+        self._Mary = M
+        self._symbol_period = Td
+        self._mod_index = h
+        self._fsT = fsT
+
+        c = laurent(h, u, fsT)
+        self._memory = -(-len(u) // fsT)
+
+        # Components in decreasing order of energy
+        order = np.argsort(-np.sum(c**2, axis=1), kind='mergesort')
+        if K is not None:
+            order = order[0:K]
+        self._components = order
+
+        # Bits beta_{k,i} of the kept components, shape (K, L-1)
+        i = np.arange(self._memory - 1)
+        self._beta = (order[:, np.newaxis] >> i) & 1
+
+        self._interps = [Interpolator(c[k], fsT) for k in order]
+
+        self.reset()
+
+    @property
+    def components(self):
+        """Indices of the component pulses in use"""
+        return self._components
+
+    def reset(self):
+        """
+        Reset internal state variables
+        """
+        L = self._memory
+
+        # The L-1 symbols before a_{-L}, all +1, and pi h times the sum of
+        # a_0 ... a_{-L-1} counted from a_{-1}
+        self._sym_hist = np.ones(L - 1, dtype=int)
+        self._phase_state = -np.pi * self._mod_index * L
+
+        # Prime the filters with the pseudo symbols of a_{-L} ... a_{-1}
+        b = self._pam_symbols(np.ones(L, dtype=int))
+        for interp, bk in zip(self._interps, b):
+            interp.reset()
+            interp.filter(bk)
+
+    def mod(self, myx):
+        """
+        CPM modulation
+
+        v = LaurentMod.mod(x) modulates the symbols x, in {-1, +1}, and
+        returns the complex envelope in v. Successive calls continue the
+        signal.
+
+        Parameters
+        -----------
+        x : ndarray of integers
+            Message sequence to modulate, values must be -1 or +1
+
+        Returns
+        -------
+        v : ndarray of complex floats
+            Complex modulated signal
+
+        """
+
+        # Input error checking
+        assert_ndarray(myx)
+        assert_one_dimension(myx)
+        if not np.all(np.abs(myx) == 1):
+            raise ValueError("input must be -1 or +1")
+
+        b = self._pam_symbols(myx)
+        v = np.zeros(len(myx) * self._fsT, dtype='complex')
+        for interp, bk in zip(self._interps, b):
+            v += interp.filter(bk)
+
+        return v
+
+    def _pam_symbols(self, x):
+        # Pseudo symbols b_{k,n} = exp(j pi h (A_n - sum_i a_{n-i} beta_{k,i})),
+        # with A_n the running sum of the symbols. Shape (K, N).
+        L = self._memory
+        N = len(x)
+        full = np.concatenate((self._sym_hist, x))
+
+        theta = self._phase_state + np.pi * self._mod_index * np.cumsum(x)
+        phase = np.repeat(theta[np.newaxis, :], len(self._beta), axis=0)
+        for i in range(1, L):
+            a = full[L - 1 - i:L - 1 - i + N]
+            phase -= np.pi * self._mod_index * np.outer(self._beta[:, i - 1], a)
+
+        self._phase_state = np.mod(theta[-1], 2.0 * np.pi) if N else self._phase_state
+        self._sym_hist = full[N:]
+
+        return np.exp(1j * phase)
+
+
+class LaurentDemod(object):
+    """
+    Reduced-state binary CPM detector.
+
+    mydemod = LaurentDemod(M, T, h, u, fsT) constructs a detector for the
+    signal of CPMMod(M, T, h, u, fsT) based on the principal Laurent
+    component c_0. mydemod.demod(v) returns the detected symbols, in
+    {-1, +1}, for the received complex envelope v. If v is a 2-D array
+    each row is a separate stream, and all rows are detected together.
+
+    mydemod = LaurentDemod(..., tblen) releases the decisions once they are
+    tblen symbols old, for streaming. Without tblen each call to demod
+    traces back over the whole block.
+
+    Parameters
+    -----------
+    M : int
+        Alphabet size, must be 2
+
+    T : float
+        Symbol rate, in seconds
+
+    h : float
+        Modulation index, must be a rational number k / p
+
+    u : ndarray of floats
+        Frequency pulse shape
+
+    fsT : int
+        Samples per symbol
+
+    tblen : int
+        Traceback depth, in symbols, default is None
+
+    Notes
+    ------
+    The received signal is approximated by sum_n b_n c_0(t - nT), with
+    b_n = exp(j pi h A_n) and A_n the running sum of the symbols. The
+    Viterbi detector runs on the 2 p phases of b_n, for h = k / p, instead
+    of the 2 p 2**(L-1) states of CPMDemod. The intersymbol interference
+    between overlapping c_0 pulses is cancelled with each state's survivor,
+    using the Ungerboeck metric. The detector starts from the modulator's
+    reset state.
+
+    The interference term Re(b_n* b_(n-l)) depends only on the last l
+    symbols, so each survivor carries its last L-1 symbols as an integer
+    and the interference is read from a table. The matched filter outputs
+    and their correlation with every phase state are computed for a whole block
+    at once, leaving a short add-compare-select step per symbol, vectorized
+    across states and rows.
+
+    The c_0 pulse of a symbol spans L+1 symbol intervals, so a symbol
+    enters the trellis once the samples of its whole pulse are received.
+    Without tblen, the symbols still waiting for the end of their pulse
+    are decided at the end of the call as if the signal stopped there, and
+    these decisions are not revised by later calls. flush() decides the
+    symbols left in the detector the same way.
+
+    References
+    -----------
+    .. [1] Kaleh, G. K., "Simple Coherent Receivers for Partial Response
+    Continuous Phase Modulation", IEEE J. Sel. Areas Commun., 1989.
+
+    Examples
+    ---------
+    >>> import velvet as vt
+    >>> import numpy as np
+
+    >>> cpm = vt.CPMMod(2, 1.0/2400, 0.5, np.hanning(24), 8)
+    >>> demod = vt.LaurentDemod(2, 1.0/2400, 0.5, np.hanning(24), 8)
+    >>> syms = 2 * np.random.randint(0, 2, 1000) - 1
+    >>> errors = np.sum(demod.demod(vt.awgn(cpm.mod(syms), 10.0)) != syms)
+
+    """
+
+    # Largest modulation index denominator
+    _max_denominator = 1000
+
+    def __init__(self, M, Td, h, u, fsT, tblen=None):
+        """
+        Constructor
+        """
+        if M != 2:
+            raise ValueError("only binary CPM is supported, M must be 2")
+
+        frac = Fraction(h).limit_denominator(self._max_denominator)
+        if abs(float(frac) - h) > 1e-9:
+            raise ValueError("h must be a rational number")
+
+        self._Mary = M
+        self._symbol_period = Td
+        self._mod_index = h
+        self._fsT = fsT
+        self._tblen = tblen
+
+        self._pulse = laurent(h, u, fsT)[0]
+        L = -(-len(u) // fsT)
+        self._memory = L
+
+        # Autocorrelation of c_0 at symbol spacing, g_0 ... g_L
+        c0 = self._pulse
+        g = np.array([np.dot(c0[l * fsT:], c0[0:len(c0) - l * fsT])
+                      for l in range(L + 1)])
+        self._autocorr = g
+
+        # Phase states, b = exp(j pi s / p)
+        k = frac.numerator
+        p = frac.denominator
+        P = 2 * p
+        state = np.arange(P)[:, np.newaxis]
+        a = np.array([[-1, 1]])
+        self._next_state = (state + k * a) % P
+        order = np.argsort(self._next_state.ravel(), kind='mergesort')
+        self._prev = order.reshape(P, 2)
+        self._phasor = np.exp(1j * np.pi * np.arange(P) / p)
+
+        # Interference of each survivor history and branch, the history
+        # holding the last L-1 symbols with bit i set for a_(n-1-i) = +1.
+        # Re(b_n* b_(n-l)) = cos(pi h (a_n + ... + a_(n-l+1))).
+        self._history_mask = 2**(L - 1) - 1
+        past = 2 * ((np.arange(2**(L - 1))[:, np.newaxis] >>
+                     np.arange(L - 1)) & 1) - 1
+        sums = a[:, :, np.newaxis] + np.concatenate(
+            (np.zeros((len(past), 1, 1), dtype=int),
+             np.cumsum(past, axis=1)[:, np.newaxis, :]), axis=2)
+        self._isi = np.dot(np.cos(np.pi * h * sums), g[1:])
+
+        self.reset()
+
+    @property
+    def num_states(self):
+        """Number of trellis states"""
+        return len(self._phasor)
+
+    def reset(self):
+        """
+        Reset internal state variables
+        """
+        self._metric = None
+        self._history = None
+        self._survivors = []
+        self._buffer = None
+        self._released = 0
+
+    def demod(self, v):
+        """
+        CPM demodulation
+
+        x = LaurentDemod.demod(v) detects the symbols in the received
+        complex envelope v. If v is a 2-D array each row is a separate
+        stream. Samples that do not complete a symbol are kept for the next
+        call.
+
+        Parameters
+        -----------
+        v : ndarray of complex floats
+            Received signal
+
+        Returns
+        -------
+        x : ndarray of integers
+            Detected symbols, -1 or +1
+
+        """
+
+        # Input error checking
+        assert_ndarray(v)
+        assert_max_dimension(v, 2)
+
+        if self._buffer is not None:
+            v = np.concatenate((self._buffer, v), axis=-1)
+        batch = v.shape[0:-1]
+        V = v.reshape(-1, v.shape[-1])
+        if self._metric is None:
+            self._start(len(V))
+
+        # Symbols received, and those whose whole c_0 pulse is received
+        fsT = self._fsT
+        N = V.shape[-1] // fsT
+        K = min(max((V.shape[-1] - len(self._pulse)) // fsT + 1, 0), N)
+        self._buffer = v[..., K * fsT:]
+
+        x = self._acs(self._correlate(V, K), self._tblen)
+
+        if self._tblen is None:
+            # Decide the symbols still waiting for the end of their pulse,
+            # then restore the state they leave
+            metric, history = self._metric, self._history
+            self._acs(self._correlate(V[:, K * fsT:], N - K))
+            x = self._traceback(len(self._survivors))
+            self._metric, self._history = metric, history
+            self._released = N - K
+
+        return x.reshape(batch + x.shape[-1:])
+
+    def flush(self):
+        """
+        Flush the detector
+
+        x = LaurentDemod.flush() decides the symbols still held in the
+        detector, including those received without the end of their c_0
+        pulse, tracing back from the best state, and resets the internal
+        state.
+
+        Returns
+        -------
+        x : ndarray of integers
+            Detected symbols
+
+        """
+        if self._buffer is None:
+            return np.zeros(0, dtype=int)
+
+        batch = self._buffer.shape[0:-1]
+        V = self._buffer.reshape(-1, self._buffer.shape[-1])
+        N = V.shape[-1] // self._fsT
+        self._acs(self._correlate(V, N))
+        x = self._traceback(len(self._survivors))
+        self.reset()
+        return x.reshape(batch + x.shape[-1:])
+
+    def _start(self, B):
+        # Reset state of B rows, with +1 symbols before the first symbol
+        P = self.num_states
+        self._metric = np.full((B, P), -np.inf)
+        self._metric[:, 0] = 0.0
+        self._history = np.full((B, P), self._history_mask, dtype=int)
+
+    def _correlate(self, V, N):
+        # Correlation of the matched filter output at the first N symbols of
+        # each row with every phase state, with shape (B, N, P). The
+        # samples past the end of V are taken as zero.
+        fsT = self._fsT
+        c0 = self._pulse
+        V = V[:, 0:N * fsT + len(c0)]
+        r = np.zeros((len(V), N * fsT + len(c0)), dtype=complex)
+        r[:, 0:V.shape[-1]] = V
+        frames = np.lib.stride_tricks.as_strided(
+            r, shape=(len(r), N, len(c0)),
+            strides=(r.strides[0], fsT * r.strides[1], r.strides[1]))
+        z = np.dot(frames, c0)
+        return np.real(z[:, :, np.newaxis] * np.conj(self._phasor))
+
+    def _acs(self, corr, tblen=None):
+        # Run the trellis over the state correlations, releasing the
+        # decisions that are at least tblen symbols old. Each state keeps
+        # the branch of its survivor, 0 or 1 in _prev.
+        source = self._prev // 2
+        bit = self._prev % 2
+        isi = self._isi.ravel()
+        mask = self._history_mask
+        metric = self._metric
+        history = self._history
+        N = corr.shape[1]
+        out = []
+        for n in range(N):
+            # Ungerboeck metric with the survivor's interference removed,
+            # the interference indexed by the history extended by the
+            # branch. The correlation is common to both branches into a
+            # state, so it is added after the selection.
+            key = (history[:, source] << 1) | bit
+            cand = metric[:, source] - isi[key]
+            survivor = cand[..., 1] > cand[..., 0]
+            metric = np.where(survivor, cand[..., 1], cand[..., 0])
+            metric += corr[:, n]
+            if n % 16 == 0:
+                metric -= metric.max(axis=-1, keepdims=True)
+            history = np.where(survivor, key[..., 1], key[..., 0]) & mask
+            self._survivors.append(survivor)
+
+            if tblen is not None and len(self._survivors) >= 2 * tblen:
+                self._metric = metric
+                out.append(self._traceback(len(self._survivors) - tblen))
+
+        self._metric = metric
+        self._history = history
+        if out:
+            return np.concatenate(out, axis=-1)
+        else:
+            return np.zeros((len(corr), 0), dtype=int)
+
+    def _traceback(self, count):
+        # Trace back from the best state of each row and release the oldest
+        # count decisions, less those already released
+        source = self._prev // 2
+        bit = self._prev % 2
+        rows = np.arange(len(self._metric))
+        state = np.argmax(self._metric, axis=-1)
+        branches = np.array(self._survivors, dtype=int).reshape(
+            len(self._survivors), len(rows), -1)
+        digits = np.zeros((len(rows), len(self._survivors)), dtype=int)
+        for n in range(len(self._survivors) - 1, -1, -1):
+            branch = branches[n, rows, state]
+            digits[:, n] = bit[state, branch]
+            state = source[state, branch]
+        self._survivors = self._survivors[count:]
+        skip = min(self._released, count)
+        self._released -= skip
+        return 2 * digits[:, skip:count] - 1
@@ -0,0 +1,234 @@
+""" Numerically controlled oscillator
+"""
+
+#------------------------------------------------------------------------
+# Copyright (c) 2015 SGW
+#
+# Distributed under the terms of the New BSD License.
+#
+# The full License is in the file LICENSE
+#------------------------------------------------------------------------
+
+import numpy as np
+from .validation import assert_ndarray, assert_max_dimension
+from .utils import _real_dtype, _complex_dtype
+
+# Public API
+__all__ = ['NCO']
+
+
+class NCO(object):
+    """
+    Numerically controlled oscillator.
+
+    nco = NCO(Fs) constructs an oscillator for a sampling frequency of Fs
+    Hz. nco.generate(f) advances the phase accumulator by 2 pi f[n] / Fs
+    for each sample and returns exp(j phase) after each step. The
+    accumulator is wrapped to one cycle, so the phase stays bounded and
+    keeps its accuracy on streams of any length. Successive calls continue
+    the phase.
+
+    nco = NCO(..., bits) uses a fixed-point accumulator of the given width,
+    which wraps exactly modulo 2**bits and never accumulates round-off. The
+    frequency resolution is then Fs / 2**bits.
+
+    nco = NCO(..., output) selects how the samples are computed, one of
+    {'exp', 'lut', 'rotation'}. 'exp', the default, evaluates the complex
+    exponential of every phase. 'lut' looks the samples up in a table of
+    2**table_bits entries, for a phase error of at most pi / 2**table_bits
+    radians. 'rotation' multiplies each sample by the rotation of its
+    phase increment, see Notes.
+
+    nco = NCO(..., precision) generates samples in the given precision,
+    one of {'single', 'double'}. The default is the library-wide precision,
+    see set_precision. The accumulator is always held in double precision
+    or in integers.
+
+    Parameters
+    -----------
+    Fs : float
+        Sampling frequency, in Hz
+
+    bits : int
+        Accumulator width, 1 to 52 bits, default is None (floating point)
+
+    output : string
+        One of {'exp', 'lut', 'rotation'}, default is 'exp'
+
+    table_bits : int
+        Size of the lookup table, as a power of 2, default is 12
+
+    precision : string
+        One of {'single', 'double'}, default is get_precision()
+
+    Notes
+    ------
+    The rotation output computes exp(j 2 pi d) only once for each run of
+    equal phase increments d, which is cheap when the frequency changes
+    seldom, as it does for a constant frequency or for CPFSK. The samples
+    are then running products of the rotations, restarted from the exact
+    accumulator phase every _rotation_chunk samples so that round-off stays
+    bounded.
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> nco = vt.NCO(8000.0, bits=32, output='lut')
+    >>> v1 = nco.generate(np.repeat(1000.0, 500))
+    >>> v2 = nco.generate(np.repeat(-250.0, 500))
+
+    """
+
+    # Samples between exact phase restarts of the rotation output
+    _rotation_chunk = 256
+
+    def __init__(self, Fs, bits=None, output='exp', table_bits=12,
+                 precision=None):
+        """
+        Constructor
+        """
+        output = str.lower(output)
+        if output not in ('exp', 'lut', 'rotation'):
+            raise ValueError("output must be one of {'exp', 'lut', 'rotation'}")
+        if bits is not None and not 1 <= bits <= 52:
+            raise ValueError("bits must be between 1 and 52")
+
+        self._Fs = Fs
+        self._bits = bits
+        self._output = output
+        self._real_dtype = _real_dtype(precision)
+        self._complex_dtype = _complex_dtype(precision)
+
+        if output == 'lut':
+            self._table_bits = table_bits
+            n = np.arange(2**table_bits)
+            self._table = np.exp(2j * np.pi * n / 2**table_bits).astype(
+                self._complex_dtype)
+
+        self.reset()
+
+    @property
+    def sample_rate(self):
+        """Sampling frequency, in Hz"""
+        return self._Fs
+
+    @property
+    def phase(self):
+        """Accumulator phase, in radians on the interval [0, 2 pi)"""
+        return 2.0 * np.pi * self._cycles(self._acc)
+
+    def reset(self):
+        """
+        Reset internal state variables
+        """
+        if self._bits is None:
+            self._acc = 0.0
+        else:
+            self._acc = np.uint64(0)
+
+    def generate(self, freq):
+        """
+        NCO output
+
+        v = NCO.generate(f) returns one sample for each frequency in f, in
+        Hz. If f is a 2-D array each row is a separate oscillator, and the
+        accumulator is kept per row.
+
+        Parameters
+        -----------
+        f : ndarray of floats
+            Instantaneous frequency of each sample, in Hz
+
+        Returns
+        -------
+        v : ndarray of complex floats
+            Oscillator samples
+
+        """
+
+        # Input error checking
+        assert_ndarray(freq)
+        assert_max_dimension(freq, 2)
+        state = np.shape(self._acc)
+        if state != () and state != freq.shape[0:-1]:
+            raise ValueError("input rows do not match the oscillator state, "
+                             "call reset()")
+
+        if freq.shape[-1] == 0:
+            return np.zeros(freq.shape, dtype=self._complex_dtype)
+
+        acc, step = self._accumulate(freq / float(self._Fs))
+        self._acc = acc[..., -1][()]
+
+        if self._output == 'exp':
+            cycles = self._cycles(acc).astype(self._real_dtype, copy=False)
+            return np.exp((2j * np.pi) * cycles)
+        elif self._output == 'lut':
+            return self._table.take(self._table_index(acc))
+        else:
+            return self._rotation(acc, step)
+
+    def _accumulate(self, step):
+        # Accumulator value after each sample, for phase steps in cycles,
+        # and the steps in accumulator units
+        acc0 = np.asarray(self._acc)[..., np.newaxis]
+        if self._bits is None:
+            acc = np.mod(np.cumsum(step, axis=-1, dtype=np.float64) + acc0, 1.0)
+            return acc, step
+
+        inc = np.rint(np.mod(step, 1.0) * 2.0**self._bits).astype(np.uint64)
+        mask = np.uint64(2**self._bits - 1)
+
+        # Unsigned sums wrap modulo 2**64, a multiple of 2**bits
+        acc = (np.cumsum(inc, axis=-1, dtype=np.uint64) + acc0) & mask
+        return acc, inc
+
+    def _cycles(self, acc):
+        # Accumulator value as a fraction of a cycle
+        if self._bits is None:
+            return acc
+        return acc / 2.0**self._bits
+
+    def _table_index(self, acc):
+        # Nearest lookup table entry
+        T = self._table_bits
+        if self._bits is None:
+            index = np.rint(acc * 2.0**T).astype(np.int64)
+        elif self._bits > T:
+            half = np.uint64(2**(self._bits - T - 1))
+            index = (acc + half) >> np.uint64(self._bits - T)
+        else:
+            index = acc << np.uint64(T - self._bits)
+        return index.astype(np.int64) & (2**T - 1)
+
+    def _rotation(self, acc, step):
+        # Running products of the per-sample rotations, restarted from the
+        # accumulator phase at the start of each chunk
+        C = self._rotation_chunk
+        N = acc.shape[-1]
+        if N == 1:
+            # No steps to rotate by, evaluate the phase directly
+            cycles = self._cycles(acc).astype(self._real_dtype, copy=False)
+            return np.exp((2j * np.pi) * cycles)
+
+        batch = acc.shape[0:-1]
+        acc = acc.reshape(-1, N)
+        step = step.reshape(-1, N)[:, 1:]
+
+        # One rotation per run of equal steps
+        flat = step.ravel()
+        starts = np.flatnonzero(np.concatenate(([True], flat[1:] != flat[0:-1])))
+        runs = np.diff(np.append(starts, len(flat)))
+        rot = np.exp((2j * np.pi) * self._cycles(flat[starts])).astype(
+            self._complex_dtype, copy=False)
+
+        nchunks = -(-N // C)
+        v = np.ones((acc.shape[0], nchunks * C), dtype=self._complex_dtype)
+        v[:, 1:N] = np.repeat(rot, runs).reshape(step.shape)
+        v = v.reshape(-1, nchunks, C)
+        start = self._cycles(acc[:, ::C]).astype(self._real_dtype)
+        v[:, :, 0] = np.exp((2j * np.pi) * start)
+        np.cumprod(v, axis=-1, out=v)
+
+        return v.reshape(acc.shape[0], -1)[:, 0:N].reshape(batch + (N,))
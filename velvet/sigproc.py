@@ -9,16 +9,578 @@
 # The full License is in the file LICENSE
 #------------------------------------------------------------------------
 
+import timeit
 import numpy as np
-from .validation import assert_ndarray, assert_one_dimension, assert_complex
+from .validation import assert_ndarray, assert_one_dimension, assert_complex, \
+    assert_max_dimension
+from .utils import _float_result, _complex_dtype
 
 fft = np.fft.fft
 ifft = np.fft.ifft
+rfft = np.fft.rfft
+irfft = np.fft.irfft
 
 # Public API
-__all__ = ['conv', 'fmdetect', 'nextpower2', 'upsample']
+__all__ = ['BlockConvolver', 'Convolver', 'FMDetector', 'Interpolator', 'blockconv',
+           'calibrate_conv', 'conv', 'fmdetect', 'freqshift', 'nextfastlen', 'nextpower2',
+           'upfirdn', 'upsample']
 
-def conv(x, h):
+# Cost model used by conv(..., method='auto'), in seconds. 'direct' is the
+# cost of one multiply-accumulate of direct convolution, 'fft' the cost per
+# n*log2(n) of one length n FFT, and 'fft_call' the fixed cost of one FFT
+# call. The defaults are typical values; calibrate_conv measures them on
+# the host machine.
+_conv_cost = {'direct': 4.0e-10, 'fft': 1.5e-9, 'fft_call': 1.0e-5}
+
+class BlockConvolver(object):
+    """
+    Streaming block convolution.
+
+    bc = BlockConvolver(h, nfft, method) constructs a block convolution
+    object for the fixed filter h. Successive blocks of an input stream
+    are passed to BlockConvolver.filter, which returns one output sample
+    per input sample. The filter memory is carried between calls, so the
+    concatenated outputs equal the linear convolution of the concatenated
+    inputs, without seams at the block boundaries.
+
+    If h is a 2-D array, each row is a separate filter, and filter takes a
+    2-D block with one stream per row, or a 1-D block sent through every
+    filter. A 1-D filter also takes 2-D blocks, and keeps its memory per
+    row.
+
+    Parameters
+    -----------
+    h : ndarray
+        Filter sequence, or 2-D array of filter sequences
+
+    nfft : int
+        FFT size, must be at least len(h). Default is chosen from len(h).
+
+    method : string
+        'ola' for overlap-add or 'ols' for overlap-save, default is 'ola'
+
+    Notes
+    ------
+    Each FFT of length nfft consumes nfft - len(h) + 1 new input samples.
+    Peak memory therefore depends on nfft and on the size of the blocks
+    passed to filter, and not on the total length of the stream.
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> h = np.random.randn(64)
+    >>> bc = vt.BlockConvolver(h, 512)
+    >>> y1 = bc.filter(np.random.randn(1000))
+    >>> y2 = bc.filter(np.random.randn(1000))
+    >>> tail = bc.flush()
+
+    """
+
+    def __init__(self, h, nfft=None, method='ola'):
+        """
+        Constructor
+        """
+        # Input error checking
+        assert_ndarray(h)
+        assert_max_dimension(h, 2)
+
+        M = h.shape[-1]
+        if nfft is None:
+            nfft = nextfastlen(max(8*M, 256))
+        if nfft < M:
+            raise ValueError("nfft must be at least len(h)")
+
+        method = str.lower(method)
+        if method not in ('ola', 'ols'):
+            raise ValueError("method must be one of {'ola', 'ols'}")
+
+        self._h = h
+        self._nfft = nfft
+        self._method = method
+
+        # Number of new input samples consumed by each FFT
+        self._step = nfft - M + 1
+
+        # The filter spectrum is computed once and cached
+        self._convolver = Convolver(h)
+
+        self.reset()
+
+    @property
+    def nfft(self):
+        """FFT size"""
+        return self._nfft
+
+    @property
+    def method(self):
+        """Block method, one of {'ola', 'ols'}"""
+        return self._method
+
+    def reset(self):
+        """
+        Reset internal state variables
+        """
+        # For overlap-add the state is the output tail of the previous
+        # block. For overlap-save it is the last len(h) - 1 input samples.
+        shape = self._h.shape[0:-1] + (self._h.shape[-1] - 1,)
+        self._state = np.zeros(shape, dtype=_float_result((self._h,)))
+
+    def filter(self, x):
+        """
+        Filter a block of data
+
+        y = BlockConvolver.filter(x) filters the block x and returns
+        len(x) output samples.
+
+        Parameters
+        -----------
+        x : ndarray
+            Input block
+
+        Returns
+        -------
+        y : ndarray
+            Output block
+
+        """
+
+        x = self._prepare(x)
+
+        if self._method == 'ola':
+            return self._filter_ola(x)
+        else:
+            return self._filter_ols(x)
+
+    def direct(self, x):
+        """
+        Filter a block of data in the time domain
+
+        y = BlockConvolver.direct(x) returns the same output as
+        BlockConvolver.filter(x), and updates the same state, by direct
+        convolution instead of FFTs. It is faster for short blocks or short
+        filters, and the two can be mixed from one block to the next.
+
+        Parameters
+        -----------
+        x : ndarray
+            Input block
+
+        Returns
+        -------
+        y : ndarray
+            Output block
+
+        """
+        x = self._prepare(x)
+        batch = x.shape[0:-1]
+        N = x.shape[-1]
+        h = self._h.astype(self._state.dtype, copy=False)
+
+        if self._method == 'ola':
+            # The full convolution of the block, plus the previous tail
+            y = _directconv(x.astype(h.dtype, copy=False), h, batch)
+            y[..., 0:h.shape[-1] - 1] += self._state
+            self._state = y[..., N:].copy()
+            return y[..., 0:N]
+
+        # Only the outputs that the input history and the block complete
+        full = np.concatenate((self._state, x), axis=-1)
+        self._state = full[..., N:]
+        return _directconv(full, h, batch, 'valid')
+
+    def _prepare(self, x):
+        # Check a block against the state, and broadcast both to the batch
+        # of streams
+
+        # Input error checking
+        assert_ndarray(x)
+        assert_max_dimension(x, 2)
+
+        # A batch of streams takes one state per row
+        state = self._state
+        try:
+            batch = np.broadcast(state[..., 0:1], x[..., 0:1]).shape[0:-1]
+        except ValueError:
+            batch = None
+        if batch is None or (state.ndim > 1 and batch != state.shape[0:-1]):
+            raise ValueError("input rows do not match the filter state, "
+                             "call reset()")
+
+        # Complex or higher precision input changes the output type
+        dtype = _float_result((state, x))
+        self._state = np.broadcast_to(state, batch + state.shape[-1:]).astype(dtype)
+        return np.broadcast_to(x, batch + x.shape[-1:])
+
+    def flush(self):
+        """
+        Flush the filter memory
+
+        tail = BlockConvolver.flush() returns the last len(h) - 1 samples
+        of the convolution, as if the input stream were followed by zeros,
+        and resets the internal state.
+
+        Returns
+        -------
+        tail : ndarray
+            Output tail
+
+        """
+        M1 = self._h.shape[-1] - 1
+
+        if self._method == 'ola':
+            tail = self._state
+        else:
+            zeros = np.zeros(self._state.shape, dtype=self._state.dtype)
+            tail = self._filter_ols(zeros[..., 0:M1])
+
+        self.reset()
+
+        return tail
+
+    def _circconv(self, block):
+        # Circular convolution of block with h, using real FFTs when both
+        # are real
+        nfft = self._nfft
+        if np.iscomplexobj(self._state):
+            return ifft(fft(block, nfft) * self._convolver.spectrum(nfft))
+        else:
+            H = self._convolver.spectrum(nfft, real=True)
+            return irfft(rfft(block, nfft) * H, nfft)
+
+    def _filter_ola(self, x):
+        N = x.shape[-1]
+        M1 = self._h.shape[-1] - 1
+        step = self._step
+
+        y = np.zeros(self._state.shape[0:-1] + (N + M1,), dtype=self._state.dtype)
+        y[..., 0:M1] = self._state
+
+        for start in range(0, N, step):
+            seg = x[..., start:start + step]
+            n = seg.shape[-1] + M1
+            y[..., start:start + n] += self._circconv(seg)[..., 0:n]
+
+        self._state = y[..., N:].copy()
+
+        return y[..., 0:N]
+
+    def _filter_ols(self, x):
+        N = x.shape[-1]
+        M1 = self._h.shape[-1] - 1
+        step = self._step
+
+        y = np.zeros(self._state.shape[0:-1] + (N,), dtype=self._state.dtype)
+        hist = self._state
+
+        for start in range(0, N, step):
+            block = np.concatenate((hist, x[..., start:start + step]), axis=-1)
+            n = block.shape[-1] - M1
+
+            # The first M1 samples of each block are corrupted by the
+            # circular wrap-around and are discarded.
+            y[..., start:start + n] = self._circconv(block)[..., M1:M1 + n]
+
+            hist = block[..., block.shape[-1] - M1:]
+
+        self._state = hist
+
+        return y
+
+class Convolver(object):
+    """
+    Convolution with a fixed filter.
+
+    cv = Convolver(h) constructs a convolution object for the filter h.
+    cv.conv(x) returns the same result as conv(x, h), but the spectrum of
+    h is computed once per FFT size and cached, so repeated convolutions
+    with the same filter skip all filter-side work.
+
+    cv = Convolver(h, axis) holds a batch of filters, with the filter
+    sequences along axis of a 2-D array h.
+
+    Parameters
+    -----------
+    h : ndarray
+        Filter sequence, or 2-D array of filter sequences
+
+    axis : int
+        Axis of h holding the filter sequences, default is -1
+
+    See Also
+    ---------
+    conv, nextfastlen
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> cv = vt.Convolver(vt.rectpulse(1, 8))
+    >>> bursts = [np.random.randn(1000) for ii in range(100)]
+    >>> out = [cv.conv(x) for x in bursts]
+
+    """
+
+    # Maximum number of cached filter spectra
+    _max_cached = 16
+
+    def __init__(self, h, axis=-1):
+        """
+        Constructor
+        """
+        # Input error checking
+        assert_ndarray(h)
+        assert_max_dimension(h, 2)
+
+        # Filter sequences are kept along the last axis
+        if h.ndim > 1:
+            h = np.moveaxis(h, axis, -1)
+        self._h = h
+        self._spectra = {}
+
+    @property
+    def filter_taps(self):
+        """The filter sequence, along the last axis"""
+        return self._h
+
+    def spectrum(self, nfft, real=False):
+        """
+        Filter spectrum
+
+        H = Convolver.spectrum(nfft) returns the nfft point FFT of the
+        filter. The result is cached.
+
+        H = Convolver.spectrum(nfft, True) returns the nfft point real FFT,
+        nfft // 2 + 1 values, of a real filter.
+
+        Parameters
+        -----------
+        nfft : int
+            FFT size
+
+        real : boolean
+            True or False, default is False
+
+        Returns
+        -------
+        H : ndarray of complex floats
+            Filter spectrum
+
+        """
+        key = (nfft, real)
+        H = self._spectra.get(key)
+        if H is None:
+            if len(self._spectra) >= self._max_cached:
+                self._spectra.pop(next(iter(self._spectra)))
+            h = self._h.astype(_float_result((self._h,)), copy=False)
+            if real:
+                H = rfft(h, nfft)
+            else:
+                H = fft(h, nfft)
+            self._spectra[key] = H
+        return H
+
+    def conv(self, x, method='auto', axis=-1):
+        """
+        Linear convolution
+
+        c = Convolver.conv(x) returns the linear convolution between x
+        and the filter.
+
+        c = Convolver.conv(x, method) selects the algorithm, one of
+        {'auto', 'direct', 'fft'}. See conv.
+
+        c = Convolver.conv(..., axis) convolves along axis of a 2-D x.
+        The other dimension of x is broadcast against the batch of
+        filters.
+
+        Parameters
+        -----------
+        x : ndarray
+            Input sequence, or 2-D array of input sequences
+
+        method : string
+            One of {'auto', 'direct', 'fft'}, default is 'auto'
+
+        axis : int
+            Axis of x holding the input sequences, default is -1
+
+        Returns
+        -------
+        c : ndarray
+            Convolution sequence of length len(x) + len(h) - 1 along axis
+
+        """
+
+        # Input error checking
+        assert_ndarray(x)
+        assert_max_dimension(x, 2)
+
+        method = str.lower(method)
+        if method not in ('auto', 'direct', 'fft'):
+            raise ValueError("method must be one of {'auto', 'direct', 'fft'}")
+
+        # Work along the last axis. A 1-D sequence broadcasts against a
+        # batch of sequences as is.
+        if x.ndim > 1:
+            xl = np.moveaxis(x, axis, -1)
+        else:
+            xl = x
+        h = self._h
+        try:
+            batch = np.broadcast(xl[..., 0:1], h[..., 0:1]).shape[0:-1]
+        except ValueError:
+            raise ValueError("x and h batch dimensions must broadcast")
+
+        Nx = xl.shape[-1]
+        Mh = h.shape[-1]
+        N = Nx + Mh - 1
+
+        # Compute FFT size
+        fftSize = nextfastlen(N)
+
+        # Floating point inputs keep their precision, integer inputs are
+        # converted to the default precision
+        dtype = _float_result((xl, h))
+        xl = xl.astype(dtype, copy=False)
+        is_real = not np.iscomplexobj(np.zeros(0, dtype))
+
+        if method == 'auto':
+            method = _conv_method(Nx, Mh, (fftSize, is_real) in self._spectra,
+                                  is_real)
+
+        if method == 'direct':
+            out = _directconv(xl, h.astype(dtype, copy=False), batch)
+        elif is_real:
+            # Real inputs use real FFTs, which halves the work and memory
+            # and gives an exactly real result.
+            X = rfft(xl, fftSize)
+            out = irfft(X * self.spectrum(fftSize, True), fftSize)[..., 0:N]
+        else:
+            X = fft(xl, fftSize)
+            out = ifft(X * self.spectrum(fftSize))[..., 0:N]
+
+        out = out.astype(dtype, copy=False)
+
+        if out.ndim > 1:
+            out = np.moveaxis(out, -1, axis)
+
+        return out
+
+def calibrate_conv(repeats=3):
+    """ Calibrate the conv method selection.
+
+    cost = calibrate_conv() times direct and FFT convolution on the host
+    machine and updates the cost model that conv(..., method='auto') uses
+    to choose the faster method. The fitted model is returned as a
+    dictionary.
+
+    Parameters
+    -----------
+    repeats : int
+        Number of timing repetitions, the fastest is kept
+
+    Returns
+    --------
+    cost : dict
+        Cost model, in seconds. 'direct' is the cost of one
+        multiply-accumulate of direct convolution, 'fft' the cost per
+        n*log2(n) of one length n FFT, and 'fft_call' the fixed cost of one
+        FFT call.
+
+    See Also
+    ---------
+    conv
+
+    Examples
+    ---------
+    >>> import velvet as vt
+    >>> cost = vt.calibrate_conv()
+
+    """
+    timer = timeit.default_timer
+
+    def best_time(func, number):
+        times = []
+        for ii in range(repeats):
+            t0 = timer()
+            for jj in range(number):
+                func()
+            times.append((timer() - t0) / number)
+        return min(times)
+
+    # Direct convolution, cost per multiply-accumulate
+    N = 4096
+    x = np.random.randn(N)
+    direct = []
+    for M in (16, 64):
+        h = np.random.randn(M)
+        direct.append(best_time(lambda: np.convolve(x, h), 10) / (N * M))
+
+    # FFT, fit t = fft * n*log2(n) + fft_call
+    sizes = np.array([64, 256, 1024, 4096, 16384])
+    times = []
+    for n in sizes:
+        y = np.random.randn(n)
+        times.append(best_time(lambda: fft(y), 20))
+    A = np.column_stack((sizes * np.log2(sizes), np.ones(len(sizes))))
+    coef = np.linalg.lstsq(A, np.array(times), rcond=None)[0]
+
+    _conv_cost['direct'] = float(np.median(direct))
+    _conv_cost['fft'] = float(max(coef[0], 1e-12))
+    _conv_cost['fft_call'] = float(max(coef[1], 0.0))
+
+    return dict(_conv_cost)
+
+def _conv_method(N, M, cached=False, real=False):
+    # Choose 'direct' or 'fft' for convolving lengths N and M. With a
+    # cached filter spectrum only two FFTs are needed instead of three.
+    # A real FFT costs about half of a complex FFT of the same length.
+    L = nextfastlen(N + M - 1)
+    num_fft = 2 if cached else 3
+    scale = 0.5 if real else 1.0
+    direct_cost = _conv_cost['direct'] * N * M
+    fft_cost = num_fft * (scale * _conv_cost['fft'] * L * np.log2(max(L, 2)) +
+                          _conv_cost['fft_call'])
+    if direct_cost <= fft_cost:
+        return 'direct'
+    else:
+        return 'fft'
+
+def _directconv(x, h, batch, mode='full'):
+    # Direct convolution along the last axis of floating point x and h.
+    # mode='valid' keeps only the outputs where h fully overlaps x, for x
+    # at least as long as h.
+    dtype = np.result_type(x, h)
+    if not batch:
+        return np.convolve(x, h, mode)
+
+    if mode == 'valid':
+        # Loop over the shorter of the filter and the output
+        N = x.shape[-1] - h.shape[-1] + 1
+        M = h.shape[-1]
+        out = np.zeros(batch + (N,), dtype=dtype)
+        if M <= N:
+            for k in range(M):
+                out += x[..., M - 1 - k:M - 1 - k + N] * h[..., k:k + 1]
+        else:
+            hr = h[..., ::-1]
+            for n in range(N):
+                out[..., n] = np.sum(x[..., n:n + M] * hr, axis=-1)
+        return out
+
+    # Loop over the shorter of the two sequences, each pass is a
+    # vectorized multiply-accumulate over the whole batch.
+    if x.shape[-1] < h.shape[-1]:
+        x, h = h, x
+    N = x.shape[-1]
+    M = h.shape[-1]
+    out = np.zeros(batch + (N + M - 1,), dtype=dtype)
+    for k in range(M):
+        out[..., k:k + N] += x * h[..., k:k + 1]
+    return out
+
+def conv(x, h, method='auto', axis=-1):
     """ Linear convolution.
 
     c = conv(x, h) returns the linear convolution between x and h.
@@ -26,13 +588,29 @@ def conv(x, h):
     The output array, c, has length L = N + M - 1, where 
     N is the length of x and M is the length of h.
 
+    c = conv(..., method) selects the algorithm, one of {'auto', 'direct',
+    'fft'}. 'direct' convolves in time, 'fft' multiplies in the frequency
+    domain and 'auto', the default, picks the faster of the two from a
+    cost model, see calibrate_conv.
+
+    c = conv(..., axis) convolves batches of sequences held in 2-D arrays
+    along axis. A 1-D x or h is broadcast against the other input, so one
+    filter can be applied to many signals or many filters to one signal.
+    The whole batch is computed in a single vectorized pass.
+
     Parameters
     -----------
     x : ndarray
-        Input sequence
+        Input sequence, or 2-D array of input sequences
 
     h : ndarray
-        Input sequence
+        Input sequence, or 2-D array of input sequences
+
+    method : string
+        One of {'auto', 'direct', 'fft'}, default is 'auto'
+
+    axis : int
+        Axis along which to convolve, default is -1
 
     Returns
     --------
@@ -41,6 +619,7 @@ def conv(x, h):
 
     See Also
     ---------
+    Convolver, blockconv, calibrate_conv
 
     Notes
     ------
@@ -48,6 +627,16 @@ def conv(x, h):
     the frequency domain, X(f) H(f). The frequency domain transformation
     and multiplication is more efficient (faster) than convolving in time.
 
+    The FFT size is the smallest 5-smooth number that is at least
+    L = N + M - 1, see nextfastlen. When the same h is applied many
+    times, use a Convolver so the spectrum of h is only computed once.
+
+    For short sequences, such as pulse shapes of a few dozen taps, direct
+    convolution in time is faster than the FFT. The crossover depends on
+    the host machine; run calibrate_conv once to measure it.
+
+    When x and h are both real, real FFTs are used and the result is real.
+
     References
     -----------
     .. [1] Wikipedia, "Convolution", http://en.wikipedia.org/wiki/Convolution
@@ -60,38 +649,283 @@ def conv(x, h):
     >>> x = np.array([1,2,3])
     >>> h = np.array([0,1,0.5])
     >>> vt.conv(x, h)
-    array([  7.49400542e-16,   1.00000000e+00,   2.50000000e+00,
-        4.00000000e+00,   1.50000000e+00])
+    array([ 0. ,  1. ,  2.5,  4. ,  1.5])
+
+    >>> X = np.random.randn(100, 1000)
+    >>> C = vt.conv(X, h)
+    >>> C.shape
+    (100, 1002)
 
     """
 
     # Input error checking
     assert_ndarray(x)
     assert_ndarray(h)
-    assert_one_dimension(x)
-    assert_one_dimension(h)
+    assert_max_dimension(x, 2)
+    assert_max_dimension(h, 2)
 
-    N = len(x) + len(h) - 1
+    if h.ndim == 1:
+        return Convolver(h).conv(x, method, axis)
+    else:
+        return Convolver(h, axis).conv(x, method, axis)
 
-    # Compute FFT size
-    p = nextpower2(2*N)
-    fftSize = 2**p
+class FMDetector(object):
+    """
+    Streaming FM discriminator.
+
+    fmd = FMDetector(Fs) constructs an FM discriminator object for data
+    with sampling frequency Fs Hz. fmd.detect(x) returns the instantaneous
+    frequency, in Hz, of each sample of x. The last sample of each block
+    is carried to the next call, so a stream can be processed in blocks
+    of any size, in constant memory, without losing samples or producing
+    glitches at the block boundaries.
 
-    # Compute FFT of inputs
-    X = fft(x,fftSize)
-    H = fft(h,fftSize)
+    Parameters
+    -----------
+    Fs : float
+        Sampling frequency, in Hz
 
-    # Actual convolution
-    temp = ifft(X * H)
+    Notes
+    ------
+    The phase difference between successive samples is computed with the
+    conjugate product angle(x[n] * conj(x[n-1])), which is already wrapped
+    to [-pi, pi], so no unwrap pass over the data is needed. Before the
+    first sample the phase reference is 0 radians, so the first output is
+    the phase of x[0] scaled to Hz.
 
-    # Remove values that result from FFT padding
-    out = temp[0:N]
+    See Also
+    ---------
+    fmdetect
 
-    # Should output be real or complex
-    if x.dtype == 'complex' or h.dtype == 'complex':
-        return out
-    else:
-        return np.real(out)
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> x = np.exp(1j * 2 * np.pi * 0.1 * np.arange(1000))
+    >>> fmd = vt.FMDetector(1.0)
+    >>> z1 = fmd.detect(x[0:500])
+    >>> z2 = fmd.detect(x[500:])
+
+    """
+
+    def __init__(self, Fs):
+        """
+        Constructor
+        """
+        self._Fs = Fs
+        self.reset()
+
+    def reset(self):
+        """
+        Reset internal state variables
+        """
+        self._last = np.ones(1, dtype='complex')
+
+    def detect(self, x):
+        """
+        Instantaneous FM frequency
+
+        z = FMDetector.detect(x) returns the instantaneous frequency, in Hz,
+        of each sample of the block x. If x is a 2-D array each row is a
+        separate stream, and the last sample is kept per row.
+
+        Parameters
+        -----------
+        x : ndarray, complex data
+            Input block
+
+        Returns
+        -------
+        z : ndarray
+            Instantaneous frequency, in Hz
+
+        """
+
+        # Input error checking
+        assert_ndarray(x)
+        assert_max_dimension(x, 2)
+
+        last = self._last
+        if last.ndim < x.ndim:
+            last = np.broadcast_to(last, x.shape[0:-1] + (1,))
+        elif last.shape[0:-1] != x.shape[0:-1]:
+            raise ValueError("input rows do not match the detector state, "
+                             "call reset()")
+
+        if x.shape[-1] == 0:
+            return np.zeros(x.shape, dtype=x.real.dtype)
+
+        dtype = np.result_type(x.dtype, np.complex64)
+        xe = np.concatenate((last.astype(dtype), x), axis=-1)
+        delta_phase = np.angle(xe[..., 1:] * np.conj(xe[..., 0:-1]))
+
+        self._last = x[..., -1:].copy()
+
+        return self._Fs / (2 * np.pi) * delta_phase
+
+class Interpolator(object):
+    """
+    Polyphase interpolator.
+
+    ip = Interpolator(h, up) constructs an interpolation filter object.
+    ip.filter(x) upsamples x by inserting up-1 zeros between each sample
+    and filters the result with the FIR filter h, returning up * len(x)
+    samples. The filter memory is carried between calls, so
+    successive blocks give the same result as one long block.
+
+    The filter is split into up polyphase components of length
+    ceil(len(h) / up), each one applied at the input rate, so the
+    inserted zeros are never multiplied. This costs about 1/up of
+    filtering the upsampled data.
+
+    Parameters
+    -----------
+    h : ndarray
+        FIR filter coefficients
+
+    up : int
+        Upsample value
+
+    See Also
+    ---------
+    upfirdn, upsample
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> import scipy.signal
+    >>> h = vt.rectpulse(1, 4)
+    >>> x = 2 * np.random.randint(0, 2, 100) - 1
+    >>> ip = vt.Interpolator(h, 4)
+    >>> y = ip.filter(x)
+    >>> ycheck = scipy.signal.lfilter(h, 1, vt.upsample(x, 4))
+    >>> np.allclose(y, ycheck)
+    True
+
+    """
+
+    def __init__(self, h, up):
+        """
+        Constructor
+        """
+        # Input error checking
+        assert_ndarray(h)
+        assert_one_dimension(h)
+
+        self._up = up
+        self._h = h
+
+        # Polyphase components, phases[k, p] = h[k*up + p]
+        Q = -(-len(h) // up)
+        taps = np.zeros(Q * up, dtype=h.dtype)
+        taps[0:len(h)] = h
+        self._phases = taps.reshape(Q, up)
+
+        self.reset()
+
+    def reset(self):
+        """
+        Reset internal state variables
+        """
+        # The state holds the last Q-1 input samples
+        self._zinit = np.zeros(self._phases.shape[0] - 1, dtype=self._h.dtype)
+
+    def filter(self, x):
+        """
+        Interpolate a block of data
+
+        y = Interpolator.filter(x) returns up * len(x) output samples.
+        If x is a 2-D array each row is filtered, and the filter memory
+        is kept per row.
+
+        Parameters
+        -----------
+        x : ndarray
+            Input block
+
+        Returns
+        -------
+        y : ndarray
+            Output block
+
+        """
+
+        # Input error checking
+        assert_ndarray(x)
+        assert_max_dimension(x, 2)
+
+        hist = self._zinit
+        if hist.ndim < x.ndim:
+            hist = np.broadcast_to(hist, x.shape[0:-1] + hist.shape[-1:])
+        elif hist.shape[0:-1] != x.shape[0:-1]:
+            raise ValueError("input rows do not match the filter state, "
+                             "call reset()")
+
+        # Floating point inputs keep their precision, integer inputs, such
+        # as symbols, take the precision of the filter
+        dtype = _float_result((x, self._h))
+
+        Q = self._phases.shape[0]
+        N = x.shape[-1]
+        xe = np.concatenate((hist.astype(dtype), x.astype(dtype)), axis=-1)
+
+        # Output y[n*up + p] = sum_k phases[k, p] * x[n-k]
+        y = np.zeros(x.shape[0:-1] + (N, self._up), dtype=dtype)
+        for k in range(Q):
+            y += xe[..., Q - 1 - k:Q - 1 - k + N, np.newaxis] * self._phases[k]
+
+        self._zinit = xe[..., xe.shape[-1] - (Q - 1):]
+
+        return y.reshape(x.shape[0:-1] + (N * self._up,))
+
+def blockconv(x, h, nfft=None, method='ola'):
+    """ Block linear convolution.
+
+    c = blockconv(x, h) returns the linear convolution between x and h,
+    computed in fixed-size blocks. The result is the same as conv(x, h),
+    but the FFT size, and therefore the size of the temporary buffers,
+    depends only on the length of h and not on the length of x.
+
+    c = blockconv(..., nfft, method) uses FFTs of length nfft and the
+    block method given by method, one of {'ola', 'ols'}.
+
+    Parameters
+    -----------
+    x : ndarray
+        Input sequence
+
+    h : ndarray
+        Filter sequence
+
+    nfft : int
+        FFT size, must be at least len(h). Default is chosen from len(h).
+
+    method : string
+        'ola' for overlap-add or 'ols' for overlap-save, default is 'ola'
+
+    Returns
+    --------
+    c : ndarray
+        Convolution sequence of length len(x) + len(h) - 1
+
+    See Also
+    ---------
+    BlockConvolver, conv
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> x = np.random.randn(100000)
+    >>> h = np.random.randn(64)
+    >>> c = vt.blockconv(x, h, 512)
+    >>> np.allclose(c, vt.conv(x, h))
+    True
+
+    """
+    bc = BlockConvolver(h, nfft, method)
+    return np.concatenate((bc.filter(x), bc.flush()))
 
 def fmdetect(x, Fs):
     """ Instantaneous FM frequency.
@@ -112,6 +946,10 @@ def fmdetect(x, Fs):
     z : ndarray
         Instantaneous frequency, in Hz
 
+    See Also
+    ---------
+    FMDetector
+
     Examples
     ---------
     >>> import numpy as np
@@ -135,6 +973,124 @@ def fmdetect(x, Fs):
 
     return z
 
+def freqshift(x, fshift, Fs, nco=None):
+    """ Frequency shift.
+
+    y = freqshift(x, fshift, Fs) shifts the data in x, sampled at Fs Hz, by
+    fshift Hz. Sample n of x, counted from 0, is multiplied by
+    exp(j 2 pi fshift n / Fs). If x is a 2-D array each row is shifted.
+
+    y = freqshift(..., nco) mixes x with the output of the NCO object nco
+    instead, so the phase continues from the oscillator state and a stream
+    can be shifted in blocks. Each sample is mixed with the oscillator
+    phase before the NCO advances, so a freshly reset NCO gives the same
+    result as freqshift without one. The NCO must run at Fs Hz.
+
+    Parameters
+    -----------
+    x : ndarray
+        Input data
+
+    fshift : float
+        Frequency shift, in Hz
+
+    Fs : float
+        Sampling frequency, in Hz
+
+    nco : NCO
+        Oscillator, default is None
+
+    Returns
+    --------
+    y : ndarray of complex
+        Shifted data
+
+    See Also
+    ---------
+    NCO
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> x = np.ones(4)
+    >>> y = vt.freqshift(x, 0.25, 1.0)
+
+    """
+
+    # Input error checking
+    assert_ndarray(x)
+    assert_max_dimension(x, 2)
+
+    dtype = np.result_type(_float_result((x,)), _complex_dtype())
+    if nco is not None:
+        if nco.sample_rate != Fs:
+            raise ValueError("NCO sample rate must equal Fs")
+        if x.shape[-1] == 0:
+            return x.astype(dtype)
+
+        # NCO.generate returns the phase after each step, mix with the
+        # phase before it
+        phase = nco.phase
+        v = nco.generate(np.full(x.shape, fshift, dtype=float))
+        first = np.broadcast_to(np.exp(1j * phase), v.shape[0:-1])
+        v = np.concatenate((first[..., np.newaxis].astype(v.dtype),
+                            v[..., 0:-1]), axis=-1)
+        return (x * v).astype(dtype, copy=False)
+
+    n = np.arange(x.shape[-1])
+    phase = np.mod(fshift / float(Fs) * n, 1.0)
+    return (x * np.exp(2j * np.pi * phase)).astype(dtype, copy=False)
+
+def nextfastlen(n):
+    """ Next fast FFT size.
+
+    m = nextfastlen(n) returns the smallest 5-smooth number m >= n, that
+    is, the smallest m = 2**a * 3**b * 5**c that is at least n. FFTs of
+    these sizes are fast, and they are never more than 25% longer than n,
+    whereas the next power of 2 can be almost twice as long.
+
+    Parameters
+    -----------
+    n : int
+        Minimum size
+
+    Returns
+    --------
+    m : int
+        FFT size
+
+    See Also
+    ---------
+    nextpower2
+
+    Examples
+    ---------
+    >>> import velvet as vt
+    >>> vt.nextfastlen(513)
+    540
+
+    """
+    n = int(n)
+    if n <= 1:
+        return 1
+
+    best = 2**nextpower2(n)
+
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            # Smallest power of 2 multiple of p35 that is >= n
+            quotient = -(-n // p35)
+            p2 = p35 * 2**(quotient - 1).bit_length()
+            if p2 < best:
+                best = p2
+            p35 *= 3
+        p5 *= 5
+
+    return best
+
 def nextpower2(x):
     """ Next power of 2.
 
@@ -170,11 +1126,103 @@ def nextpower2(x):
     v = int(np.ceil(np.log2(temp)))
     return v
  
-def upsample(x, N):
+def upfirdn(h, x, up=1, down=1):
+    """ Upsample, FIR filter and downsample.
+
+    y = upfirdn(h, x, up, down) upsamples x by inserting up-1 zeros
+    between each sample, filters the result with the FIR filter h and
+    keeps every down-th output sample. Only the kept output samples are
+    computed, and the inserted zeros are never multiplied.
+
+    The output has length ((len(x) - 1) * up + len(h) - 1) // down + 1,
+    the full convolution of the upsampled data with h, decimated.
+
+    Parameters
+    -----------
+    h : ndarray
+        FIR filter coefficients
+
+    x : ndarray
+        Input data, or 2-D array of input rows
+
+    up : int
+        Upsample value, default is 1
+
+    down : int
+        Downsample value, default is 1
+
+    Returns
+    --------
+    y : ndarray
+        Output data
+
+    Notes
+    ------
+    Output sample m is at m*down in the upsampled signal, so it takes the
+    polyphase branch h[r::up], r = m*down mod up, from the input sample
+    m*down // up on. The branch repeats every up/gcd(up, down) outputs,
+    while the input advances by down/gcd(up, down) samples, so each branch
+    is a multiply-accumulate over strided slices of x, as in Interpolator.
+
+    See Also
+    ---------
+    Interpolator, upsample, conv
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> vt.upfirdn(np.ones(3), np.array([1., 2., 3.]), 2)
+    array([ 1.,  1.,  3.,  2.,  5.,  3.,  3.])
+
+    """
+
+    # Input error checking
+    assert_ndarray(h)
+    assert_one_dimension(h)
+    assert_ndarray(x)
+    assert_max_dimension(x, 2)
+
+    # Floating point inputs keep their precision
+    dtype = _float_result((x, h))
+    N = x.shape[-1]
+    L = ((N - 1) * up + len(h) - 1) // down + 1
+
+    # Polyphase branches, phases[k, r] = h[k*up + r]
+    Q = -(-len(h) // up)
+    phases = np.zeros(Q * up, dtype=h.dtype)
+    phases[0:len(h)] = h
+    phases = phases.reshape(Q, up)
+
+    # Input with Q-1 leading zeros and zeros past its end up to the input
+    # sample of the last output
+    last = ((L - 1) * down) // up
+    xe = np.zeros(x.shape[0:-1] + (Q - 1 + max(last + 1, N),), dtype=dtype)
+    xe[..., Q - 1:Q - 1 + N] = x
+
+    # Outputs m0, m0 + P, ... share branch r and step D input samples
+    g = np.gcd(up, down)
+    P = up // g
+    D = down // g
+    y = np.zeros(x.shape[0:-1] + (L,), dtype=dtype)
+    for m0 in range(min(P, L)):
+        r = (m0 * down) % up
+        start = (m0 * down) // up + Q - 1
+        stop = start + (len(range(m0, L, P)) - 1) * D + 1
+        for k in range(Q):
+            y[..., m0::P] += phases[k, r] * xe[..., start - k:stop - k:D]
+
+    return y
+
+def upsample(x, N, out=None):
     """Upsample data.
 
     y = upsample(x, N) upsamples the data in array x by factor N. Upsampling
-    is accomplished by inserting N-1 zeros between each sample of x.
+    is accomplished by inserting N-1 zeros between each sample of x. If x
+    is a 2-D array, each row is upsampled.
+
+    y = upsample(..., out) writes the result into the array out, which
+    must have the shape and dtype of the result, and returns it.
 
     Parameters
     -----------
@@ -184,6 +1232,9 @@ def upsample(x, N):
     N : int
         Upsample value
 
+    out : ndarray
+        Optional output array
+
     Returns
     --------
     y : ndarray
@@ -191,7 +1242,7 @@ def upsample(x, N):
 
     See Also
     ---------
-    repeat
+    repeat, upfirdn
 
     Examples
     ---------
@@ -205,13 +1256,18 @@ def upsample(x, N):
 
     # Input error checking
     assert_ndarray(x)
-    assert_one_dimension(x)
+    assert_max_dimension(x, 2)
 
-    y = np.zeros(N * len(x), dtype=x.dtype)
+    shape = x.shape[0:-1] + (N * x.shape[-1],)
+    if out is None:
+        y = np.zeros(shape, dtype=x.dtype)
+    else:
+        assert_ndarray(out)
+        if out.shape != shape or out.dtype != x.dtype:
+            raise ValueError("out must have the shape and dtype of the result")
+        y = out
+        y.fill(0)
 
-    jj = 0
-    for ii in np.arange(len(x)):
-        y[jj] = x[ii]
-        jj += N
+    y[..., ::N] = x
 
     return y
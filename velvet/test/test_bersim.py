@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+#------------------------------------------------------------------------
+# Copyright (c) 2015 SGW
+#
+# Distributed under the terms of the New BSD License.
+#
+# The full License is in the file LICENSE
+#------------------------------------------------------------------------
+
+import unittest
+import numpy as np
+import velvet as vt
+
+class TestBERSim(unittest.TestCase):
+
+    def setUp(self):
+        self.link = vt.CPMLink(2, 1.0/2400, 0.5, np.ones(4), 4, num_syms=500)
+
+    def test_bersim(self):
+        # MSK detected by the Viterbi algorithm, whose bit errors come in
+        # pairs, against the minimum distance bound
+        EbNodB = np.array([2.0, 4.0, 6.0])
+        ber, errors, bits = vt.bersim(self.link, EbNodB, processes=1, seed=3)
+        self.assertTrue(np.all(errors >= 100))
+        self.assertTrue(np.array_equal(ber, errors / bits.astype(float)))
+        ratio = ber / vt.berawgn(EbNodB, 'cpfsk', 2, 0.5, 2)
+        self.assertTrue(np.all((ratio > 0.7) & (ratio < 1.5)))
+
+    def test_stop(self):
+        ber, errors, bits = vt.bersim(self.link, [0.0, 30.0], min_errors=20,
+                                      max_bits=5000, processes=1, seed=0)
+        self.assertTrue(errors[0] >= 20 and bits[0] < 5000)
+        self.assertEqual(bits[1], 5000)
+        self.assertEqual(errors[1], 0)
+
+        # A loose confidence interval stops before min_errors
+        ber, errors, bits = vt.bersim(self.link, 0.0, rtol=0.5, processes=1,
+                                      seed=0)
+        lower, upper = vt.berconfint(errors, bits)
+        self.assertTrue(errors[0] < 100)
+        self.assertTrue((upper - lower) / 2 <= 0.5 * ber[0])
+
+    def test_processes(self):
+        # Results depend on the seed only
+        r1 = vt.bersim(self.link, [1.0, 3.0], min_errors=50, processes=1,
+                       batches=2, seed=7)
+        r2 = vt.bersim(self.link, [1.0, 3.0], min_errors=50, processes=2,
+                       batches=3, seed=7)
+        for a, b in zip(r1, r2):
+            self.assertTrue(np.array_equal(a, b))
+
+    def test_link(self):
+        link = vt.CPMLink(4, 1.0/2400, 0.25, np.ones(8), 8, num_syms=100,
+                          detector='soft')
+        x, y = link(vt.AWGNChannel(0), 40.0)
+        self.assertEqual(len(x), 200)
+        self.assertTrue(np.array_equal(x, y))
+        self.assertAlmostEqual(link.snr(10.0), 10.0 + 10*np.log10(2.0/8))
+        self.assertRaises(ValueError, vt.CPMLink, 2, 1.0/2400, 0.5,
+                          np.ones(4), 4, 100, 'foo')
+
+    def test_isber(self):
+        # Importance sampling reaches the MSK bound far below the reach
+        # of plain Monte Carlo
+        link = vt.CPMLink(2, 1.0/2400, 0.5, np.ones(8), 8, num_syms=16,
+                          detector='soft')
+        EbNodB = np.array([10.0, 12.0])
+        ber, lower, upper = vt.isber(link, EbNodB, trials=2000, seed=0)
+        ratio = ber / vt.berawgn(EbNodB, 'cpfsk', 2, 0.5, 2)
+        self.assertTrue(np.all((ratio > 0.8) & (ratio < 1.25)))
+        self.assertTrue(np.all((lower < ber) & (ber < upper)))
+        self.assertTrue(np.all(upper - lower < 0.3 * ber))
+
+        # Agrees with plain Monte Carlo where both apply
+        ber, lower, upper = vt.isber(link, 3.0, trials=2000, seed=1)
+        mc = vt.bersim(link, 3.0, min_errors=400, processes=1, seed=1)[0]
+        self.assertTrue(abs(ber[0] / mc[0] - 1.0) < 0.15)
+
+    def test_isber_rtol(self):
+        link = vt.CPMLink(4, 1.0/2400, 0.25, np.ones(8), 8, num_syms=8,
+                          detector='soft')
+        ber, lower, upper = vt.isber(link, 8.0, trials=10000, batch=200,
+                                     rtol=0.2, seed=2)
+        self.assertTrue((upper - ber) <= 0.2 * ber)
+
+    def test_importance(self):
+        link = vt.CPMLink(4, 1.0/2400, 0.25, np.ones(8), 8, num_syms=9)
+        x, y, logw = link.importance(vt.AWGNChannel(0), 6.0, 5)
+        self.assertEqual(x.shape, (5, 2))
+        self.assertEqual(y.shape, (5, 2))
+        self.assertEqual(logw.shape, (5,))
+
+def mysuite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestBERSim)
+
+if __name__ == '__main__':
+    suite = mysuite()
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    
@@ -36,8 +36,203 @@ class TestSigProcFunctions(unittest.TestCase):
         for ind in np.arange(len(y)):
             self.assertNotEqual(x[ind], y[ind])
 
+    def test_awgn_sweep(self):
+        x = np.exp(1j * np.arange(20000))
+        snr = np.array([0.0, 10.0, 20.0])
+        y = vt.awgn(x, snr)
+        self.assertEqual(y.shape, (3, 20000))
+        self.assertTrue(np.allclose(np.var(y - x, axis=1), 10**(-snr / 10), rtol=0.05))
+
+        # Common random numbers scale one realization
+        y = vt.awgn(x.real, [0.0, 10.0], common=True)
+        self.assertTrue(np.allclose(y[0] - x.real, np.sqrt(10) * (y[1] - x.real)))
+
+    def test_awgn_single(self):
+        x = np.ones(1000, dtype=np.complex64)
+        y = vt.awgn(x, 10)
+        self.assertEqual(y.dtype, np.complex64)
+        y = vt.awgn(x.real, 10)
+        self.assertEqual(y.dtype, np.float32)
+
+        # Drawn in single precision, reproducible with np.random.seed
+        np.random.seed(4)
+        y = vt.awgn(np.ones(20000, dtype=np.complex64), [0.0, 10.0])
+        self.assertEqual(y.dtype, np.complex64)
+        self.assertAlmostEqual(np.var(y[0]), 1.0, delta=0.05)
+        self.assertAlmostEqual(np.var(y[1]), 0.1, delta=0.005)
+        np.random.seed(4)
+        self.assertTrue(np.array_equal(
+            vt.awgn(np.ones(20000, dtype=np.complex64), [0.0, 10.0]), y))
+        np.random.seed(4)
+        y = vt.awgn(x.real, [0.0, 10.0], common=True)
+        self.assertEqual(y.dtype, np.float32)
+        self.assertTrue(np.allclose(y[0] - 1, np.sqrt(10) * (y[1] - 1),
+                                    atol=1e-5))
+
+class TestAWGNChannel(unittest.TestCase):
+
+    def test_awgn(self):
+        x = np.exp(1j * np.arange(20000))
+        ch = vt.AWGNChannel(1234)
+        y = ch.awgn(x, 10.0)
+        self.assertAlmostEqual(np.var(y - x), 0.1, places=2)
+
+        # Reproducible from the seed
+        ch.reset()
+        self.assertTrue(np.array_equal(ch.awgn(x, 10.0), y))
+        self.assertTrue(np.array_equal(vt.AWGNChannel(1234).awgn(x, 10.0), y))
+
+        # Real noise for real signals
+        y = ch.awgn(np.cos(np.arange(20000)), 10.0, sigpower=0.0)
+        self.assertEqual(y.dtype, np.float64)
+        self.assertAlmostEqual(np.var(y - np.cos(np.arange(20000))), 0.1, places=2)
+
+    def test_awgn_sweep(self):
+        x = np.exp(1j * np.arange(20000))
+        snr = np.array([0.0, 10.0, 20.0])
+        ch = vt.AWGNChannel(0)
+        y = ch.awgn(x, snr)
+        self.assertEqual(y.shape, (3, 20000))
+        self.assertTrue(np.allclose(np.var(y - x, axis=1), 10**(-snr / 10), rtol=0.05))
+
+        y = ch.awgn(x, snr, common=True)
+        self.assertTrue(np.allclose(y[0] - x, 10 * (y[2] - x)))
+
+        # One SNR per burst
+        y = ch.awgn(np.vstack((x, x)), snr[0:2])
+        self.assertTrue(np.allclose(np.var(y - x, axis=1), [1.0, 0.1], rtol=0.05))
+
+    def test_awgn_batch(self):
+        x = np.vstack((np.ones(20000), 10 * np.ones(20000))) + 0j
+        y = vt.AWGNChannel(0).awgn(x, 0.0)
+        self.assertTrue(np.allclose(np.var(y - x, axis=1), [1.0, 100.0], rtol=0.05))
+
+    def test_awgn_single(self):
+        ch = vt.AWGNChannel(0)
+        self.assertEqual(ch.awgn(np.ones(10, dtype=np.complex64), 10).dtype,
+                         np.complex64)
+        self.assertEqual(ch.noise(10, iscomplex=False, precision='single').dtype,
+                         np.float32)
+
+    def test_spawn(self):
+        ch = vt.AWGNChannel(5)
+        a, b = ch.spawn(2)
+        na = a.noise(1000)
+        self.assertFalse(np.array_equal(na, b.noise(1000)))
+        self.assertTrue(np.array_equal(na, vt.AWGNChannel(5).spawn(2)[0].noise(1000)))
+
+    def test_isnoise(self):
+        # Weighted tail probabilities are unbiased for mean shifts,
+        # mixtures and variance scaling
+        ch = vt.AWGNChannel(0)
+        pCorrect = vt.qfunc(4.0)
+        n, logw = ch.isnoise((100000, 1), 1.0, np.array([[0.0], [4.0]]),
+                             probs=[0.1, 0.9], iscomplex=False)
+        self.assertEqual(logw.shape, (100000,))
+        p = np.mean((n[:, 0] > 4.0) * np.exp(logw))
+        self.assertAlmostEqual(p / pCorrect, 1.0, places=1)
+
+        n, logw = ch.isnoise((100000, 1), 1.0, scale=3.0, iscomplex=False)
+        p = np.mean((n[:, 0] > 4.0) * np.exp(logw))
+        self.assertAlmostEqual(p / pCorrect, 1.0, places=1)
+
+        # Complex bursts, with the shifts broadcast against the bursts
+        n, logw = ch.isnoise((200000, 4), 2.0, np.array([[0.0]*4, [0.3]*4]))
+        self.assertAlmostEqual(np.mean(np.exp(logw)), 1.0, places=2)
+        self.assertRaises(ValueError, ch.isnoise, (10, 4), 1.0,
+                          np.zeros((2, 4)), probs=[0.5, 0.6])
+
+class TestFadingChannel(unittest.TestCase):
+
+    def test_gains(self):
+        ch = vt.FadingChannel(50.0, 10000.0, realizations=200, seed=0)
+        g = ch.gains(4000)
+        self.assertEqual(g.shape, (200, 1, 4000))
+
+        # Unit power, and the Clarke autocorrelation J0(2 pi fd tau)
+        self.assertAlmostEqual(np.mean(np.abs(g)**2), 1.0, places=1)
+        r = np.mean(g[:, 0, 50:] * np.conj(g[:, 0, 0:-50]))
+        self.assertAlmostEqual(r.real, 0.472, places=1)
+
+        # Blocks continue the fading
+        ch.reset()
+        g2 = np.concatenate([ch.gains(n) for n in [100, 7, 3893]], axis=-1)
+        self.assertTrue(np.allclose(g, g2))
+
+    def test_gains_groups(self):
+        # Realizations processed in several groups give the same gains
+        ch = vt.FadingChannel(50.0, 10000.0, [0, 1], realizations=5, seed=4)
+        g = ch.gains(1000)
+        ch.reset()
+        ch._table_size = 2 * 4 * 16 * 32
+        self.assertTrue(np.allclose(ch.gains(1000), g))
+        self.assertFalse(hasattr(ch, '_row'))
+
+    def test_gains_rician(self):
+        ch = vt.FadingChannel(50.0, 10000.0, [0, 2], [0.0, -3.0], K=[10.0, 0.0],
+                              realizations=100, seed=1)
+        g = ch.gains(4000)
+        self.assertTrue(np.allclose(np.mean(np.abs(g)**2, axis=(0, 2)),
+                                    [1.0, 0.5], rtol=0.1))
+
+        # A strong line-of-sight component fades less
+        var = np.var(np.abs(g), axis=(0, 2))
+        self.assertTrue(var[0] < var[1])
+
+    def test_filter(self):
+        x = np.random.randn(4, 1000) + 0j
+        ch = vt.FadingChannel(100.0, 48000.0, [0, 3, 7], [0.0, -3.0, -9.0],
+                              realizations=4, seed=2)
+        y = np.concatenate((ch.filter(x[:, 0:400]), ch.filter(x[:, 400:])), axis=1)
+
+        ch.reset()
+        g = ch.gains(1000)
+        yCorrect = g[:, 0] * x
+        yCorrect[:, 3:] += g[:, 1, 3:] * x[:, 0:-3]
+        yCorrect[:, 7:] += g[:, 2, 7:] * x[:, 0:-7]
+        self.assertTrue(np.allclose(y, yCorrect))
+
+        # Flat fading of a single channel
+        ch = vt.FadingChannel(10.0, 1000.0, seed=3)
+        y = ch.filter(np.ones(100))
+        self.assertEqual(y.shape, (100,))
+        ch.reset()
+        self.assertTrue(np.allclose(y, ch.gains(100)[0]))
+
+    def test_ValueError(self):
+        self.assertRaises(ValueError, vt.FadingChannel, 10.0, 1000.0, [0, 1], [0.0])
+        self.assertRaises(ValueError, vt.FadingChannel, 10.0, 1000.0, [-1], [0.0])
+
+class TestMultipathChannel(unittest.TestCase):
+
+    def test_filter(self):
+        np.random.seed(0)
+        x = np.random.randn(3, 2000) + 1j * np.random.randn(3, 2000)
+        for M in [5, 300]:
+            h = np.random.randn(3, M) + 1j * np.random.randn(3, M)
+            yCorrect = np.array([np.convolve(a, b)[0:2000] for a, b in zip(x, h)])
+            for method in ['auto', 'direct', 'fft']:
+                ch = vt.MultipathChannel(h, method)
+                y = [ch.filter(x[:, a:b]) for a, b in [(0, 7), (7, 1500), (1500, 2000)]]
+                self.assertTrue(np.allclose(np.concatenate(y, axis=1), yCorrect))
+
+        # One impulse response for a batch of bursts, and one burst
+        ch = vt.MultipathChannel(h[0])
+        y = ch.filter(x)
+        self.assertTrue(np.allclose(y[1], np.convolve(x[1], h[0])[0:2000]))
+        self.assertRaises(ValueError, ch.filter, x[0:2])
+        ch.reset()
+        self.assertTrue(np.allclose(ch.filter(x[1]), y[1]))
+
+    def test_ValueError(self):
+        self.assertRaises(ValueError, vt.MultipathChannel, np.ones(4), 'foo')
+
 def mysuite():
-    return unittest.TestLoader().loadTestsFromTestCase(TestSigProcFunctions)
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestSigProcFunctions)
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestAWGNChannel))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestFadingChannel))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestMultipathChannel))
+    return suite
 
 if __name__ == '__main__':
     suite = mysuite()
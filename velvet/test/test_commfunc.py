@@ -8,6 +8,9 @@
 # The full License is in the file LICENSE
 #------------------------------------------------------------------------
 
+import os
+import shutil
+import tempfile
 import unittest
 import numpy as np
 import velvet as vt
@@ -24,6 +27,80 @@ class TestCommFunctions(unittest.TestCase):
         for ind in np.arange(len(ber)):
             self.assertAlmostEqual(ber[ind],berC[ind])
 
+    def test_berawgn_cpm(self):
+        # The minimum distance search reproduces the CPFSK bound
+        folder = tempfile.mkdtemp()
+        environ = os.environ.get('VELVET_CACHE_DIR')
+        os.environ['VELVET_CACHE_DIR'] = folder
+        try:
+            EbNodB = np.arange(10)
+            ber = vt.berawgn(EbNodB, 'cpm', 2, 0.5, u=np.ones(8), fsT=8)
+            berC = vt.berawgn(EbNodB, 'cpfsk', 2, 0.5, 2)
+            self.assertTrue(np.allclose(ber, berC))
+            ber = vt.berawgn(EbNodB, 'cpm', 2, 0.5, 1, np.ones(8), 8)
+            self.assertTrue(np.allclose(ber, berC / 2))
+            self.assertRaises(ValueError, vt.berawgn, EbNodB, 'cpm', 2, 0.5)
+        finally:
+            if environ is None:
+                del os.environ['VELVET_CACHE_DIR']
+            else:
+                os.environ['VELVET_CACHE_DIR'] = environ
+            shutil.rmtree(folder)
+
+    def test_berawgn_broadcast(self):
+        EbNodB = np.arange(10.0)[:, np.newaxis, np.newaxis]
+        M = np.array([2, 4, 8])[:, np.newaxis]
+        h = np.array([0.25, 0.5, 0.7])
+        ber = vt.berawgn(EbNodB, 'cpfsk', M, h, 1)
+        self.assertEqual(ber.shape, (10, 3, 3))
+        for ii in range(3):
+            for jj in range(3):
+                berC = vt.berawgn(EbNodB[:, 0, 0], 'cpfsk', M[ii, 0], h[jj], 1)
+                self.assertTrue(np.allclose(ber[:, ii, jj], berC))
+        self.assertTrue(np.isscalar(vt.berawgn(5.0, 'qpsk', 4)))
+
+    def test_berawgn_modtypes(self):
+        EbNodB = np.arange(12.0)
+        EbNoLin = 10**(EbNodB / 10)
+        berC = vt.qfunc(np.sqrt(2 * EbNoLin))
+        self.assertTrue(np.allclose(vt.berawgn(EbNodB, 'bpsk', 2), berC))
+        self.assertTrue(np.allclose(vt.berawgn(EbNodB, 'qpsk', 4), berC))
+        self.assertTrue(np.allclose(vt.berawgn(EbNodB, 'qam', 4), berC))
+        ber = vt.berawgn(EbNodB[:, np.newaxis], 'psk', [2, 4])
+        self.assertTrue(np.allclose(ber, berC[:, np.newaxis]))
+
+        # 8-PSK and 16-QAM
+        ber = vt.berawgn(10.0, 'psk', 8)
+        self.assertAlmostEqual(ber, 2.0/3 * vt.qfunc(np.sqrt(60) * np.sin(np.pi/8)))
+        ber = vt.berawgn(10.0, 'qam', 16)
+        self.assertAlmostEqual(ber, 0.75 * vt.qfunc(np.sqrt(8.0)))
+
+        # Noncoherent FSK, and the union bound for larger M
+        ber = vt.berawgn(EbNodB, 'fsk', 2)
+        self.assertTrue(np.allclose(ber, 0.5 * np.exp(-EbNoLin / 2)))
+        ber = vt.berawgn(12.0, 'fsk', [4, 32])
+        bound = [M / 4.0 * np.exp(-np.log2(M) * 10**1.2 / 2) for M in [4, 32]]
+        self.assertTrue(np.all(ber < bound) and np.all(ber > 0.9 * np.array(bound)))
+
+    def test_berawgn_M_ValueError(self):
+        self.assertRaises(ValueError, vt.berawgn, 5.0, 'qam', 8)
+        self.assertRaises(ValueError, vt.berawgn, 5.0, 'bpsk', 4)
+        self.assertRaises(ValueError, vt.berawgn, 5.0, 'fsk', 64)
+        self.assertRaises(ValueError, vt.berawgn, 5.0, 'psk', 6)
+
+    def test_berawgninv(self):
+        ber = np.array([1e-3, 1e-6, 1e-9])[:, np.newaxis]
+        M = np.array([4, 16, 64])
+        EbNodB = vt.berawgninv(ber, 'qam', M)
+        self.assertEqual(EbNodB.shape, (3, 3))
+        self.assertTrue(np.allclose(vt.berawgn(EbNodB, 'qam', M), ber))
+        self.assertAlmostEqual(vt.berawgninv(1e-6, 'bpsk', 2), 10.5298, places=4)
+
+        EbNodB = vt.berawgninv(1e-5, 'cpfsk', 2, [0.5, 0.7], 1)
+        self.assertTrue(np.allclose(vt.berawgn(EbNodB, 'cpfsk', 2, [0.5, 0.7], 1),
+                                    1e-5))
+        self.assertTrue(np.isnan(vt.berawgninv(0.7, 'bpsk', 2)))
+
     def test_berawgn_cpfsk_ValueError(self):
         EbNodB = np.arange(10)
         self.assertRaises(ValueError, vt.berawgn, EbNodB, 'cpfsk', 2)
@@ -33,6 +110,17 @@ class TestCommFunctions(unittest.TestCase):
         unsupported_mod_type = 'qam'
         self.assertRaises(ValueError, vt.berawgn, EbNodB, unsupported_mod_type, 2)
 
+    def test_berconfint(self):
+        lower, upper = vt.berconfint(10, 100)
+        self.assertAlmostEqual(lower, 0.0490047, places=6)
+        self.assertAlmostEqual(upper, 0.1762226, places=6)
+
+        lower, upper = vt.berconfint([0, 5], 5, 0.9)
+        self.assertEqual(lower[0], 0.0)
+        self.assertAlmostEqual(upper[0], 1 - 0.05**0.2)
+        self.assertEqual(upper[1], 1.0)
+        self.assertRaises(ValueError, vt.berconfint, 6, 5)
+
     def test_biterr(self):
         x = np.array([0, 1, 1, 0])
         y = np.array([1, 1, 0, 0])
@@ -43,6 +131,66 @@ class TestCommFunctions(unittest.TestCase):
         n = vt.biterr(x, y)
         self.assertEqual(n, 0)
 
+    def test_biterr_batch(self):
+        x = np.random.randint(0, 2, (3, 1000))
+        y = x.copy()
+        y[0, 0:5] ^= 1
+        y[2, 100:300] ^= 1
+        self.assertTrue(np.array_equal(vt.biterr(x, y), [5, 0, 200]))
+        self.assertRaises(ValueError, vt.biterr, x, y[:, 0:999])
+
+    def test_biterr_packed(self):
+        x = np.random.randint(0, 2, (3, 1024))
+        y = x.copy()
+        y[:, ::3] ^= 1
+        px = np.packbits(x, axis=-1)
+        py = np.packbits(y, axis=-1)
+        nCorrect = vt.biterr(x, y)
+        self.assertTrue(np.array_equal(vt.biterr(px, py, True), nCorrect))
+        self.assertTrue(np.array_equal(vt.biterr(px.view(np.uint64),
+                                                 py.view(np.uint64), True), nCorrect))
+        self.assertEqual(vt.biterr(px[0], py[0], packed=True), nCorrect[0])
+        self.assertRaises(TypeError, vt.biterr, x, y, True)
+
+    def test_errorcounter(self):
+        x = np.random.randint(0, 2, 1000)
+        y = x.copy()
+        y[::10] ^= 1
+        ec = vt.ErrorCounter()
+        for n in range(0, 1000, 250):
+            ec.update(x[n:n+250], y[n:n+250])
+        self.assertEqual(ec.errors, 100)
+        self.assertEqual(ec.bits, 1000)
+        self.assertAlmostEqual(ec.ber, 0.1)
+
+        ec = vt.ErrorCounter(packed=True)
+        ec.update(np.packbits(np.vstack((x, y))), np.packbits(np.vstack((x, x))))
+        self.assertEqual(ec.bits, 2000)
+        self.assertEqual(ec.errors, 100)
+        ec.reset()
+        self.assertEqual(ec.errors, 0)
+        self.assertEqual(ec.ber, 0.0)
+
+        # Padding of a block that is not a multiple of 8 bits long
+        for n in range(0, 1000, 100):
+            ec.update(np.packbits(x[n:n+100]), np.packbits(y[n:n+100]), 100)
+        self.assertEqual(ec.bits, 1000)
+        self.assertEqual(ec.errors, 100)
+        self.assertAlmostEqual(ec.ber, 0.1)
+        self.assertRaises(ValueError, ec.update, np.packbits(x[0:100]),
+                          np.packbits(y[0:100]), 105)
+        self.assertRaises(ValueError, vt.ErrorCounter().update, x, y, 1000)
+
+    def test_bits2syms(self):
+        b = np.array([0, 0, 0, 1, 1, 0, 1, 1])
+        x = vt.bits2syms(b, 4)
+        self.assertTrue(np.array_equal(x, np.array([-3, -1, 1, 3])))
+        self.assertTrue(np.array_equal(vt.syms2bits(x, 4), b))
+
+        b = np.random.randint(0, 2, (3, 24))
+        self.assertTrue(np.array_equal(vt.syms2bits(vt.bits2syms(b, 8), 8), b))
+        self.assertRaises(ValueError, vt.bits2syms, b[:, 0:-1], 8)
+
     def test_qfunc(self):
         x = np.array([0,1,2,3])
         y = vt.qfunc(x)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+
+#------------------------------------------------------------------------
+# Copyright (c) 2015 SGW
+#
+# Distributed under the terms of the New BSD License.
+#
+# The full License is in the file LICENSE
+#------------------------------------------------------------------------
+
+import unittest
+import numpy as np
+import velvet as vt
+
+class TestCPMDemod(unittest.TestCase):
+
+    def test_demod(self):
+        # Noiseless signals must be detected without errors, including
+        # partial response pulses
+        configs = [(2, np.ones(4), 4, 0.5), (4, np.hanning(12), 8, 0.25),
+                   (4, np.ones(24), 8, 0.75), (8, np.ones(8), 8, 0.125)]
+        for M, u, fsT, h in configs:
+            cpm = vt.CPMMod(M, 1.0/2400, h, u, fsT)
+            demod = vt.CPMDemod(M, 1.0/2400, h, u, fsT)
+            syms = 2 * np.random.randint(0, M, 200) - (M - 1)
+            y = demod.demod(cpm.mod(syms))
+            self.assertTrue(np.array_equal(y, syms))
+
+    def test_demod_noise(self):
+        np.random.seed(0)
+        cpm = vt.CPMMod(2, 1.0/2400, 0.5, np.hanning(16), 8)
+        demod = vt.CPMDemod(2, 1.0/2400, 0.5, np.hanning(16), 8)
+        syms = 2 * np.random.randint(0, 2, 500) - 1
+        y = demod.demod(vt.awgn(cpm.mod(syms), 0.0))
+        self.assertTrue(np.sum(y != syms) < 5)
+
+    def test_demod_stream(self):
+        # Blocks that split symbols, and a bounded traceback depth, give
+        # the same decisions as one block
+        np.random.seed(1)
+        cpm = vt.CPMMod(4, 1.0/2400, 0.25, np.ones(16), 8)
+        syms = 2 * np.random.randint(0, 4, 300) - 3
+        y = vt.awgn(cpm.mod(syms), 6.0)
+        xCorrect = vt.CPMDemod(4, 1.0/2400, 0.25, np.ones(16), 8).demod(y)
+
+        demod = vt.CPMDemod(4, 1.0/2400, 0.25, np.ones(16), 8, tblen=30)
+        x = [demod.demod(block) for block in np.array_split(y, 7)]
+        self.assertTrue(len(demod._survivors) < 60)
+        x = np.concatenate(x + [demod.flush()])
+        self.assertTrue(np.array_equal(x, xCorrect))
+
+    def test_irrational_ValueError(self):
+        self.assertRaises(ValueError, vt.CPMDemod, 2, 1.0/2400, np.pi/8,
+                          np.ones(4), 4)
+
+class TestCPMSoftDemod(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(2)
+        self.cpm = vt.CPMMod(4, 1.0/2400, 0.25, np.ones(16), 8)
+        self.bits = np.random.randint(0, 2, (4, 300))
+        x = self.cpm.mod(vt.bits2syms(self.bits, 4))
+        self.noise_var = 10**(-4.0/10)
+        noise = np.random.randn(*x.shape) + 1j * np.random.randn(*x.shape)
+        self.y = x + np.sqrt(self.noise_var / 2.0) * noise
+
+    def test_demod_noiseless(self):
+        demod = vt.CPMSoftDemod(2, 1.0/2400, 0.5, np.hanning(12), 4)
+        bits = np.random.randint(0, 2, 100)
+        cpm = vt.CPMMod(2, 1.0/2400, 0.5, np.hanning(12), 4)
+        llr = demod.demod(cpm.mod(vt.bits2syms(bits, 2)), 0.1)
+        self.assertTrue(np.array_equal(llr > 0, bits))
+
+    def test_demod_maxlog(self):
+        # Max-log decisions are the maximum-likelihood sequence
+        demod = vt.CPMSoftDemod(4, 1.0/2400, 0.25, np.ones(16), 8)
+        llr = demod.demod(self.y, self.noise_var)
+        self.assertEqual(llr.shape, self.bits.shape)
+        for n in range(self.y.shape[0]):
+            viterbi = vt.CPMDemod(4, 1.0/2400, 0.25, np.ones(16), 8)
+            x = vt.syms2bits(viterbi.demod(self.y[n]), 4)
+            self.assertTrue(np.array_equal(llr[n] > 0, x))
+
+    def test_demod_logmap(self):
+        demod = vt.CPMSoftDemod(4, 1.0/2400, 0.25, np.ones(16), 8, 'logmap')
+        llr = demod.demod(self.y, self.noise_var)
+        errors = np.sum((llr > 0) != self.bits)
+        maxlog = vt.CPMSoftDemod(4, 1.0/2400, 0.25, np.ones(16), 8)
+        llr = maxlog.demod(self.y, self.noise_var)
+        self.assertTrue(errors <= np.sum((llr > 0) != self.bits) + 5)
+        llr = demod.demod(self.y, self.noise_var)
+
+        # A frame alone gives the same result as in a batch
+        self.assertTrue(np.allclose(demod.demod(self.y[1], self.noise_var), llr[1]))
+
+    def test_demod_window(self):
+        full = vt.CPMSoftDemod(4, 1.0/2400, 0.25, np.ones(16), 8, 'logmap')
+        window = vt.CPMSoftDemod(4, 1.0/2400, 0.25, np.ones(16), 8, 'logmap',
+                                 window=40, overlap=40)
+        llr = window.demod(self.y, self.noise_var)
+        self.assertTrue(np.allclose(llr, full.demod(self.y, self.noise_var)))
+
+    def test_demod_ValueError(self):
+        demod = vt.CPMSoftDemod(4, 1.0/2400, 0.25, np.ones(16), 8)
+        self.assertRaises(ValueError, demod.demod, self.y[0, 0:-1], 1.0)
+        self.assertRaises(ValueError, vt.CPMSoftDemod, 4, 1.0/2400, 0.25,
+                          np.ones(16), 8, 'sova')
+
+class TestDiscriminatorDemod(unittest.TestCase):
+
+    def test_demod(self):
+        np.random.seed(3)
+        cpm = vt.CPMMod(4, 1.0/2400, 0.5, vt.rectpulse(1, 8), 8)
+        syms = 2 * np.random.randint(0, 4, (3, 200)) - 3
+        v = cpm.mod(syms)
+
+        demod = vt.DiscriminatorDemod(4, 1.0/2400, 0.5, 8)
+        self.assertTrue(np.array_equal(demod.demod(v), syms))
+
+        # Blocks that split symbols
+        demod.reset()
+        x = [demod.demod(block) for block in np.array_split(v, 7, axis=1)]
+        self.assertTrue(np.array_equal(np.concatenate(x, axis=1), syms))
+
+    def test_demod_carrier_phase(self):
+        # The first symbol does not depend on the phase before the stream
+        np.random.seed(7)
+        cpm = vt.CPMMod(2, 1.0/2400, 0.5, vt.rectpulse(1, 8), 8)
+        syms = 2 * np.random.randint(0, 2, 40) - 1
+        v = cpm.mod(syms)
+        demod = vt.DiscriminatorDemod(2, 1.0/2400, 0.5, 8)
+        for phase in (2.62, np.pi, 4.71):
+            demod.reset()
+            x = np.concatenate((demod.demod(v[0:5] * np.exp(1j * phase)),
+                                demod.demod(v[5:] * np.exp(1j * phase))))
+            self.assertTrue(np.array_equal(x, syms))
+
+    def test_demod_offset(self):
+        np.random.seed(4)
+        cpm = vt.CPMMod(2, 1.0/2400, 0.5, vt.rectpulse(1, 4), 4)
+        syms = 2 * np.random.randint(0, 2, 100) - 1
+        v = np.concatenate((np.ones(5, dtype='complex'), cpm.mod(syms)))
+        demod = vt.DiscriminatorDemod(2, 1.0/2400, 0.5, 4, offset=5)
+        x = np.concatenate((demod.demod(v[0:3]), demod.demod(v[3:])))
+        self.assertTrue(np.array_equal(x, syms))
+
+    def test_demod_ValueError(self):
+        demod = vt.DiscriminatorDemod(2, 1.0/2400, 0.5, 4)
+        demod.demod(np.ones((2, 8), dtype='complex'))
+        self.assertRaises(ValueError, demod.demod,
+                          np.ones((3, 8), dtype='complex'))
+
+class TestMFSKDemod(unittest.TestCase):
+
+    def test_demod(self):
+        np.random.seed(5)
+        cpm = vt.CPMMod(8, 1.0/2400, 1.0, vt.rectpulse(1, 16), 16)
+        syms = 2 * np.random.randint(0, 8, (2, 300)) - 7
+        v = cpm.mod(syms)
+
+        demod = vt.MFSKDemod(cpm)
+        e = demod.energies(v)
+        self.assertEqual(e.shape, (2, 300, 8))
+        demod.reset()
+        x = [demod.demod(block) for block in np.array_split(v, 5, axis=1)]
+        self.assertTrue(np.array_equal(np.concatenate(x, axis=1), syms))
+
+    def test_demod_noise(self):
+        np.random.seed(6)
+        cpm = vt.CPMMod(4, 1.0/2400, 1.0, vt.rectpulse(1, 8), 8)
+        syms = 2 * np.random.randint(0, 4, 500) - 3
+        x = vt.MFSKDemod(cpm).demod(vt.awgn(cpm.mod(syms), 5.0))
+        self.assertTrue(np.sum(x != syms) < 5)
+
+    def test_ValueError(self):
+        # Partial response pulses do not hold one tone per symbol
+        cpm = vt.CPMMod(4, 1.0/2400, 1.0, np.hanning(24), 8)
+        self.assertRaises(ValueError, vt.MFSKDemod, cpm)
+        cpm = vt.CPMMod(4, 1.0/2400, 1.0, vt.rectpulse(2, 8), 8)
+        self.assertRaises(ValueError, vt.MFSKDemod, cpm)
+
+def mysuite():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestCPMDemod)
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCPMSoftDemod))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDiscriminatorDemod))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestMFSKDemod))
+    return suite
+
+if __name__ == '__main__':
+    suite = mysuite()
+    unittest.TextTestRunner(verbosity=2).run(suite)
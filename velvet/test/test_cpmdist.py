@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+#------------------------------------------------------------------------
+# Copyright (c) 2015 SGW
+#
+# Distributed under the terms of the New BSD License.
+#
+# The full License is in the file LICENSE
+#------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import velvet as vt
+import velvet.cpmdist
+
+class TestCPMDist(unittest.TestCase):
+
+    def setUp(self):
+        # Keep the disk cache out of the home directory
+        self.folder = tempfile.mkdtemp()
+        self.environ = os.environ.get('VELVET_CACHE_DIR')
+        os.environ['VELVET_CACHE_DIR'] = self.folder
+        velvet.cpmdist._dmin_cache.clear()
+
+    def tearDown(self):
+        if self.environ is None:
+            del os.environ['VELVET_CACHE_DIR']
+        else:
+            os.environ['VELVET_CACHE_DIR'] = self.environ
+        velvet.cpmdist._dmin_cache.clear()
+        shutil.rmtree(self.folder)
+
+    def test_cpfsk(self):
+        # MSK, and the two symbol events of full response CPFSK
+        d2, Kmin = vt.cpmdmin(2, 0.5, np.ones(8), 8)
+        self.assertAlmostEqual(d2, 2.0)
+        self.assertAlmostEqual(Kmin, 2.0)
+        for M, h, fsT in [(2, 0.25, 32), (4, 0.25, 4), (8, 0.125, 8)]:
+            d2, Kmin = vt.cpmdmin(M, h, np.ones(fsT), fsT)
+            k = np.arange(1, M)
+            d2B = np.min(2 * np.log2(M) * (1 - np.sinc(2 * k * h)))
+            self.assertAlmostEqual(d2 / d2B, 1.0, places=12)
+
+    def test_partial_response(self):
+        # Exhaustive search over difference sequences of up to 7 symbols
+        d2, Kmin = vt.cpmdmin(2, 1.0/3, np.hanning(18)[1:-1], 8)
+        self.assertAlmostEqual(d2, 1.0638875451816476)
+        d2, Kmin = vt.cpmdmin(2, 0.5, np.ones(24), 8)
+        self.assertAlmostEqual(d2, 1.3460133137346233)
+        d2, Kmin = vt.cpmdmin(4, 0.4, np.hanning(10)[1:-1], 4)
+        self.assertAlmostEqual(d2, 2.7830348790870536)
+        self.assertAlmostEqual(Kmin, 2.25)
+
+    def test_catastrophic(self):
+        # The minimum distance events of M=4, h=1/4 3REC never end, their
+        # multiplicity does not shrink with the search length
+        u = np.ones(24)
+        d2, Kmin = vt.cpmdmin(4, 0.25, u, 8, nmax=32)
+        self.assertEqual(vt.cpmdmin(4, 0.25, u, 8, nmax=64), (d2, Kmin))
+        self.assertEqual(Kmin, 1.0)
+        ber = vt.berawgn(10.0, 'cpm', 4, 0.25, u=u, fsT=8)
+        self.assertAlmostEqual(ber, vt.qfunc(np.sqrt(10.0 * d2)) / 2)
+
+    def test_cache(self):
+        u = np.hanning(26)[1:-1]
+        result = vt.cpmdmin(2, 0.5, u, 8)
+        path = os.path.join(self.folder, 'cpmdmin.json')
+        with open(path) as f:
+            entries = json.load(f)
+        self.assertEqual(len(entries), 1)
+
+        # Later sessions read the file, scaling the pulse does not matter
+        key = list(entries)[0]
+        with open(path, 'w') as f:
+            json.dump({key: [1.0, 3.0]}, f)
+        velvet.cpmdist._dmin_cache.clear()
+        self.assertEqual(vt.cpmdmin(2, 0.5, 2 * u, 8), (1.0, 3.0))
+        self.assertEqual(vt.cpmdmin(2, 0.5, u, 8, cache=False), result)
+
+    def test_cache_failure(self):
+        # A cache that cannot be replaced leaves no temporary file behind
+        os.mkdir(os.path.join(self.folder, 'cpmdmin.json'))
+        result = vt.cpmdmin(2, 0.5, np.ones(8), 8)
+        self.assertEqual(result, vt.cpmdmin(2, 0.5, np.ones(8), 8, cache=False))
+        self.assertEqual(os.listdir(self.folder), ['cpmdmin.json'])
+
+    def test_ValueError(self):
+        self.assertRaises(ValueError, vt.cpmdmin, 3, 0.5, np.ones(4), 4)
+
+def mysuite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestCPMDist)
+
+if __name__ == '__main__':
+    suite = mysuite()
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    
@@ -26,6 +26,14 @@ class TestCPM(unittest.TestCase):
         for ind in np.arange(len(yCorrect)):
             self.assertAlmostEqual(syms[ind],yCorrect[ind])
 
+    def test_properties(self):
+        cpm = vt.CPMMod(4, 1.0/2400, 0.5, np.ones(8), 8)
+        self.assertEqual(cpm.alphabet_size, 4)
+        self.assertEqual(cpm.mod_index, 0.5)
+        self.assertEqual(cpm.symbol_period, 1.0/2400)
+        self.assertEqual(cpm.samples_per_symbol, 8)
+        self.assertEqual(cpm.freq_deviation, 600.0)
+
     def test_reset(self):
         cpm = vt.CPMMod(4, 1.0/2400, 0.5, np.ones(4), 4)
         syms = np.random.randint(0,4,30)
@@ -46,6 +54,83 @@ class TestCPM(unittest.TestCase):
         for ind in np.arange(len(syms)):
             self.assertAlmostEqual(y1[ind],y2[ind])
 
+    def test_mod_long(self):
+        # The phase state stays wrapped on a long stream, and the output
+        # keeps the linear MSK phase of all-ones symbols
+        for engine in ('filter', 'table'):
+            cpm = vt.CPMMod(2, 1.0/2400, 0.5, np.ones(4), 4, engine=engine)
+            for n in range(200):
+                v = cpm.mod(np.ones(1000, dtype=int))
+                self.assertTrue(0.0 <= cpm._phase_state < 2 * np.pi)
+            t = 4000 * 199 + np.arange(1, 4001)
+            self.assertTrue(np.allclose(v, np.exp(1j * np.pi / 8 * t)))
+
+    def test_mod_single(self):
+        # Single precision must stay close to double precision, also
+        # across calls on a long stream
+        syms = 2 * np.random.randint(0, 4, 20000) - 3
+        cpm64 = vt.CPMMod(4, 1.0/2400, 0.25, np.hanning(12), 8, 'double')
+        cpm32 = vt.CPMMod(4, 1.0/2400, 0.25, np.hanning(12), 8, 'single')
+        for block in np.split(syms, 4):
+            y64 = cpm64.mod(block)
+            y32 = cpm32.mod(block)
+            self.assertEqual(y32.dtype, np.complex64)
+            self.assertTrue(np.max(np.abs(y32 - y64)) < 1e-4)
+
+    def test_mod_table(self):
+        # The table engine must match the filter engine, including the
+        # start-up after reset and the state across calls
+        configs = [(2, np.ones(4), 4, 0.5), (4, np.hanning(12), 8, 0.25),
+                   (4, np.ones(24), 8, 0.75), (8, np.hanning(30), 8, 0.3)]
+        for M, u, fsT, h in configs:
+            cpm1 = vt.CPMMod(M, 1.0/2400, h, u, fsT)
+            cpm2 = vt.CPMMod(M, 1.0/2400, h, u, fsT, engine='table')
+            syms = 2 * np.random.randint(0, M, 300) - (M - 1)
+            for block in np.split(syms, [1, 2, 50, 200]):
+                y1 = cpm1.mod(block)
+                y2 = cpm2.mod(block)
+                self.assertTrue(np.allclose(y1, y2))
+            cpm1.reset()
+            cpm2.reset()
+            self.assertTrue(np.allclose(cpm1.mod(syms), cpm2.mod(syms)))
+
+    def test_mod_batch(self):
+        syms = 2 * np.random.randint(0, 4, (5, 60)) - 3
+        for engine in ('filter', 'table'):
+            cpm = vt.CPMMod(4, 1.0/2400, 0.25, np.hanning(20), 8, engine=engine)
+            Y = np.concatenate((cpm.mod(syms[:, 0:25]), cpm.mod(syms[:, 25:])),
+                               axis=1)
+            self.assertEqual(Y.shape, (5, 480))
+            for row in np.arange(5):
+                cpm.reset()
+                y = cpm.mod(syms[row])
+                self.assertTrue(np.allclose(Y[row], y))
+
+            # The state has one row per burst
+            cpm.reset()
+            cpm.mod(syms)
+            self.assertRaises(ValueError, cpm.mod, syms[0])
+            self.assertRaises(ValueError, cpm.mod, syms[0:2])
+
+    def test_engine_ValueError(self):
+        self.assertRaises(ValueError, vt.CPMMod, 2, 1.0/2400, 0.5, np.ones(4),
+                          4, None, 'foo')
+
+    def test_mod_nco(self):
+        syms = 2 * np.random.randint(0, 4, (2, 300)) - 3
+        vCorrect = vt.CPMMod(4, 1.0/2400, 0.25, np.hanning(16), 8).mod(syms)
+        for output in ['exp', 'rotation']:
+            nco = vt.NCO(8 * 2400.0, output=output)
+            cpm = vt.CPMMod(4, 1.0/2400, 0.25, np.hanning(16), 8, nco=nco)
+            v = np.concatenate((cpm.mod(syms[:, 0:100]), cpm.mod(syms[:, 100:])),
+                               axis=1)
+            self.assertTrue(np.allclose(v, vCorrect))
+
+        self.assertRaises(ValueError, vt.CPMMod, 4, 1.0/2400, 0.25, np.ones(8),
+                          8, None, 'table', vt.NCO(8 * 2400.0))
+        self.assertRaises(ValueError, vt.CPMMod, 4, 1.0/2400, 0.25, np.ones(8),
+                          8, nco=vt.NCO(2400.0))
+
     def test_max_ValueError(self):
         # M = 4, so max input must be less than 4.
         cpm = vt.CPMMod(4, 1.0/2400, 0.75, np.ones(4), 4)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+#------------------------------------------------------------------------
+# Copyright (c) 2015 SGW
+#
+# Distributed under the terms of the New BSD License.
+#
+# The full License is in the file LICENSE
+#------------------------------------------------------------------------
+
+import unittest
+import numpy as np
+import velvet as vt
+
+class TestLaurent(unittest.TestCase):
+
+    def test_laurent(self):
+        c = vt.laurent(0.5, np.hanning(24), 8)
+        self.assertEqual(c.shape, (4, 32))
+
+        # c_0 carries most of the energy
+        energy = np.sum(c**2, axis=1)
+        self.assertTrue(energy[0] > 0.9 * np.sum(energy))
+
+        # Cached
+        self.assertTrue(vt.laurent(0.5, np.hanning(24), 8) is c)
+        self.assertFalse(c.flags.writeable)
+
+    def test_laurent_ValueError(self):
+        self.assertRaises(ValueError, vt.laurent, 1.0, np.ones(4), 4)
+
+    def test_mod(self):
+        # All components rebuild the CPM signal after the first L-1 symbols
+        np.random.seed(0)
+        for h, u in [(0.5, np.ones(8)), (0.25, np.hanning(32))]:
+            L = -(-len(u) // 8)
+            syms = 2 * np.random.randint(0, 2, 300) - 1
+            vCorrect = vt.CPMMod(2, 1.0/2400, h, u, 8).mod(syms)
+
+            mod = vt.LaurentMod(2, 1.0/2400, h, u, 8)
+            v = np.concatenate([mod.mod(x) for x in np.array_split(syms, 4)])
+            self.assertTrue(np.allclose(v[(L - 1) * 8:], vCorrect[(L - 1) * 8:]))
+
+            # The principal component alone is a close approximation
+            mod = vt.LaurentMod(2, 1.0/2400, h, u, 8, K=1)
+            self.assertTrue(np.array_equal(mod.components, np.array([0])))
+            err = np.abs(mod.mod(syms) - vCorrect)[(L - 1) * 8:]
+            self.assertTrue(np.mean(err**2) < 0.01)
+
+    def test_mod_ValueError(self):
+        self.assertRaises(ValueError, vt.LaurentMod, 4, 1.0/2400, 0.25,
+                          np.ones(8), 8)
+        mod = vt.LaurentMod(2, 1.0/2400, 0.5, np.ones(8), 8)
+        self.assertRaises(ValueError, mod.mod, np.array([1, 3]))
+
+    def test_demod(self):
+        np.random.seed(1)
+        cpm = vt.CPMMod(2, 1.0/2400, 0.5, np.hanning(24), 8)
+        demod = vt.LaurentDemod(2, 1.0/2400, 0.5, np.hanning(24), 8)
+        self.assertEqual(demod.num_states, 4)
+
+        syms = 2 * np.random.randint(0, 2, 500) - 1
+        v = cpm.mod(syms)
+        self.assertTrue(np.array_equal(demod.demod(v)[0:-1], syms[0:-1]))
+        y = demod.demod(vt.awgn(v, 2.0))
+        self.assertTrue(np.sum(y != syms) < 5)
+
+    def test_demod_batch(self):
+        np.random.seed(2)
+        cpm = vt.CPMMod(2, 1.0/2400, 0.5, np.hanning(24), 8)
+        demod = vt.LaurentDemod(2, 1.0/2400, 0.5, np.hanning(24), 8)
+
+        syms = 2 * np.random.randint(0, 2, (3, 300)) - 1
+        v = np.array([vt.awgn(cpm.mod(s), 2.0) for s in syms])
+        y = []
+        for row in v:
+            demod.reset()
+            y.append(demod.demod(row))
+        demod.reset()
+        x = demod.demod(v)
+        self.assertEqual(x.shape, (3, 300))
+        self.assertTrue(np.array_equal(x, np.array(y)))
+
+    def test_demod_stream(self):
+        np.random.seed(3)
+        cpm = vt.CPMMod(2, 1.0/2400, 0.5, np.hanning(24), 8)
+        syms = 2 * np.random.randint(0, 2, (2, 400)) - 1
+        v = np.array([vt.awgn(cpm.mod(s), 2.0) for s in syms])
+
+        demod = vt.LaurentDemod(2, 1.0/2400, 0.5, np.hanning(24), 8)
+        y = demod.demod(v)
+
+        # Decisions tblen symbols deep match the whole block
+        demod = vt.LaurentDemod(2, 1.0/2400, 0.5, np.hanning(24), 8, tblen=40)
+        x = [demod.demod(v[:, n:n + 37]) for n in range(0, v.shape[-1], 37)]
+        x.append(demod.flush())
+        self.assertTrue(np.array_equal(np.concatenate(x, axis=-1), y))
+
+        # Without tblen every received symbol is decided exactly once
+        demod = vt.LaurentDemod(2, 1.0/2400, 0.5, np.hanning(24), 8)
+        x = [demod.demod(v[0, n:n + 100]) for n in range(0, v.shape[-1], 100)]
+        self.assertEqual([len(xn) for xn in x], [12, 13, 12, 13] * 8)
+        self.assertEqual(len(demod.flush()), 0)
+        self.assertTrue(np.sum(np.concatenate(x) != syms[0]) < 20)
+
+def mysuite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestLaurent)
+
+if __name__ == '__main__':
+    suite = mysuite()
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+#------------------------------------------------------------------------
+# Copyright (c) 2015 SGW
+#
+# Distributed under the terms of the New BSD License.
+#
+# The full License is in the file LICENSE
+#------------------------------------------------------------------------
+
+import unittest
+import numpy as np
+import velvet as vt
+
+class TestNCO(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.freq = np.repeat(np.random.choice([-600.0, -200.0, 200.0, 600.0], 500), 8)
+        self.vCorrect = np.exp(2j * np.pi * np.cumsum(self.freq / 8000.0))
+
+    def test_generate(self):
+        for output in ['exp', 'lut', 'rotation']:
+            nco = vt.NCO(8000.0, output=output)
+            v = np.concatenate([nco.generate(f) for f in np.array_split(self.freq, 7)])
+            tol = np.pi / 2**12 if output == 'lut' else 1e-9
+            self.assertTrue(np.max(np.abs(v - self.vCorrect)) < tol)
+
+        # The phase stays wrapped
+        self.assertTrue(0.0 <= nco.phase < 2.0 * np.pi)
+
+    def test_generate_short(self):
+        # One sample blocks, alone and mixed with longer ones, including
+        # blocks that end in a short chunk
+        bounds = [0, 1, 2, 3, 260, 261, 600, 601, len(self.freq)]
+        for output in ['exp', 'lut', 'rotation']:
+            nco = vt.NCO(8000.0, output=output)
+            v = nco.generate(self.freq[0:1])
+            self.assertEqual(v.shape, (1,))
+            nco.reset()
+            v = np.concatenate([nco.generate(self.freq[a:b])
+                                for a, b in zip(bounds[0:-1], bounds[1:])])
+            tol = np.pi / 2**12 if output == 'lut' else 1e-9
+            self.assertTrue(np.max(np.abs(v - self.vCorrect)) < tol)
+
+        nco = vt.NCO(8000.0, bits=32, output='rotation')
+        v = nco.generate(np.array([[100.0], [-100.0]]))
+        self.assertTrue(np.allclose(v[:, 0], np.exp(2j * np.pi * np.array([1, -1]) / 80)))
+
+    def test_generate_fixed(self):
+        # Frequencies on the accumulator grid are exact
+        nco = vt.NCO(8192.0, bits=24, output='rotation')
+        v = nco.generate(self.freq)
+        self.assertTrue(np.allclose(v, np.exp(2j * np.pi * np.cumsum(self.freq / 8192.0))))
+        self.assertTrue(isinstance(nco._acc, np.uint64))
+
+        nco = vt.NCO(8.0, bits=3, output='lut', table_bits=3)
+        v = nco.generate(np.ones(9))
+        vCorrect = np.exp(2j * np.pi * np.arange(1, 10) / 8.0)
+        self.assertTrue(np.allclose(v, vCorrect))
+
+    def test_generate_batch(self):
+        nco = vt.NCO(8000.0, output='rotation')
+        freq = np.vstack((self.freq, -self.freq))
+        v = nco.generate(freq)
+        self.assertEqual(nco.phase.shape, (2,))
+        self.assertTrue(np.allclose(v[1], np.conj(self.vCorrect)))
+        self.assertRaises(ValueError, nco.generate, self.freq)
+        nco.reset()
+        nco.generate(self.freq)
+
+    def test_single(self):
+        nco = vt.NCO(8000.0, output='lut', precision='single')
+        self.assertEqual(nco.generate(self.freq).dtype, np.complex64)
+
+    def test_ValueError(self):
+        self.assertRaises(ValueError, vt.NCO, 8000.0, output='cordic')
+        self.assertRaises(ValueError, vt.NCO, 8000.0, bits=64)
+
+def mysuite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestNCO)
+
+if __name__ == '__main__':
+    suite = mysuite()
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -10,6 +10,7 @@
 
 import unittest
 import numpy as np
+import scipy.signal
 import velvet as vt
 
 class TestSigProcFunctions(unittest.TestCase):
@@ -36,6 +37,198 @@ class TestSigProcFunctions(unittest.TestCase):
         for ind in np.arange(len(y)):
             self.assertAlmostEqual(y[ind],yCorrect[ind])
 
+    def test_blockconv(self):
+        np.random.seed(0)
+        x = np.random.randn(1000)
+        h = np.random.randn(37)
+        yCorrect = np.convolve(x, h)
+        for method in ('ola', 'ols'):
+            y = vt.blockconv(x, h, 64, method)
+            self.assertEqual(len(y), len(yCorrect))
+            self.assertTrue(np.allclose(y, yCorrect))
+            self.assertFalse(np.iscomplexobj(y))
+
+    def test_blockconv_complex(self):
+        np.random.seed(1)
+        x = np.random.randn(500) + 1j*np.random.randn(500)
+        h = np.random.randn(16)
+        yCorrect = np.convolve(x, h)
+        for method in ('ola', 'ols'):
+            y = vt.blockconv(x, h, 32, method)
+            self.assertTrue(np.allclose(y, yCorrect))
+
+    def test_blockconvolver_stream(self):
+        np.random.seed(2)
+        x = np.random.randn(2000)
+        h = np.random.randn(50)
+        yCorrect = np.convolve(x, h)
+        edges = [0, 1, 7, 300, 301, 1200, 2000]
+        for method in ('ola', 'ols'):
+            bc = vt.BlockConvolver(h, 128, method)
+            blocks = [bc.filter(x[a:b]) for a, b in zip(edges[:-1], edges[1:])]
+            for ii in np.arange(len(blocks)):
+                self.assertEqual(len(blocks[ii]), edges[ii+1] - edges[ii])
+            blocks.append(bc.flush())
+            self.assertTrue(np.allclose(np.concatenate(blocks), yCorrect))
+
+    def test_blockconvolver_batch(self):
+        np.random.seed(9)
+        x = np.random.randn(3, 600) + 1j*np.random.randn(3, 600)
+        h = np.random.randn(3, 20)
+        yCorrect = np.array([np.convolve(a, b) for a, b in zip(x, h)])
+        for method in ('ola', 'ols'):
+            bc = vt.BlockConvolver(h, 64, method)
+            y = np.concatenate((bc.filter(x[:, 0:250]), bc.filter(x[:, 250:]),
+                                bc.flush()), axis=1)
+            self.assertTrue(np.allclose(y, yCorrect))
+
+            # A 1-D filter keeps its memory per row
+            bc = vt.BlockConvolver(h[0], 64, method)
+            y = np.concatenate((bc.filter(x[:, 0:250]), bc.filter(x[:, 250:])), axis=1)
+            self.assertTrue(np.allclose(y[2], np.convolve(x[2], h[0])[0:600]))
+            self.assertRaises(ValueError, bc.filter, x[0:2])
+
+    def test_blockconvolver_direct(self):
+        # Direct and FFT blocks share the state, in any order and size
+        np.random.seed(10)
+        x = np.random.randn(3, 700) + 1j*np.random.randn(3, 700)
+        h = np.random.randn(3, 40)
+        yCorrect = np.array([np.convolve(a, b) for a, b in zip(x, h)])
+        edges = [0, 1, 7, 30, 300, 301, 650, 700]
+        for method in ('ola', 'ols'):
+            for H, X, Y in [(h, x, yCorrect), (h[0], x[0], yCorrect[0]),
+                            (h, x[0].real, None)]:
+                bc = vt.BlockConvolver(H, 64, method)
+                blocks = []
+                for ii in np.arange(len(edges) - 1):
+                    block = X[..., edges[ii]:edges[ii+1]]
+                    y = bc.direct(block) if ii % 2 else bc.filter(block)
+                    self.assertEqual(y.shape[-1], block.shape[-1])
+                    blocks.append(y)
+                blocks.append(bc.flush())
+                y = np.concatenate(blocks, axis=-1)
+                if Y is None:
+                    Y = np.array([np.convolve(X, b) for b in H])
+                self.assertTrue(np.allclose(y, Y))
+
+        bc = vt.BlockConvolver(h[0], 64, 'ols')
+        bc.direct(x)
+        self.assertRaises(ValueError, bc.direct, x[0:2])
+
+    def test_blockconvolver_ValueError(self):
+        h = np.ones(10)
+        self.assertRaises(ValueError, vt.BlockConvolver, h, 8)
+        self.assertRaises(ValueError, vt.BlockConvolver, h, 64, 'foo')
+
+    def test_conv_real(self):
+        np.random.seed(5)
+        x = np.random.randn(1000)
+        h = np.random.randn(300)
+        y = vt.conv(x, h, 'fft')
+        self.assertFalse(np.iscomplexobj(y))
+        self.assertTrue(np.allclose(y, np.convolve(x, h)))
+
+        cv = vt.Convolver(h)
+        self.assertEqual(len(cv.spectrum(1000, True)), 501)
+
+    def test_conv_method(self):
+        np.random.seed(4)
+        x = np.random.randn(300) + 1j*np.random.randn(300)
+        h = np.random.randn(25)
+        yCorrect = np.convolve(x, h)
+        for method in ('auto', 'direct', 'fft'):
+            y = vt.conv(x, h, method)
+            self.assertTrue(np.allclose(y, yCorrect))
+
+        # Integer inputs always give a float result
+        y = vt.conv(np.array([1, 2, 3]), np.array([1, 1]), 'direct')
+        self.assertEqual(y.dtype, np.float64)
+
+    def test_conv_method_ValueError(self):
+        x = np.ones(4)
+        self.assertRaises(ValueError, vt.conv, x, x, 'foo')
+
+    def test_calibrate_conv(self):
+        # Restore the default costs, so the other tests do not depend on
+        # the timings measured here
+        self.addCleanup(vt.sigproc._conv_cost.update,
+                        dict(vt.sigproc._conv_cost))
+        cost = vt.calibrate_conv(repeats=1)
+        for key in ('direct', 'fft', 'fft_call'):
+            self.assertTrue(cost[key] >= 0)
+        self.assertEqual(vt.sigproc._conv_method(10000, 4), 'direct')
+        self.assertEqual(vt.sigproc._conv_method(100000, 10000), 'fft')
+
+    def test_conv_batch(self):
+        np.random.seed(6)
+        X = np.random.randn(5, 200)
+        H = np.random.randn(5, 30) + 1j*np.random.randn(5, 30)
+        h = H[0]
+        for method in ('direct', 'fft'):
+            # One filter, many signals
+            Y = vt.conv(X, h, method)
+            self.assertEqual(Y.shape, (5, 229))
+            for row in np.arange(5):
+                self.assertTrue(np.allclose(Y[row], np.convolve(X[row], h)))
+
+            # Many filters, one signal, along axis 0
+            Y = vt.conv(X[0], H.T, method, axis=0)
+            self.assertEqual(Y.shape, (229, 5))
+            for row in np.arange(5):
+                self.assertTrue(np.allclose(Y[:, row], np.convolve(X[0], H[row])))
+
+            # Row by row
+            Y = vt.conv(X, H, method)
+            for row in np.arange(5):
+                self.assertTrue(np.allclose(Y[row], np.convolve(X[row], H[row])))
+
+    def test_conv_batch_ValueError(self):
+        X = np.ones((3, 10))
+        H = np.ones((4, 5))
+        self.assertRaises(ValueError, vt.conv, X, H)
+        self.assertRaises(TypeError, vt.conv, np.ones((2, 2, 2)), H)
+
+    def test_conv_single(self):
+        np.random.seed(10)
+        x = np.random.randn(2000) + 1j*np.random.randn(2000)
+        h = np.random.randn(100)
+        yCorrect = np.convolve(x, h)
+        for method in ('direct', 'fft'):
+            y = vt.conv(x.astype(np.complex64), h.astype(np.float32), method)
+            self.assertEqual(y.dtype, np.complex64)
+            err = np.max(np.abs(y - yCorrect)) / np.max(np.abs(yCorrect))
+            self.assertTrue(err < 1e-5)
+
+            y = vt.conv(x.real.astype(np.float32), h.astype(np.float32), method)
+            self.assertEqual(y.dtype, np.float32)
+
+        bc = vt.BlockConvolver(h.astype(np.float32), 256)
+        y = np.concatenate((bc.filter(x.astype(np.complex64)), bc.flush()))
+        self.assertEqual(y.dtype, np.complex64)
+        err = np.max(np.abs(y - yCorrect)) / np.max(np.abs(yCorrect))
+        self.assertTrue(err < 1e-5)
+
+    def test_single_precision(self):
+        x = np.exp(1j * np.linspace(0, 10, 50)).astype(np.complex64)
+        self.assertEqual(vt.fmdetect(x, 1.0).dtype, np.float32)
+        self.assertEqual(vt.FMDetector(1.0).detect(x).dtype, np.float32)
+        self.assertEqual(vt.upsample(x, 2).dtype, np.complex64)
+        h = np.ones(4, dtype=np.float32)
+        self.assertEqual(vt.Interpolator(h, 2).filter(np.arange(5)).dtype,
+                         np.float32)
+
+    def test_convolver(self):
+        np.random.seed(3)
+        h = np.random.randn(20)
+        cv = vt.Convolver(h)
+        for n in (1, 10, 100, 100):
+            x = np.random.randn(n)
+            self.assertTrue(np.allclose(cv.conv(x), np.convolve(x, h)))
+
+        # Spectra are cached per FFT size
+        H = cv.spectrum(vt.nextfastlen(119))
+        self.assertTrue(cv.spectrum(vt.nextfastlen(119)) is H)
+
     def test_fmdetect(self):
         x = np.arange(10) + 1j*np.arange(10)
         y = vt.fmdetect(x, 2.0)
@@ -44,12 +237,54 @@ class TestSigProcFunctions(unittest.TestCase):
         for ind in np.arange(len(y)):
             self.assertAlmostEqual(y[ind],yCorrect[ind])
 
+    def test_fmdetector(self):
+        np.random.seed(9)
+        freq = np.random.uniform(-0.4, 0.4, 300)
+        x = np.exp(1j * 2 * np.pi * np.cumsum(freq))
+        fmd = vt.FMDetector(1.0)
+        z = np.concatenate((fmd.detect(x[0:100]), fmd.detect(x[100:101]),
+                            fmd.detect(x[101:])))
+        self.assertEqual(len(z), len(x))
+        self.assertTrue(np.allclose(z, freq))
+
+        # Rows are separate streams
+        X = np.vstack((x, np.conj(x)))
+        fmd.reset()
+        Z = np.concatenate((fmd.detect(X[:, 0:150]), fmd.detect(X[:, 150:])),
+                           axis=1)
+        self.assertTrue(np.allclose(Z[0], freq))
+        self.assertTrue(np.allclose(Z[1], -freq))
+
     def test_nextpower2(self):
         x = 514
         y = vt.nextpower2(x)
         yCorrect = 10
         self.assertEqual(y,yCorrect)
 
+    def test_nextfastlen(self):
+        self.assertEqual(vt.nextfastlen(1), 1)
+        self.assertEqual(vt.nextfastlen(7), 8)
+        self.assertEqual(vt.nextfastlen(513), 540)
+        self.assertEqual(vt.nextfastlen(1000), 1000)
+        self.assertEqual(vt.nextfastlen(1025), 1080)
+
+    def test_freqshift(self):
+        x = np.random.randn(2, 100)
+        n = np.arange(100)
+        y = vt.freqshift(x, 100.0, 8000.0)
+        self.assertTrue(np.allclose(y, x * np.exp(2j * np.pi * 100.0 * n / 8000.0)))
+
+        # With an NCO the phase continues across blocks, and matches the
+        # shift without one
+        for bits in [None, 32]:
+            nco = vt.NCO(8000.0, bits=bits)
+            yNCO = np.concatenate((vt.freqshift(x[:, 0:30], 100.0, 8000.0, nco),
+                                   vt.freqshift(x[:, 30:31], 100.0, 8000.0, nco),
+                                   vt.freqshift(x[:, 31:], 100.0, 8000.0, nco)),
+                                  axis=1)
+            self.assertTrue(np.allclose(yNCO, y))
+        self.assertRaises(ValueError, vt.freqshift, x, 100.0, 4000.0, vt.NCO(8000.0))
+
     def test_upsample(self):
         x = np.array([1, 2, 3])
         y = vt.upsample(x, 2)
@@ -59,6 +294,51 @@ class TestSigProcFunctions(unittest.TestCase):
         for ind in np.arange(len(y)):
             self.assertAlmostEqual(y[ind], yCorrect[ind])
 
+    def test_upsample_out(self):
+        x = np.array([[1., 2.], [3., 4.]])
+        out = np.ones((2, 6))
+        y = vt.upsample(x, 3, out=out)
+        self.assertTrue(y is out)
+        yCorrect = np.array([[1, 0, 0, 2, 0, 0], [3, 0, 0, 4, 0, 0]])
+        self.assertTrue(np.array_equal(y, yCorrect))
+        self.assertRaises(ValueError, vt.upsample, x, 2, out)
+
+    def test_interpolator(self):
+        np.random.seed(7)
+        h = np.random.randn(11)
+        x = np.random.randn(50)
+        yCorrect = scipy.signal.lfilter(h, 1, vt.upsample(x, 4))
+        ip = vt.Interpolator(h, 4)
+        y = np.concatenate((ip.filter(x[0:13]), ip.filter(x[13:14]),
+                            ip.filter(x[14:])))
+        self.assertTrue(np.allclose(y, yCorrect))
+
+        # Rows keep separate filter state
+        X = np.random.randn(3, 20)
+        ip.reset()
+        Y = np.concatenate((ip.filter(X[:, 0:7]), ip.filter(X[:, 7:])), axis=1)
+        for row in np.arange(3):
+            yCorrect = scipy.signal.lfilter(h, 1, vt.upsample(X[row], 4))
+            self.assertTrue(np.allclose(Y[row], yCorrect))
+        self.assertRaises(ValueError, ip.filter, np.ones((2, 5)))
+
+    def test_upfirdn(self):
+        np.random.seed(8)
+        h = np.random.randn(7)
+        x = np.random.randn(30)
+        for up in (1, 2, 5):
+            for down in (1, 3, 4, 10):
+                y = vt.upfirdn(h, x, up, down)
+                yCorrect = np.convolve(vt.upsample(x, up), h)
+                yCorrect = yCorrect[0:(len(x) - 1) * up + len(h):down]
+                self.assertTrue(np.allclose(y, yCorrect))
+
+                Y = vt.upfirdn(h, np.vstack((x, 2 * x)), up, down)
+                self.assertTrue(np.allclose(Y, np.vstack((y, 2 * y))))
+
+        y = vt.upfirdn(h.astype(np.float32), x.astype(np.float32), 3, 2)
+        self.assertEqual(y.dtype, np.float32)
+
 def mysuite():
     return unittest.TestLoader().loadTestsFromTestCase(TestSigProcFunctions)
 
@@ -30,6 +30,23 @@ class TestUtilFunctions(unittest.TestCase):
         # Input must be an integer
         self.assertRaises(ValueError, vt.isodd, np.array([1, 1, 4.0]))
 
+    def test_precision(self):
+        self.assertEqual(vt.get_precision(), 'double')
+        try:
+            vt.set_precision('single')
+            self.assertEqual(vt.get_precision(), 'single')
+            y = vt.conv(np.array([1, 2, 3]), np.array([1, 1]))
+            self.assertEqual(y.dtype, np.float32)
+            cpm = vt.CPMMod(2, 1.0/2400, 0.5, np.ones(4), 4)
+            self.assertEqual(cpm.mod(np.array([1, -1, 1])).dtype, np.complex64)
+        finally:
+            vt.set_precision('double')
+        y = vt.conv(np.array([1, 2, 3]), np.array([1, 1]))
+        self.assertEqual(y.dtype, np.float64)
+
+    def test_precision_ValueError(self):
+        self.assertRaises(ValueError, vt.set_precision, 'half')
+
 
 def mysuite():
     return unittest.TestLoader().loadTestsFromTestCase(TestUtilFunctions)
@@ -14,9 +14,93 @@ import sys
 import numpy as np
 
 # Public API
-__all__ = ['isodd', 'ProgressBar']
+__all__ = ['get_precision', 'isodd', 'set_precision', 'ProgressBar']
 
+# Floating point types for each precision, (real, complex)
+_precision_types = {'single': (np.float32, np.complex64),
+                    'double': (np.float64, np.complex128)}
 
+# Library-wide default precision
+_precision = {'default': 'double'}
+
+
+def get_precision():
+    """ Get the default floating point precision
+
+    p = get_precision() returns the library-wide default precision, one of
+    {'single', 'double'}. See set_precision.
+
+    Returns
+    --------
+    p : string
+        Default precision
+
+    Examples
+    ---------
+    >>> import velvet as vt
+    >>> vt.get_precision()
+    'double'
+
+    """
+    return _precision['default']
+
+def set_precision(precision):
+    """ Set the default floating point precision
+
+    set_precision(p) sets the library-wide default precision, one of
+    {'single', 'double'}.
+
+    Functions that receive floating point data compute in the precision
+    of that data and never upcast it, so complex64 and float32 inputs give
+    complex64 and float32 outputs. The default precision is used when the
+    precision cannot be taken from the inputs, for example for integer
+    inputs, for the noise drawn by awgn, or for the signals generated by
+    objects such as CPMMod that are constructed without a precision.
+
+    Parameters
+    -----------
+    p : string
+        Precision, one of {'single', 'double'}
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> import velvet as vt
+    >>> vt.set_precision('single')
+    >>> vt.conv(np.array([1, 2, 3]), np.array([1, 1])).dtype
+    dtype('float32')
+    >>> vt.set_precision('double')
+
+    """
+    _precision['default'] = _check_precision(precision)
+
+def _check_precision(precision):
+    # Validate a precision value, None selects the default
+    if precision is None:
+        return _precision['default']
+    precision = str.lower(precision)
+    if precision not in _precision_types:
+        raise ValueError("precision must be one of {'single', 'double'}")
+    return precision
+
+def _real_dtype(precision=None):
+    # Real floating point type for a precision, None selects the default
+    return np.dtype(_precision_types[_check_precision(precision)][0])
+
+def _complex_dtype(precision=None):
+    # Complex floating point type for a precision, None selects the default
+    return np.dtype(_precision_types[_check_precision(precision)][1])
+
+def _float_result(arrays, precision=None):
+    # Floating point result type for a computation on arrays. Floating
+    # point inputs set the precision and are never upcast beyond their
+    # common type. Integer inputs only count as real, in the given
+    # precision.
+    inexact = [a.dtype for a in arrays if np.issubdtype(a.dtype, np.inexact)]
+    if inexact:
+        return np.result_type(*inexact)
+    else:
+        return _real_dtype(precision)
 
 def isodd(x):
     """ Check if a number is odd
@@ -12,7 +12,8 @@
 import numpy as np
 
 # Public API
-__all__ = ['assert_ndarray', 'assert_complex', 'assert_one_dimension']
+__all__ = ['assert_ndarray', 'assert_complex', 'assert_one_dimension',
+           'assert_max_dimension']
 
 
 def assert_ndarray(x):
@@ -23,6 +24,10 @@ def assert_one_dimension(x):
     if x.ndim != 1:
         raise TypeError("Input must have 1-dimension")
         
+def assert_max_dimension(x, n):
+    if x.ndim < 1 or x.ndim > n:
+        raise TypeError("Input must have 1 to %d dimensions" % n)
+
 def assert_complex(x):
     if np.all(np.isreal(x)):
         raise TypeError("Input must be complex")